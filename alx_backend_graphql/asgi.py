@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# GraphQL subscriptions over WebSocket on /graphql (graphql-transport-ws); HTTP goes to Django
+from crm.websocket import websocket_application  # noqa: E402  (needs the app registry loaded)
+
+application = websocket_application(django_application)
@@ -1,5 +1,5 @@
 import graphene
-from crm.schema import Query as CRMQuery, Mutation as CRMMutation
+from crm.schema import Query as CRMQuery, Mutation as CRMMutation, Subscription as CRMSubscription
 
 # Combine queries from CRM
 class Query(CRMQuery, graphene.ObjectType):
@@ -9,5 +9,9 @@ class Query(CRMQuery, graphene.ObjectType):
 class Mutation(CRMMutation, graphene.ObjectType):
     pass
 
+# Combine subscriptions from CRM (served over WebSocket, see asgi.py)
+class Subscription(CRMSubscription, graphene.ObjectType):
+    pass
+
 # Define the schema
-schema = graphene.Schema(query=Query, mutation=Mutation)
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
@@ -53,6 +53,70 @@ CRONJOBS = [
     ('0 */12 * * *', 'crm.cron.update_low_stock'),
 ]
 
+# How cron jobs and Celery tasks run their GraphQL documents: "local" executes
+# them in-process against the schema, "http" posts them to CRM_GRAPHQL_URL
+CRM_GRAPHQL_MODE = "local"
+CRM_GRAPHQL_URL = "http://localhost:8000/graphql"
+
+# Persisted queries (crm.persisted): "off", "apq" (cache documents, accept
+# hashes of registered queries) or "allowlist" (reject unregistered queries)
+CRM_PERSISTED_QUERIES = "apq"
+CRM_DOCUMENT_CACHE_SIZE = 1000
+# Client-registered APQ texts stay in a per-process LRU; longer texts are
+# executed but not remembered. Only register_queries persists documents.
+CRM_APQ_CACHE_SIZE = 1000
+CRM_APQ_MAX_LENGTH = 20000
+
+# GraphQL response cache (crm.response_cache): entries live in this Django
+# cache and are evicted by model signals. Off unless the alias names a cache
+# every web process shares (Redis, memcached); a timeout of 0 also disables it
+CRM_RESPONSE_CACHE_ALIAS = None
+CRM_RESPONSE_CACHE_TIMEOUT = 300
+
+# Threads AsyncGraphQLView (/graphql/async) runs ORM resolvers on
+CRM_ASYNC_GRAPHQL_WORKERS = 8
+
+# Query cost limits (crm.cost), checked before execution; weights are keyed
+# "Type.field" and default to 1 per object field, 0 per scalar
+CRM_QUERY_MAX_COST = 5000
+CRM_QUERY_MAX_DEPTH = 8
+CRM_QUERY_MAX_PAGE_SIZE = 100
+CRM_QUERY_FIELD_WEIGHTS = {
+    "OrderNode.products": 2,
+}
+
+# Most operations a JSON-array (batched) request to /graphql may carry
+CRM_GRAPHQL_MAX_BATCH_SIZE = 20
+
+# GraphQL subscriptions over WebSocket (crm.websocket, crm.broadcast): events
+# a slow client may fall behind before its oldest are dropped, and seconds a
+# new connection has to send connection_init. The broadcast is in-process, so
+# subscribers only see writes made by the same server process.
+CRM_SUBSCRIPTION_QUEUE_SIZE = 100
+CRM_GRAPHQL_WS_INIT_TIMEOUT = 10
+
+# Per-resolver metrics (crm.instrumentation, exported on /metrics): share of
+# operations instrumented, and the request header that forces it and returns
+# the breakdown in extensions.metrics (honoured under DEBUG or for staff users)
+CRM_METRICS_SAMPLE_RATE = 0.05
+CRM_METRICS_DEBUG_HEADER = "X-CRM-Debug"
+
+# Order reminders (crm.reminders): dotted path of the sender class, and the
+# file the default FileSender appends to
+CRM_REMINDER_SENDER = "crm.reminders.FileSender"
+CRM_REMINDER_LOG_FILE = "/tmp/order_reminders_log.txt"
+
+# Inactive-customer cleanup (crm.cleanup): where an interrupted run records
+# the last customer id it finished, so the next run resumes there
+CRM_CLEANUP_CHECKPOINT_FILE = "/tmp/crm_customer_cleanup.checkpoint"
+
+# GET /export/orders streams customer PII: staff sessions may use it, and so
+# may clients sending "Authorization: Bearer <token>" when this is set
+CRM_EXPORT_TOKEN = None
+# POST /import/customers writes in bulk: staff sessions (with a CSRF token)
+# may use it, and so may clients sending "Authorization: Bearer <token>"
+CRM_IMPORT_TOKEN = None
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -61,6 +125,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'crm.routers.replica_routing_middleware',
 ]
 
 ROOT_URLCONF = 'alx_backend_graphql.urls'
@@ -90,9 +155,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Persistent connections, so the PRAGMAs below run once per thread instead of per request
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Busy timeout: seconds to wait for the write lock before "database is locked"
+            'timeout': 20,
+            # Take the write lock at BEGIN; a deferred transaction that reads and then
+            # writes fails at once (no busy wait) when another writer got there first
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                # WAL: readers never wait for the writer, nor the writer for readers
+                'PRAGMA journal_mode=WAL;'
+                # Safe with WAL; only the last commits can be lost on power failure
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA cache_size=-32000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
     }
 }
 
+# Run GraphQL mutations one at a time per process behind a lock (crm.sqlite)
+# instead of letting request threads race for SQLite's write lock; for
+# threaded servers on SQLite
+CRM_SQLITE_WRITER_QUEUE = False
+
+# Read replicas (crm.routers): GraphQL queries and other GET requests read the
+# crm tables from one of CRM_DATABASE_REPLICAS; mutations, writes and anything
+# after a write in the same request use 'default'. To try it locally with a
+# second SQLite file, add
+#     DATABASES['replica'] = {
+#         'ENGINE': 'django.db.backends.sqlite3',
+#         'NAME': BASE_DIR / 'db_replica.sqlite3',
+#         'TEST': {'MIRROR': 'default'},
+#     }
+#     CRM_DATABASE_REPLICAS = ['replica']
+# and refresh it from the primary with `manage.py sync_sqlite_replica replica`.
+DATABASE_ROUTERS = ['crm.routers.ReplicaRouter']
+CRM_DATABASE_REPLICAS = []
+# "round_robin", or "least_loaded" (fewest requests in flight in this process)
+CRM_REPLICA_SELECTION = "round_robin"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
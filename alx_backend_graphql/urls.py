@@ -1,10 +1,19 @@
 # alx_backend_graphql_crm/urls.py
 from django.contrib import admin
 from django.urls import path
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
+from crm.views import (
+    AsyncGraphQLView, PersistedQueryGraphQLView, export_orders_view, import_customers_view, metrics_view,
+    response_cache_stats_view,
+)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('graphql', csrf_exempt(PersistedQueryGraphQLView.as_view(graphiql=True))),
+    # Async executor for ASGI deployments (uvicorn alx_backend_graphql.asgi:application)
+    path('graphql/async', csrf_exempt(AsyncGraphQLView.as_view())),
+    path('graphql/cache-stats', response_cache_stats_view),
+    path('metrics', metrics_view),
+    path('import/customers', csrf_exempt(import_customers_view)),
+    path('export/orders', export_orders_view),
 ]
\ No newline at end of file
@@ -0,0 +1,69 @@
+from asyncio import gather
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import SyncToAsync
+from django.conf import settings
+from django.db import close_old_connections
+from graphql import ExecutionContext
+from graphql.pyutils import Path, Undefined
+
+DEFAULT_WORKERS = 8
+
+_executor = None
+
+
+def get_executor():
+    """The bounded pool every async GraphQL request borrows threads from (``CRM_ASYNC_GRAPHQL_WORKERS``)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "CRM_ASYNC_GRAPHQL_WORKERS", DEFAULT_WORKERS),
+            thread_name_prefix="crm-graphql",
+        )
+    return _executor
+
+
+def run_sync(func):
+    """Wrap ``func`` (ORM code) as a coroutine function that runs on the bounded pool.
+
+    Each call releases its thread's database connections afterwards the
+    way request_finished does for a synchronous request, so CONN_MAX_AGE
+    applies to the pool threads too.
+    """
+    def job(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return SyncToAsync(job, thread_sensitive=False, executor=get_executor())
+
+
+class ThreadedRootExecutionContext(ExecutionContext):
+    """Execute each root query field, with its whole sub-selection, in a pool thread.
+
+    The resolvers in crm.schema are synchronous ORM code, so they cannot run
+    on the event loop; independent root fields (``allProducts`` next to
+    ``totalOrders``) still run concurrently, one thread each, while nested
+    fields complete synchronously inside their root field's thread. Mutation
+    fields keep their serial order in a single thread.
+    """
+
+    def execute_fields(self, parent_type, source_value, path, fields):
+        if path is not None:
+            return super().execute_fields(parent_type, source_value, path, fields)
+
+        execute_field = run_sync(self.execute_field)
+
+        async def get_results():
+            names = list(fields)
+            values = await gather(*(
+                execute_field(parent_type, source_value, fields[name], Path(None, name, parent_type.name))
+                for name in names
+            ))
+            return {name: value for name, value in zip(names, values) if value is not Undefined}
+
+        return get_results()
+
+    def execute_fields_serially(self, parent_type, source_value, path, fields):
+        return run_sync(super().execute_fields_serially)(parent_type, source_value, path, fields)
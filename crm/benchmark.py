@@ -0,0 +1,148 @@
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from django.db import connection, transaction
+
+from .instrumentation import counting_queries
+from .models import Customer, Order, Product
+
+ORDERS_QUERY = """
+query ($minTotal: Decimal, $first: Int) {
+  allOrders(totalAmountGte: $minTotal, first: $first) {
+    edges { node { id totalAmount orderDate customer { name email } products { edges { node { name price } } } } }
+  }
+}
+"""
+
+PRODUCTS_QUERY = """
+query ($priceGte: Decimal, $priceLte: Decimal, $first: Int) {
+  allProducts(priceGte: $priceGte, priceLte: $priceLte, first: $first) {
+    edges { node { id name price stock } }
+  }
+}
+"""
+
+CREATE_ORDER = """
+mutation ($customerId: ID!, $productIds: [ID]!) {
+  createOrder(customerId: $customerId, productIds: $productIds) { order { id totalAmount } }
+}
+"""
+
+BULK_CREATE_CUSTOMERS = """
+mutation ($input: [CustomerInput]!) {
+  bulkCreateCustomers(input: $input) { customers { id } errors }
+}
+"""
+
+UPDATE_LOW_STOCK = """
+mutation { updateLowStockProducts { success updatedProducts { id stock } } }
+"""
+
+
+class Operation:
+    """One benchmarked GraphQL document; ``variables(i)`` builds the variables of run ``i``."""
+
+    def __init__(self, name, query, variables=None, mutation=False):
+        self.name = name
+        self.query = query
+        self.variables = variables or (lambda i: {})
+        self.mutation = mutation
+
+
+def operations(page_size=50, bulk_size=100):
+    """The representative operations, with ids picked from the current database."""
+    customer_id = Customer.objects.order_by("pk").values_list("pk", flat=True).first()
+    product_ids = list(Product.objects.order_by("pk").values_list("pk", flat=True)[:3])
+    if customer_id is None or not product_ids:
+        raise ValueError("The benchmark needs at least one customer and one product")
+
+    return [
+        Operation("allOrders filtered", ORDERS_QUERY,
+                  lambda i: {"minTotal": "100", "first": page_size}),
+        Operation("allProducts by price range", PRODUCTS_QUERY,
+                  lambda i: {"priceGte": "10", "priceLte": "500", "first": page_size}),
+        Operation("createOrder", CREATE_ORDER,
+                  lambda i: {"customerId": str(customer_id), "productIds": [str(pk) for pk in product_ids]},
+                  mutation=True),
+        Operation("bulkCreateCustomers", BULK_CREATE_CUSTOMERS,
+                  lambda i: {"input": [
+                      {"name": f"Bench {i}-{n}", "email": f"bench-{i}-{n}@example.com", "phone": "555-000-0000"}
+                      for n in range(bulk_size)
+                  ]},
+                  mutation=True),
+        Operation("updateLowStockProducts", UPDATE_LOW_STOCK, mutation=True),
+    ]
+
+
+def _execute(schema, operation, i):
+    """Run ``operation`` once; mutations are rolled back so every run sees the same data."""
+    with transaction.atomic():
+        result = schema.execute(operation.query, variable_values=operation.variables(i),
+                                context_value=SimpleNamespace())
+        if operation.mutation:
+            transaction.set_rollback(True)
+    if result.errors:
+        raise RuntimeError(f"{operation.name}: {result.errors[0]}")
+
+
+def measure(schema, operation, repeat, warmup):
+    """Latency percentiles (ms), SQL statements per run and traced peak memory of one operation.
+
+    Memory is traced in one extra run so tracemalloc does not slow down the
+    timed ones.
+    """
+    for i in range(warmup):
+        _execute(schema, operation, i)
+
+    samples = []
+    queries = []
+    for i in range(warmup, warmup + repeat):
+        with counting_queries() as counter:
+            start = time.perf_counter()
+            _execute(schema, operation, i)
+            samples.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count)
+
+    tracemalloc.start()
+    try:
+        _execute(schema, operation, warmup + repeat)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "runs": repeat,
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 3),
+        "p99_ms": round(samples[max(0, int(len(samples) * 0.99) - 1)], 3),
+        "max_ms": round(samples[-1], 3),
+        "queries": max(queries),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run(repeat=20, warmup=2, only=None, page_size=50, bulk_size=100):
+    """Benchmark every operation (or those named in ``only``) through the real schema.
+
+    Returns a JSON-serializable dict with the dataset size next to the
+    results, so runs at different scales or commits can be compared.
+    """
+    from alx_backend_graphql.schema import schema
+
+    results = {}
+    for operation in operations(page_size, bulk_size):
+        if only and operation.name not in only:
+            continue
+        results[operation.name] = measure(schema, operation, repeat, warmup)
+    return {
+        "database": connection.vendor,
+        "dataset": {
+            "customers": Customer.objects.count(),
+            "products": Product.objects.count(),
+            "orders": Order.objects.count(),
+        },
+        "results": results,
+    }
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Order, Product
+
+ORDER_CREATED = "order_created"
+PRODUCT_STOCK = "product_stock"
+DEFAULT_QUEUE_SIZE = 100
+
+
+def queue_size():
+    return getattr(settings, "CRM_SUBSCRIPTION_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)
+
+
+# -------------------------------
+# In-process fan-out
+# -------------------------------
+class Subscriber:
+    """One subscription: a bounded event queue living on its connection's event loop.
+
+    ``accepts`` (the subscription's arguments) runs on the publishing
+    thread, so events a client filtered out never reach its loop. A client
+    that falls ``maxsize`` events behind loses the oldest ones.
+    """
+
+    def __init__(self, topic, loop, accepts=None, maxsize=DEFAULT_QUEUE_SIZE):
+        self.topic = topic
+        self.loop = loop
+        self.accepts = accepts
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def deliver(self, events):
+        # Runs on self.loop
+        for event in events:
+            if self.queue.full():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(event)
+
+
+class Broadcast:
+    """Topic -> subscribers of this process; publishing is safe from any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def add(self, subscriber):
+        with self.lock:
+            self.subscribers.setdefault(subscriber.topic, set()).add(subscriber)
+
+    def remove(self, subscriber):
+        with self.lock:
+            self.subscribers.get(subscriber.topic, set()).discard(subscriber)
+
+    def has_subscribers(self, topic):
+        return bool(self.subscribers.get(topic))
+
+    def publish(self, topic, events):
+        with self.lock:
+            subscribers = list(self.subscribers.get(topic, ()))
+        for subscriber in subscribers:
+            accepted = [e for e in events if subscriber.accepts is None or subscriber.accepts(e)]
+            if not accepted:
+                continue
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, accepted)
+            except RuntimeError:
+                # The connection's loop has shut down without unsubscribing
+                self.remove(subscriber)
+
+
+broadcast = Broadcast()
+
+
+async def subscribe(topic, accepts=None):
+    """Yield the events published on ``topic`` that pass ``accepts``, until the caller closes it."""
+    subscriber = Subscriber(topic, asyncio.get_running_loop(), accepts, queue_size())
+    broadcast.add(subscriber)
+    try:
+        while True:
+            yield await subscriber.queue.get()
+    finally:
+        broadcast.remove(subscriber)
+
+
+# -------------------------------
+# Publishing
+# -------------------------------
+def order_created(order_id):
+    """Publish a new order once the current transaction commits.
+
+    The order is read once, with its customer and products, and the same
+    instance is handed to every subscriber, so N clients cost one query,
+    and none at all while nobody is subscribed.
+    """
+    def publish():
+        if not broadcast.has_subscribers(ORDER_CREATED):
+            return
+        order = (
+            Order.objects.select_related("customer").prefetch_related("products")
+            .filter(pk=order_id).first()
+        )
+        if order is not None:
+            broadcast.publish(ORDER_CREATED, [order])
+
+    transaction.on_commit(publish)
+
+
+def products_changed(products):
+    """Publish the stock of already loaded ``products`` once the current transaction commits."""
+    products = list(products)
+
+    def publish():
+        if products and broadcast.has_subscribers(PRODUCT_STOCK):
+            broadcast.publish(PRODUCT_STOCK, products)
+
+    transaction.on_commit(publish)
+
+
+def stock_changed(product_ids):
+    """Publish the stock of ``product_ids`` after a queryset UPDATE, read back in one query."""
+    product_ids = list(product_ids)
+
+    def publish():
+        if product_ids and broadcast.has_subscribers(PRODUCT_STOCK):
+            broadcast.publish(PRODUCT_STOCK, list(Product.objects.filter(pk__in=product_ids).order_by("pk")))
+
+    transaction.on_commit(publish)
@@ -0,0 +1,149 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Customer, Order
+
+CLEANUP_CHUNK_SIZE = 500
+INACTIVE_AFTER_DAYS = 365
+DEFAULT_CHECKPOINT_FILE = "/tmp/crm_customer_cleanup.checkpoint"
+
+
+class CleanupResult:
+    """Counters of one cleanup run."""
+
+    def __init__(self, dry_run, cutoff, resumed_from):
+        self.dry_run = dry_run
+        self.cutoff = cutoff
+        self.resumed_from = resumed_from
+        self.candidates = 0
+        self.deleted = 0
+        self.chunks = 0
+        self.last_id = resumed_from
+
+    def as_dict(self):
+        return {
+            "dry_run": self.dry_run,
+            "cutoff": self.cutoff.isoformat(),
+            "resumed_from": self.resumed_from,
+            "candidates": self.candidates,
+            "deleted": self.deleted,
+            "chunks": self.chunks,
+            "last_id": self.last_id,
+        }
+
+
+# -------------------------------
+# Checkpoint
+# -------------------------------
+def checkpoint_path():
+    return getattr(settings, "CRM_CLEANUP_CHECKPOINT_FILE", DEFAULT_CHECKPOINT_FILE)
+
+
+def read_checkpoint(path):
+    """``(cutoff, last_id)`` of an interrupted run, or None."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        return datetime.fromisoformat(state["cutoff"]), int(state["last_id"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_checkpoint(path, cutoff, last_id):
+    # Write-then-rename, so a crash mid-write never leaves a truncated checkpoint
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"cutoff": cutoff.isoformat(), "last_id": last_id}, f)
+    os.replace(tmp, path)
+
+
+def clear_checkpoint(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# -------------------------------
+# Cleanup
+# -------------------------------
+def inactive_customers(cutoff):
+    """Customers created before ``cutoff`` with no orders, as a NOT EXISTS anti-join."""
+    return Customer.objects.filter(created_at__lt=cutoff).filter(
+        ~Exists(Order.objects.filter(customer=OuterRef("pk")))
+    )
+
+
+def delete_chunk(customers, cutoff):
+    """Delete the ``customers`` that are still inactive, in one short transaction; returns how many.
+
+    The still-inactive rows are locked first (the anti-join is re-applied),
+    so a customer who placed an order since the chunk was read is kept and
+    no order can reference the rest before they go. The delete itself is a
+    regular queryset delete(): the post_delete signals book the summary and
+    invalidate the response cache (the search index follows through its
+    triggers).
+    """
+    pks = [c.pk for c in customers]
+    with transaction.atomic():
+        inactive = list(
+            inactive_customers(cutoff).filter(pk__in=pks).select_for_update().values_list("pk", flat=True)
+        )
+        if not inactive:
+            return 0
+        _, deleted = Customer.objects.filter(pk__in=inactive).delete()
+    return deleted.get(Customer._meta.label, 0)
+
+
+def clean_inactive_customers(days=INACTIVE_AFTER_DAYS, chunk_size=CLEANUP_CHUNK_SIZE, throttle=0,
+                             dry_run=False, checkpoint=None, progress=None):
+    """Delete customers inactive for ``days`` days in keyset-ordered chunks.
+
+    Each chunk is deleted in its own transaction, then the run sleeps
+    ``throttle`` seconds so other writers get the database lock. With a
+    ``checkpoint`` file, the last finished id (and the cutoff) is saved
+    after every chunk and an interrupted run resumes from it; the file is
+    removed once the run completes. ``dry_run`` walks the same chunks from
+    the start and only counts; it neither reads nor writes the checkpoint.
+    ``progress`` is called with the CleanupResult after every
+    chunk.
+    """
+    if dry_run:
+        checkpoint = None
+    state = read_checkpoint(checkpoint) if checkpoint else None
+    if state is not None:
+        cutoff, last_id = state
+    else:
+        cutoff, last_id = timezone.now() - timedelta(days=days), 0
+    result = CleanupResult(dry_run, cutoff, last_id)
+
+    candidates = inactive_customers(cutoff).order_by("pk").only("pk", "created_at")
+    while True:
+        chunk = list(candidates.filter(pk__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1].pk
+        result.candidates += len(chunk)
+        result.chunks += 1
+
+        if not dry_run:
+            result.deleted += delete_chunk(chunk, cutoff)
+        if checkpoint:
+            write_checkpoint(checkpoint, cutoff, last_id)
+
+        result.last_id = last_id
+        if progress:
+            progress(result)
+        if throttle:
+            time.sleep(throttle)
+
+    if checkpoint:
+        clear_checkpoint(checkpoint)
+    return result
@@ -0,0 +1,155 @@
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLInt,
+    InlineFragmentNode,
+    get_named_type,
+    get_nullable_type,
+    is_leaf_type,
+    is_list_type,
+    value_from_ast,
+)
+
+DEFAULT_MAX_COST = 5000
+DEFAULT_MAX_DEPTH = 8
+DEFAULT_MAX_PAGE_SIZE = 100
+PAGE_ARGUMENTS = ("first", "last")
+
+
+def is_connection(graphql_type):
+    fields = getattr(graphql_type, "fields", None) or {}
+    return "edges" in fields and "pageInfo" in fields
+
+
+def is_wrapper(parent_type, name):
+    """Relay plumbing (``edges``, ``pageInfo``, ``Edge.node``), not counted as depth."""
+    return is_connection(parent_type) or (name == "node" and parent_type.name.endswith("Edge"))
+
+
+class QueryCost:
+    """Static cost and depth of one operation, computed from the document before execution.
+
+    Every object field and every connection row (``Edge.node``) costs its
+    weight (``CRM_QUERY_FIELD_WEIGHTS``, keyed ``"Type.field"``, default 1;
+    scalars and other Relay wrappers default to 0) times the number of
+    parents it is resolved for. A connection multiplies its
+    children by its ``first``/``last`` argument, or by the maximum page size
+    when neither is given; plain lists count as a full page too. Depth
+    counts field levels, not Relay wrappers. Introspection fields are free.
+    """
+
+    def __init__(self, schema, document, variables=None,
+                 max_cost=None, max_depth=None, max_page_size=None, weights=None):
+        self.schema = schema
+        self.variables = variables or {}
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if definition.kind == "fragment_definition"
+        }
+        self.max_cost = max_cost if max_cost is not None else getattr(
+            settings, "CRM_QUERY_MAX_COST", DEFAULT_MAX_COST)
+        self.max_depth = max_depth if max_depth is not None else getattr(
+            settings, "CRM_QUERY_MAX_DEPTH", DEFAULT_MAX_DEPTH)
+        self.max_page_size = max_page_size if max_page_size is not None else getattr(
+            settings, "CRM_QUERY_MAX_PAGE_SIZE", DEFAULT_MAX_PAGE_SIZE)
+        self.weights = weights if weights is not None else getattr(settings, "CRM_QUERY_FIELD_WEIGHTS", {})
+        self.cost = 0
+        self.depth = 0
+        self.errors = []
+
+    def analyze(self, operation):
+        root_type = self.schema.get_root_type(operation.operation)
+        if root_type is not None:
+            self._visit(root_type, operation.selection_set, 1, 1)
+        if self.cost > self.max_cost:
+            self.errors.append(GraphQLError(
+                f"Query cost {self.cost} exceeds the maximum cost of {self.max_cost}.", operation
+            ))
+        if self.depth > self.max_depth:
+            self.errors.append(GraphQLError(
+                f"Query depth {self.depth} exceeds the maximum depth of {self.max_depth}.", operation
+            ))
+        return self
+
+    def as_extension(self):
+        return {
+            "requestedQueryCost": self.cost,
+            "maximumAvailable": self.max_cost,
+            "depth": self.depth,
+            "maximumDepth": self.max_depth,
+        }
+
+    def _visit(self, parent_type, selection_set, multiplier, depth):
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                self._visit_field(parent_type, selection, multiplier, depth)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                self._visit(fragment_type, selection.selection_set, multiplier, depth)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is not None:
+                    fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                    self._visit(fragment_type, fragment.selection_set, multiplier, depth)
+
+    def _visit_field(self, parent_type, node, multiplier, depth):
+        name = node.name.value
+        field = (getattr(parent_type, "fields", None) or {}).get(name)
+        if name.startswith("__") or field is None:
+            return
+        named_type = get_named_type(field.type)
+        wrapper = is_wrapper(parent_type, name)
+        # Each Edge.node is a row fetched; edges/pageInfo and scalars come with it
+        default_weight = 0 if is_leaf_type(named_type) or (wrapper and name != "node") else 1
+        self.cost += self.weights.get(f"{parent_type.name}.{name}", default_weight) * multiplier
+        if not wrapper:
+            self.depth = max(self.depth, depth)
+        if node.selection_set is None:
+            return
+
+        if is_connection(named_type):
+            multiplier *= self._page_size(parent_type, node)
+        elif is_list_type(get_nullable_type(field.type)) and not wrapper:
+            multiplier *= self.max_page_size
+        self._visit(named_type, node.selection_set, multiplier, depth if wrapper else depth + 1)
+
+    def _page_size(self, parent_type, node):
+        sizes = []
+        for argument in node.arguments:
+            if argument.name.value in PAGE_ARGUMENTS:
+                value = value_from_ast(argument.value, GraphQLInt, self.variables)
+                if isinstance(value, int):
+                    sizes.append(value)
+        if not sizes:
+            return self.max_page_size
+        if max(sizes) > self.max_page_size:
+            self.errors.append(GraphQLError(
+                f"Requesting {max(sizes)} records on `{parent_type.name}.{node.name.value}` exceeds "
+                f"the maximum page size of {self.max_page_size}.",
+                node,
+            ))
+        return max(min(sizes), 0)
+
+
+def analyze(schema, document, operation, variables=None):
+    """Return the QueryCost of ``operation``; its ``errors`` are non-empty when it is over budget."""
+    return QueryCost(schema, document, variables).analyze(operation)
+
+
+def check_batch(costs, max_cost=None):
+    """Errors when the QueryCosts of one batch's operations together exceed the cost budget.
+
+    Each operation is also checked on its own; summing keeps a batch of
+    individually cheap operations from buying N budgets with one request.
+    """
+    if max_cost is None:
+        max_cost = getattr(settings, "CRM_QUERY_MAX_COST", DEFAULT_MAX_COST)
+    total = sum(query_cost.cost for query_cost in costs)
+    if total > max_cost:
+        return [GraphQLError(f"Batch cost {total} exceeds the maximum cost of {max_cost}.")]
+    return []
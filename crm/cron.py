@@ -1,7 +1,6 @@
 import datetime
-import requests
-from gql.transport.requests import RequestsHTTPTransport
-from gql import gql, Client
+
+from crm.graphql_client import execute
 
 def update_low_stock():
     """Triggers the GraphQL mutation to restock low-stock products."""
@@ -22,14 +21,10 @@ def update_low_stock():
     """
 
     try:
-        response = requests.post(
-            "http://localhost:8000/graphql",
-            json={"query": query},
-            timeout=10
-        )
+        result = execute(query)
 
-        if response.status_code == 200:
-            data = response.json().get("data", {}).get("updateLowStockProducts", {})
+        if not result.get("errors"):
+            data = (result.get("data") or {}).get("updateLowStockProducts") or {}
             success_msg = data.get("success", "No success message.")
             updated_products = data.get("updatedProducts", [])
 
@@ -39,7 +34,7 @@ def update_low_stock():
                     f.write(f"  → {p['name']} (Stock: {p['stock']})\n")
         else:
             with open(log_file, "a") as f:
-                f.write(f"{timestamp} - Failed with status {response.status_code}\n")
+                f.write(f"{timestamp} - Failed: {result['errors'][0]['message']}\n")
 
     except Exception as e:
         with open(log_file, "a") as f:
@@ -53,12 +48,8 @@ def log_crm_heartbeat():
 
     # Optional: verify GraphQL endpoint responsiveness
     try:
-        response = requests.post(
-            "http://localhost:8000/graphql",
-            json={"query": "{ hello }"},
-            timeout=5
-        )
-        if response.status_code == 200 and "data" in response.json():
+        result = execute("{ __typename }", timeout=5)
+        if result.get("data") and not result.get("errors"):
             message += " (GraphQL OK)"
         else:
             message += " (GraphQL check failed)"
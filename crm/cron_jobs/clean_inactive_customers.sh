@@ -9,17 +9,8 @@ cd "$(dirname "$0")/../.." || exit
 # Define log file
 LOG_FILE="/tmp/customer_cleanup_log.txt"
 
-# Run Django shell command to delete inactive customers
-DELETED_COUNT=$(python manage.py shell -c "
-from datetime import timedelta, date
-from crm.models import Customer
-from django.utils import timezone
+# Delete inactive customers in short chunks; an interrupted run resumes from its checkpoint
+RESULT=$(python manage.py clean_inactive_customers --throttle 0.05 2>&1)
 
-one_year_ago = timezone.now() - timedelta(days=365)
-inactive_customers = Customer.objects.filter(orders__isnull=True, created_at__lt=one_year_ago)
-deleted_count, _ = inactive_customers.delete()
-print(deleted_count)
-")
-
-# Log timestamp and deleted count
-echo \"\$(date '+%Y-%m-%d %H:%M:%S') - Deleted \$DELETED_COUNT inactive customers\" >> \"$LOG_FILE\"
+# Log timestamp and result
+echo "$(date '+%Y-%m-%d %H:%M:%S') - $RESULT" >> "$LOG_FILE"
@@ -0,0 +1,118 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+
+from .filters import OrderFilter
+from .models import Order, Product
+
+EXPORT_CHUNK_SIZE = 2000
+# Lines pulled from the sync export per thread hop when streaming over ASGI
+ASYNC_LINES_PER_PULL = 500
+FORMATS = ("csv", "ndjson")
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+CSV_COLUMNS = (
+    "order_id", "order_date", "status", "total_amount",
+    "customer_id", "customer_name", "customer_email",
+    "product_ids", "product_names",
+)
+
+
+class ExportError(Exception):
+    pass
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+# -------------------------------
+# Streaming order export
+# -------------------------------
+def export_queryset(params=None, using=None):
+    """Orders matching the OrderFilter arguments in ``params``, with customers joined.
+
+    Raises ExportError when the arguments do not validate.
+    """
+    queryset = (
+        Order.objects.select_related("customer")
+        .only("id", "order_date", "status", "total_amount", "customer__id", "customer__name", "customer__email")
+        .prefetch_related(Prefetch("products", queryset=Product.objects.only("id", "name").order_by("id")))
+        .order_by("order_date", "id")
+    )
+    if using is not None:
+        queryset = queryset.using(using)
+    filterset = OrderFilter(data=params or {}, queryset=queryset)
+    if not filterset.is_valid():
+        raise ExportError("; ".join(
+            f"{field}: {' '.join(messages)}" for field, messages in filterset.errors.items()
+        ))
+    return filterset.qs
+
+
+def export_orders(fmt, params=None, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """Yield the export one line at a time, holding at most ``chunk_size`` orders in memory.
+
+    ``iterator(chunk_size=...)`` reads through a server-side cursor where
+    the backend has one and prefetches the products of each chunk with one
+    extra query. ``using`` pins the database alias, since a streamed body
+    is produced after the request's routing scope has ended. CSV puts the products of an order in ``;``-separated
+    columns; NDJSON nests them.
+    """
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format: {fmt}")
+    orders = export_queryset(params, using).iterator(chunk_size=chunk_size)
+
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_COLUMNS)
+        for order in orders:
+            products = order.products.all()
+            yield writer.writerow((
+                order.pk, order.order_date.isoformat(), order.status, order.total_amount,
+                order.customer.pk, order.customer.name, order.customer.email,
+                ";".join(str(p.pk) for p in products), ";".join(p.name for p in products),
+            ))
+        return
+
+    for order in orders:
+        yield json.dumps({
+            "order_id": order.pk,
+            "order_date": order.order_date.isoformat(),
+            "status": order.status,
+            "total_amount": str(order.total_amount),
+            "customer": {"id": order.customer.pk, "name": order.customer.name, "email": order.customer.email},
+            "products": [{"id": p.pk, "name": p.name} for p in order.products.all()],
+        }) + "\n"
+
+
+def aiter_lines(lines, lines_per_pull=ASYNC_LINES_PER_PULL):
+    """Stream the sync ``lines`` generator to an ASGI server without buffering it.
+
+    Given a sync iterator, Django's ASGI handler collects the whole body
+    with ``sync_to_async(list)``. Here the generator is advanced
+    ``lines_per_pull`` lines at a time in the request's thread-sensitive
+    executor, the thread its database cursor was opened on, and each batch
+    is sent as it comes.
+    """
+    pull = sync_to_async(lambda: "".join(islice(lines, lines_per_pull)), thread_sensitive=True)
+
+    async def body():
+        try:
+            while True:
+                chunk = await pull()
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            await sync_to_async(lines.close, thread_sensitive=True)()
+
+    return body()
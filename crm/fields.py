@@ -0,0 +1,195 @@
+import base64
+import binascii
+import json
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from graphene.relay import PageInfo
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import maybe_queryset
+from graphql import GraphQLError
+from promise import Promise
+
+from .optimizer import optimize_queryset
+
+KEYSET_CURSOR_PREFIX = "keyset:"
+
+
+def prime_page(connection, info, resolved):
+    """Hand the nodes of a resolved page to the node type's ``prime_loaders``, if any."""
+    prime_loaders = getattr(connection._meta.node, "prime_loaders", None)
+    if prime_loaders is not None:
+        prime_loaders(info, [edge.node for edge in resolved.edges])
+    return resolved
+
+
+# -------------------------------
+# Connection Fields
+# -------------------------------
+class BatchedFilterConnectionField(DjangoFilterConnectionField):
+    """DjangoFilterConnectionField that optimizes its queryset and batches node relations.
+
+    The base queryset is narrowed to the client's selection set before the
+    filterset runs. Node types that define ``prime_loaders(info, instances)``
+    get the request DataLoaders primed with every node on the page, so any
+    relation not already fetched is loaded in one batch.
+    """
+
+    def required_fields(self):
+        """Model fields pagination reads from every row, kept out of ``only()``."""
+        return ()
+
+    def get_queryset_resolver(self):
+        return partial(super().get_queryset_resolver(), required=self.required_fields())
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class,
+                         required=()):
+        queryset = maybe_queryset(iterable)
+        if isinstance(queryset, QuerySet):
+            iterable = optimize_queryset(queryset, info, required=required)
+        return super().resolve_queryset(
+            connection, iterable, info, args, filtering_args, filterset_class
+        )
+
+    @classmethod
+    def connection_resolver(cls, resolver, connection, default_manager, queryset_resolver,
+                            max_limit, enforce_first_or_last, root, info, **args):
+        result = super().connection_resolver(
+            resolver, connection, default_manager, queryset_resolver,
+            max_limit, enforce_first_or_last, root, info, **args
+        )
+        prime = partial(prime_page, connection, info)
+        if Promise.is_thenable(result):
+            return Promise.resolve(result).then(prime)
+        return prime(result)
+
+
+class KeysetConnectionField(BatchedFilterConnectionField):
+    """Connection paginated by seeking on indexed columns instead of OFFSET.
+
+    Each cursor encodes the ``ordering`` values of its row, so ``after`` and
+    ``before`` become range predicates that an index on those columns can
+    serve and page N costs the same as page 1. No ``COUNT(*)`` is run: the
+    page fetches one extra row to tell whether another page exists.
+    ``ordering`` must end in a unique column (normally ``id``).
+    """
+
+    def __init__(self, *args, ordering=("id",), **kwargs):
+        self.ordering = tuple(ordering)
+        super().__init__(*args, **kwargs)
+
+    def required_fields(self):
+        return tuple(name.lstrip("-") for name in self.ordering)
+
+    def wrap_resolve(self, parent_resolver):
+        return partial(
+            self.keyset_resolver,
+            self.resolver or parent_resolver,
+            self.connection_type,
+            self.get_manager(),
+            self.get_queryset_resolver(),
+        )
+
+    def keyset_resolver(self, resolver, connection, default_manager, queryset_resolver,
+                        root, info, **args):
+        first, last = args.get("first"), args.get("last")
+        if self.enforce_first_or_last and not (first or last):
+            raise GraphQLError(
+                f"You must provide a `first` or `last` value to properly paginate the `{info.field_name}` connection."
+            )
+        for name, value in (("first", first), ("last", last)):
+            if value is None:
+                continue
+            if value < 0:
+                raise GraphQLError(f"Argument '{name}' must be a non-negative integer.")
+            if self.max_limit and value > self.max_limit:
+                raise GraphQLError(
+                    f"Requesting {value} records on the `{info.field_name}` connection "
+                    f"exceeds the `{name}` limit of {self.max_limit} records."
+                )
+
+        iterable = resolver(root, info, **args)
+        if iterable is None:
+            iterable = default_manager
+        queryset = maybe_queryset(queryset_resolver(connection, iterable, info, args))
+        return prime_page(connection, info, self.paginate(connection, queryset, args))
+
+    def paginate(self, connection, queryset, args):
+        first, last = args.get("first"), args.get("last")
+        after, before = args.get("after"), args.get("before")
+        if after:
+            queryset = queryset.filter(self._seek(self.decode_cursor(queryset.model, after), forward=True))
+        if before:
+            queryset = queryset.filter(self._seek(self.decode_cursor(queryset.model, before), forward=False))
+
+        if last is not None and first is None:
+            # Walk backwards from `before` (or the end) and flip the page back
+            reverse = [name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering]
+            rows = list(queryset.order_by(*reverse)[:last + 1])
+            has_previous = len(rows) > last
+            rows = rows[:last][::-1]
+            has_next = bool(before)
+        else:
+            limit = first if first is not None else self.max_limit
+            offset = args.get("offset") or 0
+            rows = queryset.order_by(*self.ordering)[offset:]
+            if limit is not None:
+                rows = rows[:limit + 1]
+            rows = list(rows)
+            has_next = limit is not None and len(rows) > limit
+            rows = rows[:limit] if limit is not None else rows
+            has_previous = bool(after) or offset > 0
+            if last is not None and len(rows) > last:
+                rows = rows[-last:]
+                has_previous = True
+
+        edges = [connection.Edge(node=row, cursor=self.encode_cursor(row)) for row in rows]
+        return connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous,
+                has_next_page=has_next,
+            ),
+        )
+
+    def _ordering_fields(self, model):
+        return [model._meta.get_field(name.lstrip("-")) for name in self.ordering]
+
+    def encode_cursor(self, instance):
+        values = [field.value_to_string(instance) for field in self._ordering_fields(type(instance))]
+        payload = KEYSET_CURSOR_PREFIX + json.dumps(values)
+        return base64.b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, model, cursor):
+        fields = self._ordering_fields(model)
+        try:
+            payload = base64.b64decode(cursor, validate=True).decode()
+            if not payload.startswith(KEYSET_CURSOR_PREFIX):
+                raise ValueError(cursor)
+            values = json.loads(payload[len(KEYSET_CURSOR_PREFIX):])
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError(cursor)
+            return [field.to_python(value) for field, value in zip(fields, values)]
+        except (binascii.Error, UnicodeDecodeError, ValueError, ValidationError):
+            raise GraphQLError(f"Invalid cursor: {cursor}")
+
+    def _seek(self, values, forward):
+        """Rows strictly after (or before) ``values`` in ``ordering``.
+
+        The OR of prefix matches is ANDed with an inclusive bound on the
+        leading column so the database can turn it into an index range scan.
+        """
+        condition = None
+        for i, name in enumerate(self.ordering):
+            field = name.lstrip("-")
+            lookup = "gt" if forward != name.startswith("-") else "lt"
+            ties = {other.lstrip("-"): value for other, value in zip(self.ordering[:i], values)}
+            step = Q(**ties, **{f"{field}__{lookup}": values[i]})
+            condition = step if condition is None else condition | step
+        leading = self.ordering[0]
+        bound = "gte" if forward != leading.startswith("-") else "lte"
+        return Q(**{f"{leading.lstrip('-')}__{bound}": values[0]}) & condition
@@ -1,13 +1,25 @@
 import django_filters
+from django_filters.constants import EMPTY_VALUES
 from .models import Customer, Product, Order
+from .search import icontains
 from django.db.models import Q
 
+
+class SearchFilter(django_filters.CharFilter):
+    """Case-insensitive substring filter served by the search index (see crm.search)."""
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return icontains(qs, self.field_name, value)
+
+
 # -------------------------------
 # Customer Filter
 # -------------------------------
 class CustomerFilter(django_filters.FilterSet):
-    name_icontains = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
-    email_icontains = django_filters.CharFilter(field_name="email", lookup_expr="icontains")
+    name_icontains = SearchFilter(field_name="name")
+    email_icontains = SearchFilter(field_name="email")
     created_at_gte = django_filters.DateFilter(field_name="created_at", lookup_expr="gte")
     created_at_lte = django_filters.DateFilter(field_name="created_at", lookup_expr="lte")
     phone_pattern = django_filters.CharFilter(method="filter_phone_pattern")
@@ -24,7 +36,7 @@ class CustomerFilter(django_filters.FilterSet):
 # Product Filter
 # -------------------------------
 class ProductFilter(django_filters.FilterSet):
-    name_icontains = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
+    name_icontains = SearchFilter(field_name="name")
     price_gte = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
     price_lte = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
     stock_gte = django_filters.NumberFilter(field_name="stock", lookup_expr="gte")
@@ -43,20 +55,21 @@ class OrderFilter(django_filters.FilterSet):
     total_amount_lte = django_filters.NumberFilter(field_name="total_amount", lookup_expr="lte")
     order_date_gte = django_filters.DateFilter(field_name="order_date", lookup_expr="gte")
     order_date_lte = django_filters.DateFilter(field_name="order_date", lookup_expr="lte")
-    customer_name = django_filters.CharFilter(field_name="customer__name", lookup_expr="icontains")
+    customer_name = SearchFilter(field_name="customer__name")
     product_name = django_filters.CharFilter(method="filter_by_product_name")
     product_id = django_filters.NumberFilter(method="filter_by_product_id")
+    status = django_filters.ChoiceFilter(choices=Order.Status.choices)
 
     class Meta:
         model = Order
         fields = [
             "total_amount_gte", "total_amount_lte",
             "order_date_gte", "order_date_lte",
-            "customer_name", "product_name", "product_id"
+            "customer_name", "product_name", "product_id", "status",
         ]
 
     def filter_by_product_name(self, queryset, name, value):
-        return queryset.filter(products__name__icontains=value).distinct()
+        return icontains(queryset, "products__name", value).distinct()
 
     def filter_by_product_id(self, queryset, name, value):
         return queryset.filter(products__id=value).distinct()
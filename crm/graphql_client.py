@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_GRAPHQL_URL = "http://localhost:8000/graphql"
+MODES = ("local", "http")
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+HTTP_TIMEOUT = 10
+# Proxy answers that mean the request never reached (or was refused by) Django
+RETRY_STATUSES = (502, 503)
+
+_session = None
+
+
+# -------------------------------
+# Configuration
+# -------------------------------
+def graphql_mode():
+    """``local`` runs documents against the schema in this process; ``http`` posts them to ``CRM_GRAPHQL_URL``."""
+    mode = getattr(settings, "CRM_GRAPHQL_MODE", "local")
+    if mode not in MODES:
+        raise ValueError(f"Unsupported CRM_GRAPHQL_MODE: {mode}")
+    return mode
+
+
+def graphql_url():
+    return getattr(settings, "CRM_GRAPHQL_URL", DEFAULT_GRAPHQL_URL)
+
+
+# -------------------------------
+# Execution
+# -------------------------------
+def execute(query, variables=None, timeout=HTTP_TIMEOUT):
+    """Run a GraphQL document and return the response payload, ``{"data": ..., "errors": [...]}``.
+
+    Jobs get the same payload shape in both modes, so they do not care
+    whether the document ran in-process or against a remote web tier.
+    Transport failures in http mode raise ``requests.RequestException``.
+    """
+    if graphql_mode() == "local":
+        return execute_local(query, variables)
+    return execute_http(query, variables, timeout)
+
+
+def execute_local(query, variables=None):
+    from alx_backend_graphql.schema import schema
+
+    # A bare context still gives the resolvers a per-run home for their DataLoaders
+    result = schema.execute(query, variable_values=variables, context_value=SimpleNamespace())
+    payload = {"data": result.data}
+    if result.errors:
+        payload["errors"] = [{"message": str(error)} for error in result.errors]
+    return payload
+
+
+def get_session():
+    """Process-wide pooled session that retries, with backoff, only what cannot have run twice.
+
+    Connect errors and 502/503 answers are retried. Read timeouts and 504s
+    are not: the mutation may already have been applied behind them.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=HTTP_RETRIES,
+            connect=HTTP_RETRIES,
+            read=0,
+            other=0,
+            status=HTTP_RETRIES,
+            backoff_factor=HTTP_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def execute_http(query, variables=None, timeout=HTTP_TIMEOUT):
+    response = get_session().post(
+        graphql_url(), json={"query": query, "variables": variables or {}}, timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,156 @@
+import codecs
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection, transaction
+
+from . import response_cache, summary
+from .models import Customer
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+FORMATS = ("csv", "ndjson")
+
+
+# -------------------------------
+# Helpers shared with BulkCreateCustomers
+# -------------------------------
+def existing_emails(emails):
+    """Return the subset of ``emails`` already taken, chunked to the backend's bind-parameter limit."""
+    emails = list(emails)
+    taken = set()
+    lookup_size = connection.features.max_query_params or len(emails) or 1
+    for start in range(0, len(emails), lookup_size):
+        taken.update(
+            Customer.objects.filter(email__in=emails[start:start + lookup_size])
+            .values_list("email", flat=True)
+        )
+    return taken
+
+
+def guess_format(name="", content_type=""):
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    return None
+
+
+# -------------------------------
+# Streaming customer import
+# -------------------------------
+class ImportResult:
+    """Running counters for an import; only the first few error messages are kept."""
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Line {line}: {message}")
+
+    def as_dict(self):
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def read_rows(lines, fmt):
+    """Yield ``(line_number, row, error)`` from an iterable of raw byte lines."""
+    text = codecs.iterdecode(lines, "utf-8-sig")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+    elif fmt == "ndjson":
+        for number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield number, None, "Expected a JSON object"
+                continue
+            yield number, row, None
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def build_customer(row):
+    """Build an unsaved Customer, validated with the model's own field rules."""
+    customer = Customer(
+        name=str(row.get("name") or "").strip(),
+        email=str(row.get("email") or "").strip(),
+        phone=str(row.get("phone") or "").strip(),
+    )
+    customer.clean_fields()
+    return customer
+
+
+def import_customers(lines, fmt, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Import customers from CSV or NDJSON ``lines``, writing in batches of ``batch_size``.
+
+    Only one batch is held in memory at a time. ``progress`` is called with
+    the running ImportResult after every batch.
+    """
+    result = ImportResult()
+    batch = []
+    for line, row, error in read_rows(lines, fmt):
+        result.processed += 1
+        if error:
+            result.add_error(line, error)
+            continue
+        try:
+            batch.append((line, build_customer(row)))
+        except ValidationError as e:
+            result.add_error(line, "; ".join(
+                f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items()
+            ))
+            continue
+        if len(batch) >= batch_size:
+            _write_batch(batch, result)
+            batch = []
+            if progress:
+                progress(result)
+    if batch:
+        _write_batch(batch, result)
+        if progress:
+            progress(result)
+    return result
+
+
+def _write_batch(batch, result):
+    taken = existing_emails({customer.email for _, customer in batch})
+    pending = []
+    for line, customer in batch:
+        if customer.email in taken:
+            result.add_error(line, f"Email {customer.email} already exists")
+            continue
+        taken.add(customer.email)
+        pending.append((line, customer))
+
+    try:
+        with transaction.atomic():
+            created = Customer.objects.bulk_create([customer for _, customer in pending])
+            summary.record_customers(created)
+            response_cache.invalidate(Customer)
+        result.created += len(pending)
+    except DatabaseError:
+        for line, customer in pending:
+            try:
+                with transaction.atomic():
+                    customer.save()
+                result.created += 1
+            except DatabaseError as e:
+                result.add_error(line, str(e))
@@ -0,0 +1,240 @@
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Model, QuerySet
+from graphql import get_named_type, is_leaf_type
+
+from . import persisted, response_cache
+from .cost import is_wrapper
+
+DEFAULT_SAMPLE_RATE = 0.05
+DEFAULT_DEBUG_HEADER = "X-CRM-Debug"
+MAX_DEBUG_ENTRIES = 500
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+# -------------------------------
+# Histograms
+# -------------------------------
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout, one series per label value."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, label, value):
+        series = self._series.get(label)
+        if series is None:
+            series = self._series[label] = [[0] * (len(self.buckets) + 1), 0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, label_name):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_name}="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_name}="{label}"}} {round(total, 6)}')
+            lines.append(f'{self.name}_count{{{label_name}="{label}"}} {count}')
+        return lines
+
+
+class Registry:
+    """Process-local resolver metrics; every worker process exports its own."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.duration = Histogram(
+            "crm_graphql_resolver_duration_seconds", "Wall time per resolver call.", DURATION_BUCKETS
+        )
+        self.queries = Histogram(
+            "crm_graphql_resolver_sql_queries", "SQL statements run per resolver call.", COUNT_BUCKETS
+        )
+        self.rows = Histogram(
+            "crm_graphql_resolver_rows", "Model instances returned per resolver call.", COUNT_BUCKETS
+        )
+        self.sampled_operations = 0
+
+    def observe(self, field, seconds, queries, rows):
+        with self.lock:
+            self.duration.observe(field, seconds)
+            self.queries.observe(field, queries)
+            self.rows.observe(field, rows)
+
+    def render(self):
+        with self.lock:
+            lines = [
+                "# HELP crm_graphql_sampled_operations_total Operations instrumented per resolver.",
+                "# TYPE crm_graphql_sampled_operations_total counter",
+                f"crm_graphql_sampled_operations_total {self.sampled_operations}",
+            ]
+            for histogram in (self.duration, self.queries, self.rows):
+                lines.extend(histogram.render("field"))
+        return lines
+
+
+registry = Registry()
+
+
+# -------------------------------
+# Per-operation state
+# -------------------------------
+class OperationMetrics:
+    """Resolver timings of one sampled operation; ``debug`` also keeps them for ``extensions``."""
+
+    def __init__(self, debug=False):
+        self.debug = debug
+        self.entries = []
+
+    def record(self, path, field, seconds, queries, rows):
+        registry.observe(field, seconds, queries, rows)
+        if self.debug and len(self.entries) < MAX_DEBUG_ENTRIES:
+            self.entries.append({
+                "path": path,
+                "field": field,
+                "ms": round(seconds * 1000, 3),
+                "sql": queries,
+                "rows": rows,
+            })
+
+    def as_extension(self):
+        return {
+            "resolvers": self.entries,
+            "sql": sum(entry["sql"] for entry in self.entries),
+            "truncated": len(self.entries) >= MAX_DEBUG_ENTRIES,
+        }
+
+
+def may_debug(request):
+    """Resolver breakdowns expose schema internals and timings: DEBUG or staff only."""
+    if settings.DEBUG:
+        return True
+    user = getattr(request, "user", None)
+    return user is not None and user.is_active and user.is_staff
+
+
+def start_operation(request):
+    """Return an OperationMetrics when this operation should be instrumented, else None.
+
+    Operations are sampled at ``CRM_METRICS_SAMPLE_RATE``; a truthy debug
+    header (``CRM_METRICS_DEBUG_HEADER``) always instruments and asks for
+    the per-resolver breakdown in the response, but only under DEBUG or
+    from a staff user. Unsampled operations run without the middleware at
+    all.
+    """
+    header = getattr(settings, "CRM_METRICS_DEBUG_HEADER", DEFAULT_DEBUG_HEADER)
+    debug = (
+        bool(header)
+        and request.headers.get(header, "") not in ("", "0", "false")
+        and may_debug(request)
+    )
+    if not debug and random.random() >= getattr(settings, "CRM_METRICS_SAMPLE_RATE", DEFAULT_SAMPLE_RATE):
+        return None
+    with registry.lock:
+        registry.sampled_operations += 1
+    return OperationMetrics(debug)
+
+
+# -------------------------------
+# Graphene middleware
+# -------------------------------
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def counting_queries():
+    """Count the SQL statements run on every database alias of this thread."""
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+def _row_count(value):
+    if isinstance(value, Model):
+        return 1
+    if isinstance(value, QuerySet):
+        return len(value) if value._result_cache is not None else 0
+    if isinstance(value, (list, tuple)):
+        return sum(1 for item in value if isinstance(item, Model))
+    edges = getattr(value, "edges", None)
+    if isinstance(edges, list):
+        return len(edges)
+    return 0
+
+
+class ResolverMetricsMiddleware:
+    """Time root fields and object-valued fields, counting their SQL and returned rows.
+
+    Scalar fields below the root are plain attribute reads, and Relay
+    wrappers (``edges``, ``Edge.node``) only hand back what their connection
+    already fetched; both are skipped to keep the overhead off sampled
+    operations too.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def resolve(self, next, root, info, **args):
+        if root is not None and (
+            is_leaf_type(get_named_type(info.return_type)) or is_wrapper(info.parent_type, info.field_name)
+        ):
+            return next(root, info, **args)
+
+        start = time.perf_counter()
+        with counting_queries() as counter:
+            result = next(root, info, **args)
+        elapsed = time.perf_counter() - start
+        self.metrics.record(
+            ".".join(str(key) for key in info.path.as_list()),
+            f"{info.parent_type.name}.{info.field_name}",
+            elapsed, counter.count, _row_count(result),
+        )
+        return result
+
+
+# -------------------------------
+# Export
+# -------------------------------
+def render_metrics():
+    """Prometheus text exposition of the resolver histograms and the GraphQL caches."""
+    lines = registry.render()
+    cache = persisted.document_cache
+    lines += [
+        "# HELP crm_graphql_document_cache_hits_total Parsed-document cache hits in this process.",
+        "# TYPE crm_graphql_document_cache_hits_total counter",
+        f"crm_graphql_document_cache_hits_total {cache.hits}",
+        "# HELP crm_graphql_document_cache_misses_total Parsed-document cache misses in this process.",
+        "# TYPE crm_graphql_document_cache_misses_total counter",
+        f"crm_graphql_document_cache_misses_total {cache.misses}",
+    ]
+    stats = response_cache.stats()
+    lines += [
+        "# HELP crm_graphql_response_cache_hits_total Response cache hits (shared cache).",
+        "# TYPE crm_graphql_response_cache_hits_total counter",
+        f"crm_graphql_response_cache_hits_total {stats['hits']}",
+        "# HELP crm_graphql_response_cache_misses_total Response cache misses (shared cache).",
+        "# TYPE crm_graphql_response_cache_misses_total counter",
+        f"crm_graphql_response_cache_misses_total {stats['misses']}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,135 @@
+import threading
+from collections import defaultdict
+
+from . import summary
+from .models import Customer, Product, Order
+
+
+# -------------------------------
+# DataLoader
+# -------------------------------
+class DataLoader:
+    """Synchronous, per-request batching loader.
+
+    Keys are queued with ``prime()`` (usually from a connection page) and
+    fetched together by a single ``batch_load_fn`` call on the first cache
+    miss, so a page of N parents costs one query per relation instead of N.
+    A lock serializes access for AsyncGraphQLView, whose root fields share
+    the request's loaders from several threads.
+    """
+
+    def __init__(self, batch_load_fn):
+        self.batch_load_fn = batch_load_fn
+        self._cache = {}
+        self._queue = []
+        self._lock = threading.RLock()
+
+    def prime(self, keys):
+        with self._lock:
+            self._queue.extend(key for key in keys if key not in self._cache)
+
+    def prime_value(self, key, value):
+        with self._lock:
+            self._cache.setdefault(key, value)
+
+    def load(self, key):
+        with self._lock:
+            if key not in self._cache:
+                self._queue.append(key)
+                self.dispatch()
+            return self._cache.get(key)
+
+    def load_many(self, keys):
+        keys = list(keys)
+        self.prime(keys)
+        return [self.load(key) for key in keys]
+
+    def dispatch(self):
+        with self._lock:
+            keys = list(dict.fromkeys(key for key in self._queue if key not in self._cache))
+            self._queue = []
+            if not keys:
+                return
+            values = self.batch_load_fn(keys)
+            if len(values) != len(keys):
+                raise ValueError(
+                    f"{self.batch_load_fn.__name__} returned {len(values)} values for {len(keys)} keys"
+                )
+            self._cache.update(zip(keys, values))
+
+    def clear(self, key=None):
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+
+# -------------------------------
+# Batch load functions
+# -------------------------------
+def load_customers(keys):
+    customers = Customer.objects.in_bulk(keys)
+    return [customers.get(key) for key in keys]
+
+
+def load_products(keys):
+    products = Product.objects.in_bulk(keys)
+    return [products.get(key) for key in keys]
+
+
+def load_products_by_order(keys):
+    # One JOIN over the M2M through table for the whole batch of orders
+    products = defaultdict(list)
+    rows = Order.products.through.objects.filter(order_id__in=keys).select_related("product")
+    for row in rows.order_by("pk"):
+        products[row.order_id].append(row.product)
+    return [products[key] for key in keys]
+
+
+def load_totals(keys):
+    # A single key: the summary totals are one row
+    totals = summary.get_totals()
+    return [totals for _ in keys]
+
+
+# -------------------------------
+# Request-scoped registry
+# -------------------------------
+class Loaders:
+    def __init__(self):
+        self.customer_by_id = DataLoader(load_customers)
+        self.product_by_id = DataLoader(load_products)
+        self.products_by_order_id = DataLoader(load_products_by_order)
+        self.totals = DataLoader(load_totals)
+
+
+def get_loaders(info):
+    """Return the loaders attached to the current request, creating them on first use."""
+    context = info.context
+    if context is None:
+        # schema.execute() without a context: no request to scope a cache to
+        return Loaders()
+    loaders = getattr(context, "crm_loaders", None)
+    if loaders is None:
+        loaders = Loaders()
+        setattr(context, "crm_loaders", loaders)
+    return loaders
+
+
+def prime_orders(info, orders):
+    """Queue the customers and products of a page of orders for one batched fetch each.
+
+    Relations the queryset already fetched (select_related/prefetch_related)
+    are cached as-is instead of being queued.
+    """
+    loaders = get_loaders(info)
+    for order in orders:
+        if Order.customer.is_cached(order):
+            loaders.customer_by_id.prime_value(order.customer_id, order.customer)
+        else:
+            loaders.customer_by_id.prime([order.customer_id])
+        if "products" in getattr(order, "_prefetched_objects_cache", {}):
+            loaders.products_by_order_id.prime_value(order.pk, list(order.products.all()))
+        else:
+            loaders.products_by_order_id.prime([order.pk])
@@ -0,0 +1,100 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from crm import synthetic
+from crm.filters import CustomerFilter, OrderFilter, ProductFilter
+from crm.models import Customer, Order, Product
+
+
+class _Rollback(Exception):
+    pass
+
+
+def filter_cases():
+    today = timezone.now().date()
+    last_month = {"order_date_gte": today - timedelta(days=30), "order_date_lte": today}
+    return [
+        ("orders by date range", OrderFilter, last_month, ("order_date", "id")),
+        ("orders by total_amount", OrderFilter, {"total_amount_gte": 2500}, ("order_date", "id")),
+        ("orders by customer name", OrderFilter, {"customer_name": "Customer 12"}, ("order_date", "id")),
+        ("orders by product name", OrderFilter, {"product_name": "Product 7"}, ("order_date", "id")),
+        ("orders by product id", OrderFilter, {"product_id": 7}, ("order_date", "id")),
+        ("products by price range", ProductFilter, {"price_gte": 100, "price_lte": 120}, ("id",)),
+        ("products low stock", ProductFilter, {"stock_lte": 5}, ("id",)),
+        ("customers by created_at", CustomerFilter,
+         {"created_at_gte": today - timedelta(days=7), "created_at_lte": today}, ("id",)),
+        ("customers by phone prefix", CustomerFilter, {"phone_pattern": "555-001"}, ("id",)),
+        ("customers by name", CustomerFilter, {"name_icontains": "Customer 99"}, ("id",)),
+    ]
+
+
+def time_case(filterset_class, data, ordering, repeat):
+    """Median ms of what a connection does per request: COUNT(*) plus the first page."""
+    model = filterset_class._meta.model
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        qs = filterset_class(data=data, queryset=model.objects.all()).qs
+        qs.count()
+        list(qs.order_by(*ordering)[:50])
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every filter in crm/filters.py against the current database, "
+        "with the crm indexes and (with --compare) without them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed-orders", type=int, default=0,
+                            help="Generate this many synthetic orders first (10 per customer)")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--compare", action="store_true",
+                            help="Also time each filter with the crm indexes dropped (rolled back afterwards)")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        if options["seed_orders"]:
+            orders = options["seed_orders"]
+            synthetic.generate(customers=max(1, orders // 10), products=1000, orders=orders,
+                               progress=lambda label, done, total: self.stderr.write(f"{label}: {done}/{total}"))
+
+        cases = filter_cases()
+        results = {name: {"indexed_ms": time_case(f, data, ordering, options["repeat"])}
+                   for name, f, data, ordering in cases}
+
+        if options["compare"]:
+            if not connection.features.can_rollback_ddl:
+                raise CommandError("--compare needs a backend with transactional DDL")
+            try:
+                with transaction.atomic():
+                    self._drop_indexes()
+                    for name, f, data, ordering in cases:
+                        results[name]["unindexed_ms"] = time_case(f, data, ordering, options["repeat"])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"orders": Order.objects.count(), "results": results}, indent=2))
+            return
+        self.stdout.write(f"{Order.objects.count()} orders, median of {options['repeat']} runs")
+        for name, timings in results.items():
+            line = f"{name:<28} {timings['indexed_ms']:>10.3f} ms"
+            if "unindexed_ms" in timings:
+                line += f"  (without indexes {timings['unindexed_ms']:.3f} ms)"
+            self.stdout.write(line)
+
+    def _drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model in (Customer, Product, Order):
+                for index in model._meta.indexes:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the representative GraphQL operations through the schema against the current "
+        "database and print latency percentiles, SQL statements and peak memory as JSON. "
+        "Mutations are rolled back after every run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--operation", action="append", dest="only",
+                            help="Only run this operation (repeatable)")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--bulk-size", type=int, default=100,
+                            help="Customers per bulkCreateCustomers call")
+        parser.add_argument("--output", help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or options["warmup"] < 0:
+            raise CommandError("--repeat must be positive and --warmup not negative")
+        try:
+            report = benchmark.run(
+                repeat=options["repeat"],
+                warmup=options["warmup"],
+                only=options["only"],
+                page_size=options["page_size"],
+                bulk_size=options["bulk_size"],
+            )
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
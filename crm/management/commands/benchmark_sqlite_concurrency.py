@@ -0,0 +1,146 @@
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from crm.models import Customer, Product
+from crm.views import PersistedQueryGraphQLView
+
+READ_QUERY = "{ allOrders(first: 20) { edges { node { totalAmount customer { name } } } } }"
+CREATE_ORDER = (
+    "mutation ($c: ID!, $p: [ID]!) { createOrder(customerId: $c, productIds: $p) { order { id } } }"
+)
+BULK_CREATE = "mutation ($input: [CustomerInput]!) { bulkCreateCustomers(input: $input) { errors } }"
+
+
+def run_workload(threads, seconds, write_ratio, seed=0):
+    """Hammer the GraphQL view from ``threads`` threads for ``seconds`` seconds.
+
+    Each call is a read (allOrders) or, with probability ``write_ratio``, a
+    write (createOrder, or bulkCreateCustomers of 10 every fifth write).
+    Returns throughput, latency percentiles and error counts, with
+    "database is locked" errors counted separately from business errors
+    such as out-of-stock products.
+    """
+    customer_ids = list(Customer.objects.values_list("pk", flat=True)[:1000])
+    product_ids = list(Product.objects.values_list("pk", flat=True)[:1000])
+    if not customer_ids or not product_ids:
+        raise ValueError("The benchmark needs customers and products; run generate_synthetic_data first")
+
+    view = PersistedQueryGraphQLView.as_view()
+    factory = RequestFactory()
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+    latencies = {"read": [], "write": []}
+    errors = Counter()
+    lock_errors = [0]
+
+    def worker(n):
+        rng = random.Random(seed * 1000 + n)
+        calls = 0
+        try:
+            while time.perf_counter() < deadline:
+                calls += 1
+                kind = "write" if rng.random() < write_ratio else "read"
+                if kind == "read":
+                    body = {"query": READ_QUERY}
+                elif calls % 5:
+                    body = {"query": CREATE_ORDER, "variables": {
+                        "c": str(rng.choice(customer_ids)),
+                        "p": [str(pk) for pk in rng.sample(product_ids, min(3, len(product_ids)))],
+                    }}
+                else:
+                    body = {"query": BULK_CREATE, "variables": {"input": [
+                        {"name": "Load", "email": f"load-{seed}-{n}-{calls}-{i}@example.com"} for i in range(10)
+                    ]}}
+                request = factory.post("/graphql", json.dumps(body), content_type="application/json")
+                start = time.perf_counter()
+                response = view(request)
+                elapsed = (time.perf_counter() - start) * 1000
+                payload = json.loads(response.content)
+                with lock:
+                    latencies[kind].append(elapsed)
+                    for error in payload.get("errors") or ():
+                        errors[error["message"][:80]] += 1
+                        if "locked" in error["message"] or "busy" in error["message"]:
+                            lock_errors[0] += 1
+        finally:
+            connection.close()
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    def summary(samples):
+        samples = sorted(samples)
+        if not samples:
+            return {"calls": 0}
+        return {
+            "calls": len(samples),
+            "per_second": round(len(samples) / elapsed, 1),
+            "p50_ms": round(statistics.median(samples), 2),
+            "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 2),
+        }
+
+    total = len(latencies["read"]) + len(latencies["write"])
+    return {
+        "threads": threads,
+        "seconds": round(elapsed, 2),
+        "reads": summary(latencies["read"]),
+        "writes": summary(latencies["write"]),
+        "errors": sum(errors.values()),
+        "lock_errors": lock_errors[0],
+        "lock_error_rate": round(lock_errors[0] / total, 4) if total else None,
+        "error_messages": dict(errors.most_common(5)),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mixed read/write GraphQL load from many threads against the current database, reporting "
+        "throughput and error rate (e.g. 'database is locked'). Run it once with the tuned SQLite "
+        "settings and once with a plain sqlite3 DATABASES entry to compare. Writes are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--write-ratio", type=float, default=0.5)
+        parser.add_argument("--no-writer-queue", action="store_true",
+                            help="Let threads race for the write lock instead of queueing them")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["threads"] < 1 or options["seconds"] <= 0 or not 0 <= options["write_ratio"] <= 1:
+            raise CommandError("--threads and --seconds must be positive and --write-ratio within 0..1")
+        journal_mode = None
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal_mode = cursor.fetchone()[0]
+        connection.close()
+
+        with override_settings(CRM_SQLITE_WRITER_QUEUE=not options["no_writer_queue"]):
+            try:
+                report = run_workload(options["threads"], options["seconds"], options["write_ratio"],
+                                      options["seed"])
+            except ValueError as e:
+                raise CommandError(str(e))
+        report["database"] = {
+            "vendor": connection.vendor,
+            "journal_mode": journal_mode,
+            "transaction_mode": connection.settings_dict["OPTIONS"].get("transaction_mode"),
+            "writer_queue": not options["no_writer_queue"],
+        }
+        self.stdout.write(json.dumps(report, indent=2))
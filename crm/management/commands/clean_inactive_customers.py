@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm import cleanup
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete customers with no orders created more than --days days ago, in small "
+        "keyset-ordered chunks with one short transaction each. Interrupted runs resume "
+        "from the checkpoint file. Scheduled weekly by crm/cron_jobs/clean_inactive_customers.sh."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=cleanup.INACTIVE_AFTER_DAYS)
+        parser.add_argument("--chunk-size", type=int, default=cleanup.CLEANUP_CHUNK_SIZE)
+        parser.add_argument("--throttle", type=float, default=0,
+                            help="Seconds to sleep between chunks")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the candidates, from the start (ignores the checkpoint)")
+        parser.add_argument("--checkpoint", default=None,
+                            help="Checkpoint file (default CRM_CLEANUP_CHECKPOINT_FILE)")
+        parser.add_argument("--no-checkpoint", action="store_true",
+                            help="Neither resume from nor write a checkpoint")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1 or options["chunk_size"] < 1 or options["throttle"] < 0:
+            raise CommandError("--days and --chunk-size must be positive and --throttle not negative")
+        checkpoint = None if options["no_checkpoint"] else (options["checkpoint"] or cleanup.checkpoint_path())
+        verbose = options["verbosity"] > 1 and not options["json"]
+        result = cleanup.clean_inactive_customers(
+            days=options["days"],
+            chunk_size=options["chunk_size"],
+            throttle=options["throttle"],
+            dry_run=options["dry_run"],
+            checkpoint=checkpoint,
+            progress=(lambda r: self.stderr.write(f"chunk {r.chunks}: up to id {r.last_id}")) if verbose else None,
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(result.as_dict(), indent=2))
+            return
+        if result.dry_run:
+            self.stdout.write(f"Would delete {result.candidates} inactive customers in {result.chunks} chunks")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Deleted {result.deleted} of {result.candidates} inactive customers in {result.chunks} chunks"
+            ))
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm.exporters import EXPORT_CHUNK_SIZE, FORMATS, ExportError, export_orders
+from crm.filters import OrderFilter
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every order with its customer and products as CSV or NDJSON. "
+        "Accepts the OrderFilter arguments, e.g. --order-date-gte 2025-01-01."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", help="Write to this file instead of stdout")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE,
+                            help="Orders read (and products prefetched) per chunk")
+        for name in OrderFilter.base_filters:
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=f"filter_{name}")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        params = {
+            name: options[f"filter_{name}"]
+            for name in OrderFilter.base_filters
+            if options[f"filter_{name}"] is not None
+        }
+        out = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            for line in export_orders(options["format"], params, options["chunk_size"]):
+                out.write(line)
+        except ExportError as e:
+            raise CommandError(str(e))
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from crm import synthetic
+
+SCALES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic CRM dataset (customers, products, orders with products). "
+        "The same --scale/--seed always produces the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="10k",
+                            help="Number of customers; orders and products scale with it")
+        parser.add_argument("--customers", type=int, help="Override the number of customers")
+        parser.add_argument("--orders", type=int, help="Override the number of orders (default 2 per customer)")
+        parser.add_argument("--products", type=int, help="Override the number of products (default 1 per 100 customers)")
+        parser.add_argument("--products-per-order", type=int, default=3)
+        parser.add_argument("--days", type=int, default=365, help="Spread timestamps over this many days")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=synthetic.DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        customers = options["customers"] or SCALES[options["scale"]]
+        orders = options["orders"] if options["orders"] is not None else customers * 2
+        products = options["products"] or max(100, customers // 100)
+        try:
+            counts = synthetic.generate(
+                customers=customers,
+                products=products,
+                orders=orders,
+                products_per_order=options["products_per_order"],
+                days=options["days"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+                progress=lambda label, done, total: self.stderr.write(f"{label}: {done}/{total}"),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['customers']} customers, {counts['products']} products, {counts['orders']} orders"
+        ))
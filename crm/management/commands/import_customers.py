@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm.importers import FORMATS, IMPORT_BATCH_SIZE, guess_format, import_customers
+
+
+class Command(BaseCommand):
+    help = "Stream customers from a CSV or NDJSON file into the database in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or '-' to read from stdin")
+        parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension)")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+        if fmt is None:
+            raise CommandError("Cannot guess the format from the file name; pass --format csv|ndjson")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        def progress(result):
+            self.stdout.write(
+                f"{result.processed} rows processed, {result.created} created, {result.failed} failed"
+            )
+
+        if path == "-":
+            result = import_customers(sys.stdin.buffer, fmt, options["batch_size"], progress)
+        else:
+            try:
+                with open(path, "rb") as f:
+                    result = import_customers(f, fmt, options["batch_size"], progress)
+            except OSError as e:
+                raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(error)
+        if result.failed > len(result.errors):
+            self.stderr.write(f"... and {result.failed - len(result.errors)} more errors")
+        self.stdout.write(self.style.SUCCESS(
+            f"Import finished: {result.created} customers created, {result.failed} rows failed"
+        ))
@@ -0,0 +1,91 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_QUERY = (
+    "query { totalOrders "
+    "allOrders(first: 20) { edges { node { totalAmount customer { name } } } } "
+    "allProducts(first: 20) { edges { node { name price stock } } } }"
+)
+
+
+def run_load(url, query, concurrency, requests_total, timeout=30):
+    """POST ``query`` to ``url`` ``requests_total`` times from ``concurrency`` threads.
+
+    Each thread keeps one pooled session. Returns throughput, latency
+    percentiles (ms) and the count of non-200 or errored responses.
+    """
+    local = threading.local()
+    body = json.dumps({"query": query})
+
+    def one(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.post(url, data=body, timeout=timeout,
+                                    headers={"Content-Type": "application/json"})
+            ok = response.status_code == 200 and "errors" not in response.json()
+        except (requests.RequestException, ValueError):
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests_total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(ms for ms, _ in results)
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": requests_total,
+        "failed": sum(1 for _, ok in results if not ok),
+        "requests_per_second": round(requests_total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running GraphQL endpoints, e.g. the WSGI /graphql under gunicorn "
+        "against /graphql/async under uvicorn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+", help="Endpoint URLs to compare")
+        parser.add_argument("--query", default=DEFAULT_QUERY)
+        parser.add_argument("--query-file", help="Read the query from this file instead")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive")
+        query = options["query"]
+        if options["query_file"]:
+            with open(options["query_file"], encoding="utf-8") as f:
+                query = f.read()
+
+        results = [
+            run_load(url, query, options["concurrency"], options["requests"])
+            for url in options["urls"]
+        ]
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f"{result['url']}: {result['requests_per_second']} req/s, "
+                f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+                f"max {result['max_ms']} ms, {result['failed']} failed"
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from crm.search import rebuild_index, search_backend
+
+
+class Command(BaseCommand):
+    help = "Repopulate the FTS5 search tables from the customer and product tables."
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend != "fts5":
+            self.stdout.write(f"Search backend is '{backend}'; it has no separate index to rebuild.")
+            return
+        for table, count in rebuild_index().items():
+            self.stdout.write(self.style.SUCCESS(f"{table}: {count} rows indexed"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from crm.services import recompute_order_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute Order.total_amount from the current product prices for all orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int,
+            help="Update orders in id ranges of this size, one transaction each (default: one UPDATE)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size is not None and batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+        updated = recompute_order_totals(batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed totals for {updated} orders"))
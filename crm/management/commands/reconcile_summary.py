@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from crm import summary
+
+
+class Command(BaseCommand):
+    help = "Compare the CRM summary totals with the source tables and, with --fix, rebuild them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true",
+                            help="Rebuild the summary row and daily buckets when they drifted")
+
+    def handle(self, *args, **options):
+        drift = summary.reconcile()
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Summary matches the data"))
+            return
+        for field, (stored, actual) in drift.items():
+            self.stdout.write(f"{field}: stored {stored}, actual {actual}")
+        if options["fix"]:
+            summary.rebuild()
+            self.stdout.write(self.style.SUCCESS("Summary rebuilt"))
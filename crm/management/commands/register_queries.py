@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from graphql import GraphQLError, parse, validate
+
+from crm import persisted
+
+
+class Command(BaseCommand):
+    help = (
+        "Register GraphQL documents as persisted queries and print their SHA-256 hashes. "
+        "With CRM_PERSISTED_QUERIES = 'allowlist' only registered documents are executed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help=".graphql files, one document per file")
+
+    def handle(self, *args, **options):
+        from alx_backend_graphql.schema import schema
+
+        for path in options["files"]:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    query = f.read()
+            except OSError as e:
+                raise CommandError(f"{path}: {e}")
+            # The view hashes the exact text it receives, so register the file verbatim
+            try:
+                errors = validate(schema.graphql_schema, parse(query))
+            except GraphQLError as e:
+                raise CommandError(f"{path}: {e}")
+            if errors:
+                raise CommandError(f"{path}: {errors[0].message}")
+            self.stdout.write(f"{persisted.register(query)}  {path}")
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm import reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Send reminders for pending orders from the last --days days that have not had one. "
+        "Reruns never send a reminder twice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=reminders.REMINDER_BATCH_SIZE)
+        parser.add_argument("--days", type=int, default=reminders.REMINDER_WINDOW_DAYS)
+        parser.add_argument("--queue", action="store_true",
+                            help="Queue one Celery task per batch instead of sending in this process")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["days"] < 1:
+            raise CommandError("--batch-size and --days must be positive")
+        if options["queue"]:
+            from crm.tasks import queue_order_reminders
+
+            queued = queue_order_reminders(options["batch_size"], options["days"])
+            self.stdout.write(f"Queued {queued['orders']} reminders in {queued['batches']} batches")
+            return
+
+        start = time.perf_counter()
+        totals = reminders.send_due_reminders(options["batch_size"], options["days"])
+        elapsed = time.perf_counter() - start
+        rate = totals["sent"] / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Sent {totals['sent']} reminders in {totals['batches']} batches "
+            f"({totals['failed']} failed) in {elapsed:.2f}s, {rate:.0f} reminders/s"
+        )
@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto a replica alias with SQLite's online backup API, "
+        "standing in for replication when trying crm.routers locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("aliases", nargs="+", help="Replica aliases from DATABASES")
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError("Only SQLite primaries can be copied; use real replication elsewhere")
+        primary.ensure_connection()
+        for alias in options["aliases"]:
+            if alias not in connections.settings or alias == DEFAULT_DB_ALIAS:
+                raise CommandError(f"Unknown replica alias: {alias}")
+            replica = connections[alias]
+            if replica.vendor != "sqlite":
+                raise CommandError(f"{alias} is not a SQLite database")
+            replica.close()
+            target = sqlite3.connect(str(replica.settings_dict["NAME"]))
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"Copied {DEFAULT_DB_ALIAS} to {alias}"))
@@ -0,0 +1,70 @@
+from django.db import DatabaseError, migrations
+
+# SQLite: FTS5 tables with the trigram tokenizer (SQLite >= 3.34) answer
+# substring MATCH queries; they mirror the columns behind the *_icontains
+# filters and are kept in sync by the SQLite triggers added in migration 0007.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE crm_customer_fts USING fts5(name, email, tokenize='trigram')",
+    "CREATE VIRTUAL TABLE crm_product_fts USING fts5(name, tokenize='trigram')",
+    "INSERT INTO crm_customer_fts (rowid, name, email) SELECT id, name, email FROM crm_customer",
+    "INSERT INTO crm_product_fts (rowid, name) SELECT id, name FROM crm_product",
+]
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS crm_customer_fts",
+    "DROP TABLE IF EXISTS crm_product_fts",
+]
+
+# PostgreSQL: icontains compiles to UPPER(col) LIKE UPPER(%s), so the trigram
+# GIN indexes are built on UPPER(col) and serve the unchanged filters.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS crm_customer_name_trgm ON crm_customer USING gin (UPPER(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS crm_customer_email_trgm ON crm_customer USING gin (UPPER(email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS crm_product_name_trgm ON crm_product USING gin (UPPER(name) gin_trgm_ops)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS crm_customer_name_trgm",
+    "DROP INDEX IF EXISTS crm_customer_email_trgm",
+    "DROP INDEX IF EXISTS crm_product_name_trgm",
+]
+
+
+def sqlite_has_trigram_fts(schema_editor):
+    try:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp.crm_fts_probe USING fts5(x, tokenize='trigram')")
+            cursor.execute("DROP TABLE temp.crm_fts_probe")
+    except DatabaseError:
+        return False
+    return True
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite" and sqlite_has_trigram_fts(schema_editor):
+        statements = SQLITE_FORWARD
+    elif vendor == "postgresql":
+        statements = POSTGRES_FORWARD
+    else:
+        # No index support: the filters keep using plain LIKE
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0002_customer_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
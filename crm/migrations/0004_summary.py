@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:24
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def seed_summary(apps, schema_editor):
+    Customer = apps.get_model('crm', 'Customer')
+    Order = apps.get_model('crm', 'Order')
+    CRMSummary = apps.get_model('crm', 'CRMSummary')
+    DailySummary = apps.get_model('crm', 'DailySummary')
+
+    orders = Order.objects.aggregate(count=Count('pk'), revenue=Sum('total_amount'))
+    CRMSummary.objects.create(
+        pk=1,
+        total_customers=Customer.objects.count(),
+        total_orders=orders['count'],
+        total_revenue=orders['revenue'] or 0,
+    )
+
+    days = {}
+    for row in Customer.objects.annotate(day=TruncDate('created_at')).values('day').annotate(n=Count('pk')):
+        days.setdefault(row['day'], DailySummary(day=row['day'])).new_customers = row['n']
+    for row in Order.objects.annotate(day=TruncDate('order_date')).values('day').annotate(n=Count('pk'), revenue=Sum('total_amount')):
+        bucket = days.setdefault(row['day'], DailySummary(day=row['day']))
+        bucket.orders = row['n']
+        bucket.revenue = row['revenue'] or 0
+    DailySummary.objects.bulk_create(days.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0003_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CRMSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_customers', models.BigIntegerField(default=0)),
+                ('total_orders', models.BigIntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('new_customers', models.BigIntegerField(default=0)),
+                ('orders', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.RunPython(seed_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# SQLite: keep the FTS5 tables of migration 0003 in step with their source
+# rows inside the database, so queryset update()/delete(), bulk_create and
+# raw SQL are covered as well as model saves.
+SQLITE_FORWARD = [
+    """CREATE TRIGGER crm_customer_fts_insert AFTER INSERT ON crm_customer BEGIN
+        INSERT INTO crm_customer_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+    """CREATE TRIGGER crm_customer_fts_update AFTER UPDATE OF id, name, email ON crm_customer BEGIN
+        DELETE FROM crm_customer_fts WHERE rowid = old.id;
+        INSERT INTO crm_customer_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+    """CREATE TRIGGER crm_customer_fts_delete AFTER DELETE ON crm_customer BEGIN
+        DELETE FROM crm_customer_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER crm_product_fts_insert AFTER INSERT ON crm_product BEGIN
+        INSERT INTO crm_product_fts (rowid, name) VALUES (new.id, new.name);
+    END""",
+    """CREATE TRIGGER crm_product_fts_update AFTER UPDATE OF id, name ON crm_product BEGIN
+        DELETE FROM crm_product_fts WHERE rowid = old.id;
+        INSERT INTO crm_product_fts (rowid, name) VALUES (new.id, new.name);
+    END""",
+    """CREATE TRIGGER crm_product_fts_delete AFTER DELETE ON crm_product BEGIN
+        DELETE FROM crm_product_fts WHERE rowid = old.id;
+    END""",
+    # Rows written by Python-side maintenance before the triggers existed
+    "DELETE FROM crm_customer_fts",
+    "INSERT INTO crm_customer_fts (rowid, name, email) SELECT id, name, email FROM crm_customer",
+    "DELETE FROM crm_product_fts",
+    "INSERT INTO crm_product_fts (rowid, name) SELECT id, name FROM crm_product",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS crm_customer_fts_insert",
+    "DROP TRIGGER IF EXISTS crm_customer_fts_update",
+    "DROP TRIGGER IF EXISTS crm_customer_fts_delete",
+    "DROP TRIGGER IF EXISTS crm_product_fts_insert",
+    "DROP TRIGGER IF EXISTS crm_product_fts_update",
+    "DROP TRIGGER IF EXISTS crm_product_fts_delete",
+]
+
+
+def has_fts_tables(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' "
+            "AND name IN ('crm_customer_fts', 'crm_product_fts')"
+        )
+        return cursor.fetchone()[0] == 2
+
+
+def create_triggers(apps, schema_editor):
+    # PostgreSQL's trigram indexes are ordinary indexes and need nothing here
+    if schema_editor.connection.vendor != "sqlite" or not has_fts_tables(schema_editor):
+        return
+    for sql in SQLITE_FORWARD:
+        schema_editor.execute(sql)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in SQLITE_REVERSE:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0006_order_status_reminders'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
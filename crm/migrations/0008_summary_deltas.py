@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0007_search_index_triggers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SummaryDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('new_customers', models.BigIntegerField(default=0)),
+                ('orders', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+    ]
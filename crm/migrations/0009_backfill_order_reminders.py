@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.utils import timezone
+
+# Migration 0006 gave every existing order status PENDING and no
+# reminder_sent_at, so the first reminder run would have written to every
+# customer who ordered in the last week. Orders placed before statuses
+# existed count as already reminded.
+
+
+def mark_existing_orders_reminded(apps, schema_editor):
+    Order = apps.get_model("crm", "Order")
+    Order.objects.using(schema_editor.connection.alias).filter(
+        reminder_sent_at__isnull=True
+    ).update(reminder_sent_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0008_summary_deltas'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_existing_orders_reminded, migrations.RunPython.noop),
+    ]
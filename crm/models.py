@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.validators import RegexValidator, MinValueValidator
 
+PHONE_REGEX = r'^(\+?\d{1,3})?[- ]?\d{3}[- ]?\d{3}[- ]?\d{4}$'
+
 class Customer(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
@@ -8,10 +10,20 @@ class Customer(models.Model):
         max_length=20, 
         blank=True, 
         validators=[RegexValidator(
-            regex=r'^(\+?\d{1,3})?[- ]?\d{3}[- ]?\d{3}[- ]?\d{4}$',
+            regex=PHONE_REGEX,
             message="Phone number must be valid, e.g., +1234567890 or 123-456-7890"
         )]
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # CustomerFilter.created_at_gte/lte and the inactive-customer cleanup
+            models.Index(fields=["created_at"], name="crm_customer_created_idx"),
+            # CustomerFilter.phone_pattern (startswith) on PostgreSQL
+            models.Index(fields=["phone"], name="crm_customer_phone_idx",
+                         opclasses=["varchar_pattern_ops"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -21,17 +33,87 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0.01)])
     stock = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # ProductFilter.price_gte/lte and stock_gte/lte
+            models.Index(fields=["price"], name="crm_product_price_idx"),
+            models.Index(fields=["stock"], name="crm_product_stock_idx"),
+            # Only low-stock rows, for the restock job (stock < LOW_STOCK_THRESHOLD)
+            models.Index(fields=["id"], name="crm_product_low_stock_idx",
+                         condition=models.Q(stock__lt=10)),
+        ]
+
     def __str__(self):
         return self.name
 
 class Order(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        PAID = "PAID", "Paid"
+        SHIPPED = "SHIPPED", "Shipped"
+        CANCELLED = "CANCELLED", "Cancelled"
+
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
     products = models.ManyToManyField(Product)
     order_date = models.DateTimeField(auto_now_add=True)
+    # Kept in step with products by the m2m_changed handlers in crm.signals
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    # Claimed by crm.reminders before the reminder goes out; never reset once sent
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # OrderFilter.order_date_gte/lte and stable (order_date, id) pagination
+            models.Index(fields=["order_date", "id"], name="crm_order_date_id_idx"),
+            # OrderFilter.total_amount_gte/lte
+            models.Index(fields=["total_amount"], name="crm_order_total_idx"),
+            # OrderFilter.status, usually together with a date range
+            models.Index(fields=["status", "order_date"], name="crm_order_status_date_idx"),
+            # Only orders still owed a reminder, walked by id in crm.reminders
+            models.Index(fields=["id"], name="crm_order_reminder_due_idx",
+                         condition=models.Q(status="PENDING", reminder_sent_at__isnull=True)),
+        ]
+
+
+class CRMSummary(models.Model):
+    """Running totals behind Query.totalCustomers/totalOrders/totalRevenue; one row, pk=1.
+
+    Holds the totals up to the last compaction; the SummaryDelta rows
+    appended since are added on read (see crm.summary).
+    """
+    total_customers = models.BigIntegerField(default=0)
+    total_orders = models.BigIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
 
-    def save(self, *args, **kwargs):
-        # Calculate total_amount from associated products
-        total = sum(product.price for product in self.products.all())
-        self.total_amount = total
-        super().save(*args, **kwargs)
+class DailySummary(models.Model):
+    """Per-day buckets of the same counters (customers by created_at, orders by order_date)."""
+    day = models.DateField(unique=True)
+    new_customers = models.BigIntegerField(default=0)
+    orders = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    def __str__(self):
+        return str(self.day)
+
+
+class SummaryDelta(models.Model):
+    """One write's change to the counters, appended so writers never update a shared row.
+
+    Folded into CRMSummary and DailySummary by crm.summary.compact().
+    """
+    day = models.DateField()
+    new_customers = models.BigIntegerField(default=0)
+    orders = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+
+class PersistedQuery(models.Model):
+    """A GraphQL document registered under the SHA-256 hex digest of its text (see crm.persisted)."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    query = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
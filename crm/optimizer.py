@@ -0,0 +1,102 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+# -------------------------------
+# Selection set helpers
+# -------------------------------
+def selected_fields(field_nodes, info):
+    """Map each selected field name under ``field_nodes`` to its FieldNodes, expanding fragments."""
+    fields = {}
+
+    def visit(selection_set):
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                fields.setdefault(selection.name.value, []).append(selection)
+            elif isinstance(selection, InlineFragmentNode):
+                visit(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                visit(info.fragments[selection.name.value].selection_set)
+
+    for field_node in field_nodes:
+        visit(field_node.selection_set)
+    return fields
+
+
+def node_selection(field_nodes, info):
+    """Return the FieldNodes describing the objects of a field, unwrapping ``edges { node }``."""
+    fields = selected_fields(field_nodes, info)
+    if "edges" in fields:
+        return selected_fields(fields["edges"], info).get("node", [])
+    return field_nodes
+
+
+# -------------------------------
+# Optimizer
+# -------------------------------
+def optimize_queryset(queryset, info, field_nodes=None, required=()):
+    """Narrow ``queryset`` to what the GraphQL selection actually reads.
+
+    Concrete fields go to ``only()``, forward relations to ``select_related()``
+    and many-valued relations to ``prefetch_related()`` with a nested
+    ``Prefetch`` queryset optimized the same way. Foreign key columns are
+    always kept. If the selection contains a field that is not a model field
+    (a custom resolver may read any column), ``only()`` is skipped and just
+    the relations are applied.
+    """
+    if field_nodes is None:
+        field_nodes = node_selection(info.field_nodes, info)
+    if not field_nodes:
+        return queryset
+
+    # FK columns are cheap and DataLoaders key on them, so never defer them
+    model = queryset.model
+    only = list(required) + [f.name for f in model._meta.concrete_fields if f.is_relation]
+    related, prefetches = [], []
+    complete = _plan(model, field_nodes, info, "", only, related, prefetches)
+
+    if related:
+        queryset = queryset.select_related(*related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if complete:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+def _plan(model, field_nodes, info, prefix, only, related, prefetches):
+    complete = True
+    for name, nodes in selected_fields(field_nodes, info).items():
+        if name == "__typename":
+            continue
+        if name == "id":
+            only.append(prefix + model._meta.pk.name)
+            continue
+        try:
+            field = model._meta.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            complete = False
+            continue
+
+        if field.many_to_many or field.one_to_many:
+            # Reverse FK prefetches match rows on the remote FK, so keep it loaded
+            required = (field.field.name,) if field.one_to_many else ()
+            nested = optimize_queryset(
+                field.related_model._default_manager.all(), info,
+                node_selection(nodes, info), required,
+            )
+            prefetches.append(Prefetch(prefix + field.name, queryset=nested))
+        elif field.is_relation:
+            only.append(prefix + field.name)
+            related.append(prefix + field.name)
+            complete &= _plan(
+                field.related_model, nodes, info, prefix + field.name + "__",
+                only, related, prefetches,
+            )
+        else:
+            only.append(prefix + field.name)
+    return complete
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError
+from graphql import GraphQLError, parse, validate
+
+from .models import PersistedQuery
+
+DEFAULT_DOCUMENT_CACHE_SIZE = 1000
+DEFAULT_APQ_CACHE_SIZE = 1000
+DEFAULT_APQ_MAX_LENGTH = 20000
+# off: every request parses and validates its text; apq: documents are cached
+# and clients may send a registered hash instead of the text (Automatic
+# Persisted Queries); allowlist: only registered documents are executed
+MODES = ("off", "apq", "allowlist")
+
+NOT_FOUND = "PersistedQueryNotFound"
+NOT_SUPPORTED = "PersistedQueryNotSupported"
+NOT_ALLOWED = "PersistedQueryNotAllowed"
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def persisted_query_mode():
+    mode = getattr(settings, "CRM_PERSISTED_QUERIES", "apq")
+    if mode not in MODES:
+        raise ValueError(f"Unsupported CRM_PERSISTED_QUERIES: {mode}")
+    return mode
+
+
+# -------------------------------
+# Document cache
+# -------------------------------
+class DocumentCache:
+    """Thread-safe LRU of parsed and validated ``DocumentNode``s.
+
+    Only documents that passed validation are stored, so a hit can be
+    executed straight away. ``maxsize`` of 0 disables caching. The APQ
+    registry reuses it to hold query texts by hash.
+    """
+
+    def __init__(self, maxsize=DEFAULT_DOCUMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            document = self._documents.get(key)
+            if document is None:
+                self.misses += 1
+                return None
+            self._documents.move_to_end(key)
+            self.hits += 1
+            return document
+
+    def put(self, key, document):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._documents[key] = document
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._documents)
+
+
+document_cache = DocumentCache(getattr(settings, "CRM_DOCUMENT_CACHE_SIZE", DEFAULT_DOCUMENT_CACHE_SIZE))
+# Texts clients registered through APQ; bounded, per process, never persisted
+apq_queries = DocumentCache(getattr(settings, "CRM_APQ_CACHE_SIZE", DEFAULT_APQ_CACHE_SIZE))
+
+
+# -------------------------------
+# Registry
+# -------------------------------
+def register(query):
+    """Store ``query`` in the persisted allowlist under its hash (idempotent) and return the hash.
+
+    Only ``register_queries`` writes here; what clients register over APQ
+    stays in ``apq_queries``, so anonymous traffic cannot grow the table.
+    """
+    sha256 = query_hash(query)
+    try:
+        PersistedQuery.objects.get_or_create(sha256=sha256, defaults={"query": query})
+    except IntegrityError:
+        # Registered concurrently by another request
+        pass
+    return sha256
+
+
+def lookup(sha256):
+    """Query text for ``sha256`` from the persisted allowlist."""
+    return PersistedQuery.objects.filter(sha256=sha256).values_list("query", flat=True).first()
+
+
+def register_apq(sha256, query):
+    """Remember a client-registered ``query`` in this process, unless it is too long to keep."""
+    if len(query) <= getattr(settings, "CRM_APQ_MAX_LENGTH", DEFAULT_APQ_MAX_LENGTH):
+        apq_queries.put(sha256, query)
+
+
+def requested_hash(request, data):
+    """The ``sha256Hash`` of an APQ ``extensions.persistedQuery`` (body or GET parameter), if any.
+
+    ``request`` is None for payloads that arrive without one (WebSocket messages).
+    """
+    extensions = (request.GET.get("extensions") if request is not None else None) or data.get("extensions")
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    if not isinstance(extensions, dict):
+        return None
+    persisted = extensions.get("persistedQuery")
+    if not isinstance(persisted, dict):
+        return None
+    return persisted.get("sha256Hash")
+
+
+# -------------------------------
+# Resolution
+# -------------------------------
+def get_document(schema, query, sha256=None, validation_rules=None, max_errors=None):
+    """Return ``(document, errors)`` for a request's query text and/or persisted hash.
+
+    Cached documents skip parsing and validation entirely. A hash with no
+    text is looked up in the registry; in ``apq`` mode a hash sent with its
+    text registers the document in a bounded per-process LRU once it
+    validates, while ``allowlist`` only runs documents registered
+    beforehand (``register_queries``).
+    """
+    mode = persisted_query_mode()
+    if mode == "off":
+        if query is None:
+            return None, [GraphQLError(NOT_SUPPORTED)]
+        return _parse_and_validate(schema, query, validation_rules, max_errors)
+
+    registering = query is not None and sha256 is not None
+    if query is not None:
+        actual = query_hash(query)
+        if sha256 is not None and sha256 != actual:
+            return None, [GraphQLError("provided sha does not match query")]
+        sha256 = actual
+    elif sha256 is None:
+        return None, [GraphQLError("Must provide query string.")]
+
+    key = (sha256, tuple(validation_rules or ()))
+    document = document_cache.get(key)
+    if document is not None:
+        if registering and mode == "apq":
+            register_apq(sha256, query)
+        return document, []
+
+    if query is None:
+        query = (apq_queries.get(sha256) if mode == "apq" else None) or lookup(sha256)
+        if query is None:
+            return None, [GraphQLError(NOT_FOUND)]
+    elif mode == "allowlist" and lookup(sha256) is None:
+        return None, [GraphQLError(NOT_ALLOWED)]
+
+    document, errors = _parse_and_validate(schema, query, validation_rules, max_errors)
+    if errors:
+        return None, errors
+    if registering and mode == "apq":
+        register_apq(sha256, query)
+    document_cache.put(key, document)
+    return document, []
+
+
+def _parse_and_validate(schema, query, validation_rules, max_errors):
+    try:
+        document = parse(query)
+    except GraphQLError as e:
+        return None, [e]
+    errors = validate(schema, document, validation_rules, max_errors)
+    if errors:
+        return None, errors
+    return document, []
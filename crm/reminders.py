@@ -0,0 +1,147 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SENDER = "crm.reminders.FileSender"
+DEFAULT_LOG_FILE = "/tmp/order_reminders_log.txt"
+REMINDER_BATCH_SIZE = 500
+REMINDER_WINDOW_DAYS = 7
+
+
+# -------------------------------
+# Senders
+# -------------------------------
+class ConsoleSender:
+    """Log every reminder instead of sending it."""
+
+    def send(self, reminders):
+        for reminder in reminders:
+            logger.info("Reminder for order %s to %s", reminder["order_id"], reminder["email"])
+        return []
+
+
+class FileSender:
+    """Append one line per reminder to ``CRM_REMINDER_LOG_FILE``; the local stand-in for a mail service."""
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, "CRM_REMINDER_LOG_FILE", DEFAULT_LOG_FILE)
+
+    def send(self, reminders):
+        stamp = timezone.now().isoformat()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(
+                f"{stamp} - Reminder sent for Order ID: {r['order_id']}, Customer Email: {r['email']}\n"
+                for r in reminders
+            )
+        return []
+
+
+def get_sender():
+    """The sender named by ``CRM_REMINDER_SENDER``.
+
+    A sender has ``send(reminders)``, takes a list of reminder dicts and
+    returns the order ids it could not deliver (those are retried by the
+    next run); raising means none were delivered.
+    """
+    return import_string(getattr(settings, "CRM_REMINDER_SENDER", DEFAULT_SENDER))()
+
+
+# -------------------------------
+# Selection
+# -------------------------------
+def due_orders(window_days=REMINDER_WINDOW_DAYS):
+    """Pending orders from the last ``window_days`` days that have not had a reminder."""
+    return Order.objects.filter(
+        status=Order.Status.PENDING,
+        reminder_sent_at__isnull=True,
+        order_date__gte=timezone.now() - timedelta(days=window_days),
+    )
+
+
+def due_batches(batch_size=REMINDER_BATCH_SIZE, window_days=REMINDER_WINDOW_DAYS):
+    """Yield lists of due order ids, walking the id keyset instead of OFFSET paging."""
+    queryset = due_orders(window_days).order_by("id").values_list("id", flat=True)
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+# -------------------------------
+# Dispatch
+# -------------------------------
+def claim(order_ids):
+    """Mark the still-unsent orders among ``order_ids`` as reminded and return their ids.
+
+    The claimable rows are read with ``select_for_update(skip_locked=True)``
+    and marked with one UPDATE in the same transaction, so when two
+    workers (or a rerun) hold the same ids, exactly one of them gets each
+    order: row locks make the other skip them where the backend has them,
+    and SQLite serializes the two write transactions. Only reminder_sent_at
+    changes, which nothing in the API exposes, so the response cache stays
+    valid.
+    """
+    with transaction.atomic():
+        claimed = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=order_ids, status=Order.Status.PENDING, reminder_sent_at__isnull=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        if claimed:
+            Order.objects.filter(pk__in=claimed).update(reminder_sent_at=timezone.now())
+    return claimed
+
+
+def send_batch(order_ids, sender=None):
+    """Claim and send one batch; returns ``(sent, failed)``.
+
+    Claims come first, so a crash after sending can only skip a reminder,
+    never send it twice. Orders the sender reports as failed are released
+    for the next run.
+    """
+    claimed = claim(order_ids)
+    if not claimed:
+        return 0, 0
+    reminders = [
+        {
+            "order_id": order.pk,
+            "email": order.customer.email,
+            "name": order.customer.name,
+            "order_date": order.order_date.isoformat(),
+            "total_amount": str(order.total_amount),
+        }
+        for order in Order.objects.filter(pk__in=claimed).select_related("customer").order_by("pk")
+    ]
+    sender = sender or get_sender()
+    try:
+        failed = set(sender.send(reminders) or ())
+    except Exception:
+        logger.exception("Reminder batch of %d orders failed", len(claimed))
+        failed = set(claimed)
+    if failed:
+        Order.objects.filter(pk__in=failed).update(reminder_sent_at=None)
+    return len(claimed) - len(failed), len(failed)
+
+
+def send_due_reminders(batch_size=REMINDER_BATCH_SIZE, window_days=REMINDER_WINDOW_DAYS, sender=None):
+    """Send every due reminder in this process; returns ``{"sent", "failed", "batches"}``."""
+    sender = sender or get_sender()
+    totals = {"sent": 0, "failed": 0, "batches": 0}
+    for ids in due_batches(batch_size, window_days):
+        sent, failed = send_batch(ids, sender)
+        totals["sent"] += sent
+        totals["failed"] += failed
+        totals["batches"] += 1
+    return totals
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import weakref
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from graphql import TypeInfo, TypeInfoVisitor, Visitor, get_named_type, is_abstract_type, print_ast, visit
+
+from .models import Customer, Order, Product
+
+KEY_PREFIX = "crm:graphql"
+TAGGED_MODELS = (Customer, Product, Order)
+# Root fields whose value is derived from models without returning one of their types
+ROOT_FIELD_TAGS = {
+    "totalCustomers": (Customer,),
+    "totalOrders": (Order,),
+    "totalRevenue": (Order,),
+    "dailySummary": (Customer, Order),
+}
+
+_plans = {}
+
+
+# Backends whose entries live in one process: invalidations and counters would not be shared
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_alias():
+    """The Django cache holding responses; None (the default) turns the response cache off."""
+    return getattr(settings, "CRM_RESPONSE_CACHE_ALIAS", None)
+
+
+def response_cache():
+    return caches[cache_alias()]
+
+
+def cache_timeout():
+    """Seconds a response is kept; 0 turns the response cache off."""
+    return getattr(settings, "CRM_RESPONSE_CACHE_TIMEOUT", 300)
+
+
+def enabled():
+    return cache_alias() is not None and cache_timeout() > 0
+
+
+def _tag(model):
+    return model._meta.label
+
+
+# -------------------------------
+# Tags
+# -------------------------------
+class _TagCollector(Visitor):
+    """Collect the models behind every field a document selects."""
+
+    def __init__(self, type_info, root_type):
+        super().__init__()
+        self.type_info = type_info
+        self.root_type = root_type
+        self.tags = set()
+
+    def enter_field(self, node, *args):
+        field_type = self.type_info.get_type()
+        if field_type is None:
+            return
+        named = get_named_type(field_type)
+        if is_abstract_type(named):
+            # node(id:) and friends can return any model
+            self.tags.update(_tag(model) for model in TAGGED_MODELS)
+            return
+        model = getattr(getattr(getattr(named, "graphene_type", None), "_meta", None), "model", None)
+        if model is not None:
+            self.tags.add(_tag(model))
+        if self.type_info.get_parent_type() is self.root_type:
+            self.tags.update(_tag(m) for m in ROOT_FIELD_TAGS.get(node.name.value, ()))
+
+
+def plan(schema, document):
+    """``(normalized query, tags)`` for a document, computed once per cached DocumentNode."""
+    key = id(document)
+    cached = _plans.get(key)
+    if cached is None:
+        type_info = TypeInfo(schema)
+        collector = _TagCollector(type_info, schema.query_type)
+        visit(document, TypeInfoVisitor(type_info, collector))
+        cached = (print_ast(document), tuple(sorted(collector.tags)))
+        _plans[key] = cached
+        weakref.finalize(document, _plans.pop, key, None)
+    return cached
+
+
+# -------------------------------
+# Lookup / store
+# -------------------------------
+def _version_key(tag):
+    return f"{KEY_PREFIX}:version:{tag}"
+
+
+def cache_key(schema, document, variables, operation_name):
+    """Key over the normalized query, variables, operation name and the current tag versions.
+
+    Invalidating a tag bumps its version, so every key built from the old
+    version simply stops being read and ages out of the cache.
+    """
+    query, tags = plan(schema, document)
+    versions = response_cache().get_many([_version_key(tag) for tag in tags])
+    payload = json.dumps(
+        [query, variables or {}, operation_name, [versions.get(_version_key(tag), 0) for tag in tags]],
+        sort_keys=True, default=str,
+    )
+    return f"{KEY_PREFIX}:response:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def get_response(key):
+    data = response_cache().get(key)
+    _incr(f"{KEY_PREFIX}:{'hits' if data is not None else 'misses'}")
+    return data
+
+
+def store_response(key, data):
+    response_cache().set(key, data, cache_timeout())
+
+
+def _incr(key):
+    cache = response_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing key: create it without expiry, unless another process just did
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats():
+    """Hit/miss counters, shared by every process using the same cache backend."""
+    if not enabled():
+        return {"hits": 0, "misses": 0, "hit_ratio": None}
+    counters = response_cache().get_many([f"{KEY_PREFIX}:hits", f"{KEY_PREFIX}:misses"])
+    hits = counters.get(f"{KEY_PREFIX}:hits", 0)
+    misses = counters.get(f"{KEY_PREFIX}:misses", 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+
+
+# -------------------------------
+# Invalidation
+# -------------------------------
+def invalidate(*models):
+    """Drop every cached response tagged with ``models`` once the current transaction commits.
+
+    Model signals call this for single-row writes; bulk paths that skip
+    signals (bulk_create, queryset update) call it themselves.
+    """
+    if not enabled():
+        return
+    tags = {_tag(model) for model in models}
+
+    def bump():
+        for tag in tags:
+            _incr(_version_key(tag))
+
+    transaction.on_commit(bump)
+
+
+# -------------------------------
+# System check
+# -------------------------------
+@checks.register(checks.Tags.caches)
+def check_shared_backend(app_configs, **kwargs):
+    """The response cache must live in a backend every web process shares (Redis, memcached)."""
+    alias = cache_alias()
+    if alias is None:
+        return []
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if backend is None:
+        return [checks.Error(
+            f"CRM_RESPONSE_CACHE_ALIAS refers to an undefined cache '{alias}'.",
+            id="crm.E001",
+        )]
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [checks.Error(
+            f"CRM_RESPONSE_CACHE_ALIAS '{alias}' uses {backend}, which is private to each process.",
+            hint="Point it at a shared backend (Redis, memcached) or set it to None.",
+            id="crm.E002",
+        )]
+    return []
@@ -0,0 +1,155 @@
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+ROUTED_APPS = ("crm",)
+SELECTIONS = ("round_robin", "least_loaded")
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_route = ContextVar("crm_db_route", default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, "CRM_DATABASE_REPLICAS", ()))
+
+
+# -------------------------------
+# Replica selection
+# -------------------------------
+class ReplicaSelector:
+    """Pick a replica per request, round-robin or by fewest requests in flight in this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self._cycle = itertools.count()
+
+    def acquire(self):
+        aliases = replica_aliases()
+        if not aliases:
+            return None
+        mode = getattr(settings, "CRM_REPLICA_SELECTION", "round_robin")
+        if mode not in SELECTIONS:
+            raise ValueError(f"Unsupported CRM_REPLICA_SELECTION: {mode}")
+        with self.lock:
+            if mode == "least_loaded":
+                alias = min(aliases, key=lambda a: self.in_flight.get(a, 0))
+            else:
+                alias = aliases[next(self._cycle) % len(aliases)]
+            self.in_flight[alias] = self.in_flight.get(alias, 0) + 1
+        return alias
+
+    def release(self, alias):
+        with self.lock:
+            self.in_flight[alias] -= 1
+
+
+selector = ReplicaSelector()
+
+
+# -------------------------------
+# Per-request routing state
+# -------------------------------
+class Route:
+    """Whether this request's reads may use a replica, and which one it got.
+
+    ``pinned`` is set by the first write (or a mutation) and keeps every
+    later read of the request on the primary, so it reads its own writes.
+    """
+
+    def __init__(self, read_only):
+        self.read_only = read_only
+        self.pinned = False
+        self.replica = None
+        # Root fields of the async view resolve on several threads at once
+        self.lock = threading.Lock()
+
+    def read_alias(self):
+        if self.pinned or not self.read_only:
+            return None
+        with self.lock:
+            if self.replica is None:
+                self.replica = selector.acquire()
+        return self.replica
+
+
+@contextmanager
+def route_request(read_only):
+    """Routing scope of one request; outside any scope (jobs, commands) everything uses the primary."""
+    route = Route(read_only)
+    token = _route.set(route)
+    try:
+        yield route
+    finally:
+        _route.reset(token)
+        if route.replica is not None:
+            selector.release(route.replica)
+
+
+def route_operation(read_only):
+    """Called by the GraphQL view once it knows the operation type; mutations pin to the primary."""
+    route = _route.get()
+    if route is None:
+        return
+    route.read_only = read_only
+    if not read_only:
+        route.pinned = True
+
+
+def use_primary():
+    """Keep the rest of the current request on the primary."""
+    route = _route.get()
+    if route is not None:
+        route.pinned = True
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """Open a routing scope per request: safe methods may read from a replica, others use the primary."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with route_request(request.method in SAFE_METHODS):
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with route_request(request.method in SAFE_METHODS):
+                return get_response(request)
+    return middleware
+
+
+# -------------------------------
+# Router
+# -------------------------------
+class ReplicaRouter:
+    """Send reads of the crm models to a replica when the current request allows it.
+
+    Writes always go to the primary and pin the request there. Replicas
+    are read-only copies, so nothing is migrated on them.
+    """
+
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        if route is None or model._meta.app_label not in ROUTED_APPS:
+            return None
+        return route.read_alias()
+
+    def db_for_write(self, model, **hints):
+        use_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
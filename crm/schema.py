@@ -1,14 +1,25 @@
+import re
 import graphene
 from graphene_django import DjangoObjectType
-from graphene_django.filter import DjangoFilterConnectionField
-from .models import Customer, Product, Order
+from .models import Customer, Product, Order, DailySummary, PHONE_REGEX
 from .filters import CustomerFilter, ProductFilter, OrderFilter
+from .fields import KeysetConnectionField
+from . import broadcast, response_cache, summary
+from .importers import existing_emails
+from .loaders import get_loaders, prime_orders
+from .services import (
+    LOW_STOCK_THRESHOLD, RESTOCK_INCREMENT, OrderError, create_order, restock_low_stock,
+)
+from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from graphql import GraphQLError
-from django.db import transaction
+from django.db import DatabaseError, transaction
 from crm.models import Product
 from crm.models import Customer, Order
 
+PHONE_PATTERN = re.compile(PHONE_REGEX)
+BULK_CREATE_BATCH_SIZE = 500
+
 # -------------------------------
 # Graphene Types
 # -------------------------------
@@ -27,19 +38,20 @@ class ProductType(DjangoObjectType):
 # Define the Mutation
 class UpdateLowStockProducts(graphene.Mutation):
     class Arguments:
-        pass  # No input needed for this mutation
+        threshold = graphene.Int(default_value=LOW_STOCK_THRESHOLD)
+        increment = graphene.Int(default_value=RESTOCK_INCREMENT)
+        chunk_size = graphene.Int()
 
     success = graphene.String()
     updated_products = graphene.List(ProductType)
 
-    def mutate(self, info):
-        low_stock_products = Product.objects.filter(stock__lt=10)
-        updated_list = []
+    def mutate(self, info, threshold, increment, chunk_size=None):
+        if increment <= 0:
+            raise GraphQLError("Increment must be positive")
+        if chunk_size is not None and chunk_size <= 0:
+            raise GraphQLError("Chunk size must be positive")
 
-        for product in low_stock_products:
-            product.stock += 10  # simulate restocking
-            product.save()
-            updated_list.append(product)
+        updated_list = restock_low_stock(threshold, increment, chunk_size)
 
         return UpdateLowStockProducts(
             success=f"{len(updated_list)} products restocked successfully.",
@@ -49,7 +61,13 @@ class UpdateLowStockProducts(graphene.Mutation):
 class OrderType(DjangoObjectType):
     class Meta:
         model = Order
-        fields = ("id", "customer", "products", "total_amount", "order_date")
+        fields = ("id", "customer", "products", "total_amount", "order_date", "status")
+
+
+class DailySummaryType(DjangoObjectType):
+    class Meta:
+        model = DailySummary
+        fields = ("day", "new_customers", "orders", "revenue")
 
 # -------------------------------
 # Mutations
@@ -96,24 +114,47 @@ class BulkCreateCustomers(graphene.Mutation):
     @transaction.atomic
     def mutate(self, info, input):
         customers = []
+        # (input index, message), reported in input order like the row-by-row version
         errors = []
-        for data in input:
+
+        # One email__in lookup (per bind-parameter limit) instead of exists() per row
+        taken = existing_emails({data.email for data in input})
+
+        pending = []
+        for index, data in enumerate(input):
+            if data.email in taken:
+                errors.append((index, f"Email {data.email} already exists"))
+                continue
+            if data.phone and not PHONE_PATTERN.search(data.phone):
+                errors.append((index, str(ValidationError(f"Phone number {data.phone} is invalid"))))
+                continue
+            taken.add(data.email)
+            # A missing phone stays None, so the database still rejects the row (phone is NOT NULL)
+            pending.append((index, Customer(name=data.name, email=data.email, phone=data.phone)))
+
+        for start in range(0, len(pending), BULK_CREATE_BATCH_SIZE):
+            batch = pending[start:start + BULK_CREATE_BATCH_SIZE]
+            rows = [customer for _, customer in batch]
             try:
-                if Customer.objects.filter(email=data.email).exists():
-                    errors.append(f"Email {data.email} already exists")
-                    continue
-                if data.phone:
-                    validator = RegexValidator(
-                        regex=r'^(\+?\d{1,3})?[- ]?\d{3}[- ]?\d{3}[- ]?\d{4}$',
-                        message=f"Phone number {data.phone} is invalid"
-                    )
-                    validator(data.phone)
-                customer = Customer(name=data.name, email=data.email, phone=data.phone)
-                customer.save()
-                customers.append(customer)
-            except Exception as e:
-                errors.append(str(e))
-        return BulkCreateCustomers(customers=customers, errors=errors)
+                with transaction.atomic():
+                    Customer.objects.bulk_create(rows)
+                    summary.record_customers(rows)
+                    response_cache.invalidate(Customer)
+                customers.extend(rows)
+            except DatabaseError:
+                # Fall back to row-by-row inside this batch to report the offending rows
+                for index, customer in batch:
+                    # bulk_create may have assigned a pk before the batch rolled back
+                    customer.pk = None
+                    customer._state.adding = True
+                    try:
+                        with transaction.atomic():
+                            customer.save()
+                        customers.append(customer)
+                    except DatabaseError as e:
+                        errors.append((index, str(e)))
+        errors.sort(key=lambda error: error[0])
+        return BulkCreateCustomers(customers=customers, errors=[message for _, message in errors])
 
 
 # --- Create Product ---
@@ -145,25 +186,9 @@ class CreateOrder(graphene.Mutation):
 
     def mutate(self, info, customer_id, product_ids):
         try:
-            customer = Customer.objects.get(pk=customer_id)
-        except Customer.DoesNotExist:
-            raise GraphQLError("Invalid customer ID")
-
-        products = []
-        for pid in product_ids:
-            try:
-                products.append(Product.objects.get(pk=pid))
-            except Product.DoesNotExist:
-                raise GraphQLError(f"Invalid product ID: {pid}")
-
-        if not products:
-            raise GraphQLError("At least one product must be selected")
-
-        order = Order(customer=customer)
-        order.save()
-        order.products.set(products)
-        order.total_amount = sum(p.price for p in products)
-        order.save()
+            order = create_order(customer_id, product_ids)
+        except OrderError as e:
+            raise GraphQLError(str(e))
         return CreateOrder(order=order)
 
 # -------------------------------
@@ -175,18 +200,36 @@ class CustomerNode(DjangoObjectType):
         fields = ("id", "name", "email", "phone", "created_at")
         interfaces = (graphene.relay.Node,)
 
+    @classmethod
+    def get_node(cls, info, id):
+        return get_loaders(info).customer_by_id.load(int(id))
+
 class ProductNode(DjangoObjectType):
     class Meta:
         model = Product
         fields = ("id", "name", "price", "stock")
         interfaces = (graphene.relay.Node,)
 
+    @classmethod
+    def get_node(cls, info, id):
+        return get_loaders(info).product_by_id.load(int(id))
+
 class OrderNode(DjangoObjectType):
     class Meta:
         model = Order
-        fields = ("id", "customer", "products", "total_amount", "order_date")
+        fields = ("id", "customer", "products", "total_amount", "order_date", "status")
         interfaces = (graphene.relay.Node,)
 
+    @classmethod
+    def prime_loaders(cls, info, orders):
+        prime_orders(info, orders)
+
+    def resolve_customer(self, info):
+        return get_loaders(info).customer_by_id.load(self.customer_id)
+
+    def resolve_products(self, info, **kwargs):
+        return get_loaders(info).products_by_order_id.load(self.pk)
+
 # -------------------------------
 # Mutation Class
 # -------------------------------
@@ -196,13 +239,73 @@ class Mutation(graphene.ObjectType):
     bulk_create_customers = BulkCreateCustomers.Field()
     create_product = CreateProduct.Field()
     create_order = CreateOrder.Field()
+    update_low_stock_products = UpdateLowStockProducts.Field()
 
 
 # -------------------------------
 # Query Class
 # -------------------------------
 
+def request_totals(info):
+    """The summary row, read once per request however many totals are selected (and from any thread)."""
+    return get_loaders(info).totals.load("totals")
+
+
 class Query(graphene.ObjectType):
-    all_customers = DjangoFilterConnectionField(CustomerNode, filterset_class=CustomerFilter)
-    all_products = DjangoFilterConnectionField(ProductNode, filterset_class=ProductFilter)
-    all_orders = DjangoFilterConnectionField(OrderNode, filterset_class=OrderFilter)
+    node = graphene.relay.Node.Field()
+    all_customers = KeysetConnectionField(CustomerNode, filterset_class=CustomerFilter)
+    all_products = KeysetConnectionField(ProductNode, filterset_class=ProductFilter)
+    all_orders = KeysetConnectionField(
+        OrderNode, filterset_class=OrderFilter, ordering=("order_date", "id")
+    )
+
+    # Served from the crm.summary row instead of COUNT/SUM over the tables
+    total_customers = graphene.Int()
+    total_orders = graphene.Int()
+    total_revenue = graphene.Decimal()
+    daily_summary = graphene.List(
+        DailySummaryType, start=graphene.Date(required=True), end=graphene.Date(required=True)
+    )
+
+    def resolve_total_customers(self, info):
+        return request_totals(info).total_customers
+
+    def resolve_total_orders(self, info):
+        return request_totals(info).total_orders
+
+    def resolve_total_revenue(self, info):
+        return request_totals(info).total_revenue
+
+    def resolve_daily_summary(self, info, start, end):
+        return summary.daily(start, end)
+
+
+# -------------------------------
+# Subscription Class
+# -------------------------------
+
+class Subscription(graphene.ObjectType):
+    """Pushed over WebSocket (crm.websocket) from the events crm.broadcast publishes.
+
+    Every subscriber receives the same loaded instance, so the types below
+    resolve from memory; the arguments filter events before they are queued.
+    """
+    order_created = graphene.Field(OrderType, customer_id=graphene.ID(), min_total=graphene.Decimal())
+    product_stock_changed = graphene.Field(ProductType, product_ids=graphene.List(graphene.NonNull(graphene.ID)))
+    low_stock_alert = graphene.Field(ProductType, threshold=graphene.Int(default_value=LOW_STOCK_THRESHOLD))
+
+    def subscribe_order_created(self, info, customer_id=None, min_total=None):
+        def accepts(order):
+            if customer_id is not None and str(order.customer_id) != str(customer_id):
+                return False
+            return min_total is None or order.total_amount >= min_total
+        return broadcast.subscribe(broadcast.ORDER_CREATED, accepts)
+
+    def subscribe_product_stock_changed(self, info, product_ids=None):
+        ids = None if product_ids is None else {str(pid) for pid in product_ids}
+        return broadcast.subscribe(
+            broadcast.PRODUCT_STOCK, None if ids is None else (lambda product: str(product.pk) in ids)
+        )
+
+    def subscribe_low_stock_alert(self, info, threshold):
+        return broadcast.subscribe(broadcast.PRODUCT_STOCK, lambda product: product.stock < threshold)
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models.expressions import RawSQL
+
+from .models import Customer, Product
+
+# Searchable models: FTS5 table and the columns it mirrors (see migration 0003).
+# SQLite triggers (migration 0007) keep the rows in step with every INSERT,
+# UPDATE and DELETE, queryset updates and raw deletes included.
+FTS_TABLES = {
+    Customer: ("crm_customer_fts", ("name", "email")),
+    Product: ("crm_product_fts", ("name",)),
+}
+# The trigram tokenizer cannot match anything shorter than one trigram
+MIN_TRIGRAM_LENGTH = 3
+BACKENDS = ("auto", "fts5", "trigram", "like")
+
+_fts_available = {}
+
+
+# -------------------------------
+# Backend selection
+# -------------------------------
+def search_backend(using="default"):
+    """Return the search mode for a connection: ``fts5``, ``trigram`` or ``like``.
+
+    ``settings.CRM_SEARCH_BACKEND`` forces a mode; the default ``auto`` picks
+    FTS5 on SQLite when its tables exist and pg_trgm on PostgreSQL. The
+    trigram mode needs no query changes: its GIN indexes cover the plain
+    ``icontains`` SQL.
+    """
+    backend = getattr(settings, "CRM_SEARCH_BACKEND", "auto")
+    vendor = connections[using].vendor
+    if backend == "auto":
+        if vendor == "sqlite" and fts_available(using):
+            return "fts5"
+        return "trigram" if vendor == "postgresql" else "like"
+    return backend
+
+
+def fts_available(using="default"):
+    if using not in _fts_available:
+        tables = {table for table, _ in FTS_TABLES.values()}
+        try:
+            existing = set(connections[using].introspection.table_names())
+        except DatabaseError:
+            return False
+        _fts_available[using] = tables <= existing
+    return _fts_available[using]
+
+
+# -------------------------------
+# Filtering
+# -------------------------------
+def _fts_query(column, value):
+    return f'{column} : "{value.replace(chr(34), chr(34) * 2)}"'
+
+
+def icontains(queryset, field_path, value):
+    """Filter ``queryset`` by ``field_path__icontains=value`` through the search index.
+
+    ``field_path`` may cross one relation (``customer__name``,
+    ``products__name``); the match then becomes an ``__in`` subquery on the
+    related model's index.
+    """
+    *relation, column = field_path.split("__")
+    model = queryset.model
+    if relation:
+        model = model._meta.get_field(relation[0]).related_model
+
+    if (
+        search_backend(queryset.db) != "fts5"
+        or model not in FTS_TABLES
+        or len(value) < MIN_TRIGRAM_LENGTH
+    ):
+        return queryset.filter(**{f"{field_path}__icontains": value})
+
+    table, _ = FTS_TABLES[model]
+    matches = RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [_fts_query(column, value)])
+    if relation:
+        return queryset.filter(**{f"{relation[0]}__in": model.objects.filter(pk__in=matches)})
+    return queryset.filter(pk__in=matches)
+
+
+# -------------------------------
+# Index maintenance (FTS5 only)
+# -------------------------------
+def rebuild_index(using="default"):
+    """Repopulate every FTS table from its source table; returns rows indexed per table.
+
+    Only needed for rows written while the triggers were missing.
+    """
+    counts = {}
+    if search_backend(using) != "fts5":
+        return counts
+    with connections[using].cursor() as cursor:
+        for model, (table, columns) in FTS_TABLES.items():
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+                f"SELECT id, {', '.join(columns)} FROM {model._meta.db_table}"
+            )
+            counts[table] = cursor.rowcount
+    return counts
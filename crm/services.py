@@ -0,0 +1,137 @@
+from django.db import connections, router, transaction
+from django.db.models import DecimalField, F, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import broadcast, response_cache, summary
+from .models import Customer, Order, Product
+
+LOW_STOCK_THRESHOLD = 10
+RESTOCK_INCREMENT = 10
+
+
+# -------------------------------
+# Inventory
+# -------------------------------
+def restock_low_stock(threshold=LOW_STOCK_THRESHOLD, increment=RESTOCK_INCREMENT, chunk_size=None):
+    """Add ``increment`` to the stock of every product below ``threshold``.
+
+    Runs one ``stock = stock + n`` UPDATE (per id range of ``chunk_size`` ids
+    when given) and returns the updated products. Everything, the re-read
+    included, runs on the database the router picks for writes.
+    """
+    using = router.db_for_write(Product)
+    low_stock = Product.objects.using(using).filter(stock__lt=threshold)
+    max_query_params = connections[using].features.max_query_params
+    if max_query_params:
+        # Each range is read back with pk__in, so keep it under the parameter limit
+        chunk_size = min(chunk_size or max_query_params, max_query_params)
+
+    if chunk_size is None:
+        return _restock(low_stock, increment)
+
+    bounds = low_stock.aggregate(lo=Min("pk"), hi=Max("pk"))
+    if bounds["lo"] is None:
+        return []
+    updated = []
+    for start in range(bounds["lo"], bounds["hi"] + 1, chunk_size):
+        chunk = low_stock.filter(pk__gte=start, pk__lt=start + chunk_size)
+        updated.extend(_restock(chunk, increment))
+    return updated
+
+
+def _restock(queryset, increment):
+    with transaction.atomic(using=queryset.db):
+        ids = list(queryset.select_for_update().values_list("pk", flat=True))
+        if not ids:
+            return []
+        products = Product.objects.using(queryset.db).filter(pk__in=ids)
+        products.update(stock=F("stock") + increment)
+        updated = list(products.order_by("pk"))
+    # Queryset UPDATEs send no post_save
+    response_cache.invalidate(Product)
+    broadcast.products_changed(updated)
+    return updated
+
+
+# -------------------------------
+# Orders
+# -------------------------------
+class OrderError(Exception):
+    """An order could not be placed; the message is safe to show to clients."""
+
+
+@transaction.atomic
+def create_order(customer_id, product_ids):
+    """Place an order for one unit of each product, reserving stock atomically.
+
+    Products are fetched and locked with one ``id__in`` query, stock is
+    decremented with one conditional UPDATE, and the order and its M2M rows
+    are inserted with the total already computed.
+    """
+    try:
+        customer = Customer.objects.get(pk=customer_id)
+    except (Customer.DoesNotExist, ValueError):
+        raise OrderError("Invalid customer ID")
+
+    ids = []
+    for pid in product_ids:
+        try:
+            ids.append(int(pid))
+        except (TypeError, ValueError):
+            raise OrderError(f"Invalid product ID: {pid}")
+    ids = list(dict.fromkeys(ids))
+
+    products = Product.objects.select_for_update().in_bulk(ids)
+    for pid in ids:
+        if pid not in products:
+            raise OrderError(f"Invalid product ID: {pid}")
+    if not ids:
+        raise OrderError("At least one product must be selected")
+    for product in products.values():
+        if product.stock < 1:
+            raise OrderError(f"Product {product.name} is out of stock")
+
+    # The stock guard makes the decrement safe even where rows were not locked
+    reserved = Product.objects.filter(pk__in=ids, stock__gte=1).update(stock=F("stock") - 1)
+    response_cache.invalidate(Product)
+    broadcast.stock_changed(ids)
+    if reserved != len(ids):
+        raise OrderError("Some products went out of stock, please retry")
+
+    order = Order(customer=customer, total_amount=sum(products[pid].price for pid in ids))
+    order.save()
+    # Bulk through-table insert skips m2m_changed; the total is already set above
+    Through = Order.products.through
+    Through.objects.bulk_create([Through(order_id=order.pk, product_id=pid) for pid in ids])
+    return order
+
+
+def recompute_order_totals(batch_size=None):
+    """Recompute every order's total_amount from its products' current prices.
+
+    Each batch is one UPDATE with a correlated SUM subquery, so no order or
+    product is loaded into Python. Returns the number of orders updated.
+    """
+    Through = Order.products.through
+    product_total = (
+        Through.objects.filter(order_id=OuterRef("pk"))
+        .values("order_id")
+        .annotate(total=Sum("product__price"))
+        .values("total")
+    )
+    total = Coalesce(Subquery(product_total), Value(0), output_field=DecimalField())
+
+    orders = Order.objects.all()
+    if batch_size is None:
+        updated = orders.update(total_amount=total)
+    else:
+        updated = 0
+        bounds = orders.aggregate(lo=Min("pk"), hi=Max("pk"))
+        if bounds["lo"] is not None:
+            for start in range(bounds["lo"], bounds["hi"] + 1, batch_size):
+                with transaction.atomic():
+                    updated += orders.filter(pk__gte=start, pk__lt=start + batch_size).update(total_amount=total)
+    # The UPDATEs bypass the signals that keep the revenue summary and response cache current
+    response_cache.invalidate(Order)
+    summary.rebuild()
+    return updated
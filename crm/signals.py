@@ -0,0 +1,122 @@
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import broadcast, response_cache, summary
+from .models import Customer, Order, Product
+
+
+def _price_sum(products):
+    return products.aggregate(
+        total=Coalesce(Sum("price"), Value(0), output_field=DecimalField())
+    )["total"]
+
+
+def _apply_delta(orders, delta):
+    if delta:
+        orders.update(total_amount=F("total_amount") + delta)
+
+
+# -------------------------------
+# Order.total_amount maintenance
+# -------------------------------
+@receiver(m2m_changed, sender=Order.products.through)
+def update_order_totals(sender, instance, action, reverse, pk_set, **kwargs):
+    """Apply the price delta of every products add/remove/clear to total_amount.
+
+    Each change costs at most one aggregate query plus one UPDATE, and
+    Order.save() never has to read the M2M table. Bulk writes to the through
+    table bypass this handler and must set total_amount themselves. The same
+    delta is booked as revenue in the CRM summary.
+    """
+    if not reverse:
+        order = instance
+        orders = Order.objects.filter(pk=order.pk)
+        if action == "post_add" and pk_set:
+            delta = _price_sum(Product.objects.filter(pk__in=pk_set))
+        elif action == "pre_remove" and pk_set:
+            # pk_set may name products that are not on the order
+            delta = -_price_sum(order.products.filter(pk__in=pk_set))
+        elif action == "pre_clear":
+            delta = -orders.values_list("total_amount", flat=True).get()
+        else:
+            return
+        _apply_delta(orders, delta)
+        summary.record(summary.day_of(order.order_date), revenue=delta)
+        order.total_amount = (order.total_amount or 0) + delta
+        return
+
+    # product.order_set.add/remove/clear: the product's price moves across orders
+    product = instance
+    # An instance built in memory may still hold the price as given (str, float)
+    price = Product._meta.get_field("price").to_python(product.price)
+    if action == "post_add" and pk_set:
+        orders, delta = Order.objects.filter(pk__in=pk_set), price
+    elif action == "pre_remove" and pk_set:
+        orders, delta = Order.objects.filter(pk__in=pk_set, products=product), -price
+    elif action == "pre_clear":
+        orders, delta = Order.objects.filter(products=product), -price
+    else:
+        return
+    summary.record_revenue_delta(orders, delta)
+    _apply_delta(orders, delta)
+
+
+# -------------------------------
+# CRM summary (totalCustomers/totalOrders/totalRevenue)
+# -------------------------------
+@receiver(post_save, sender=Customer)
+def count_new_customer(sender, instance, created, **kwargs):
+    if created:
+        summary.record(summary.day_of(instance.created_at), customers=1)
+
+
+@receiver(post_delete, sender=Customer)
+def count_deleted_customer(sender, instance, **kwargs):
+    summary.record(summary.day_of(instance.created_at), customers=-1)
+
+
+@receiver(post_save, sender=Order)
+def count_new_order(sender, instance, created, **kwargs):
+    if created:
+        summary.record(summary.day_of(instance.order_date), orders=1, revenue=instance.total_amount or 0)
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    summary.record(summary.day_of(instance.order_date), orders=-1, revenue=-(instance.total_amount or 0))
+
+
+# -------------------------------
+# GraphQL response cache
+# -------------------------------
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Order)
+def invalidate_cached_responses(sender, **kwargs):
+    response_cache.invalidate(sender)
+
+
+@receiver(m2m_changed, sender=Order.products.through)
+def invalidate_cached_order_products(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        response_cache.invalidate(Order, Product)
+
+
+# -------------------------------
+# GraphQL subscriptions
+# -------------------------------
+@receiver(post_save, sender=Order)
+def publish_new_order(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        broadcast.order_created(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def publish_product_stock(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and (update_fields is None or "stock" in update_fields):
+        broadcast.products_changed([instance])
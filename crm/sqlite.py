@@ -0,0 +1,30 @@
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_write_lock = threading.Lock()
+
+
+def writer_queue_enabled(using=DEFAULT_DB_ALIAS):
+    """``CRM_SQLITE_WRITER_QUEUE`` is on and ``using`` is a SQLite database."""
+    return getattr(settings, "CRM_SQLITE_WRITER_QUEUE", False) and connections[using].vendor == "sqlite"
+
+
+def run_serialized(func, *args, **kwargs):
+    """Run ``func`` while holding the process-wide write lock, and return its result.
+
+    SQLite allows one writer at a time; threads of the same process that
+    race for the lock spin in the busy handler and can still time out with
+    "database is locked". Waiting on a Python lock here hands the database
+    lock over in turn instead, while readers (WAL) keep going. ``func``
+    runs on the calling thread and its own connection, so it sees (and
+    joins) that thread's transaction. Runs ``func`` without the lock when
+    the queue is off, or when the caller is already in a transaction: it
+    may hold SQLite's write lock, and waiting for a thread that wants it
+    would deadlock.
+    """
+    if not writer_queue_enabled() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return func(*args, **kwargs)
+    with _write_lock:
+        return func(*args, **kwargs)
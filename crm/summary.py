@@ -0,0 +1,244 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Count, DecimalField, F, Func, Max, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import response_cache
+from .models import CRMSummary, Customer, DailySummary, Order, SummaryDelta
+
+SUMMARY_PK = 1
+COMPACT_BATCH_SIZE = 500
+
+
+def day_of(value):
+    if value is None:
+        value = timezone.now()
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+# -------------------------------
+# Incremental updates
+# -------------------------------
+def record(day=None, customers=0, orders=0, revenue=0):
+    """Append the deltas of one write for ``day`` (today when None).
+
+    One INSERT in the caller's transaction, so a rolled back write never
+    leaves the summary ahead of the data, and concurrent writers never wait
+    on each other's counter rows.
+    """
+    if not (customers or orders or revenue):
+        return
+    SummaryDelta.objects.create(day=day or day_of(None), new_customers=customers, orders=orders, revenue=revenue)
+
+
+def _record_many(per_day):
+    deltas = [
+        SummaryDelta(day=day, new_customers=customers, orders=orders, revenue=revenue)
+        for day, (customers, orders, revenue) in per_day.items()
+        if customers or orders or revenue
+    ]
+    SummaryDelta.objects.bulk_create(deltas, batch_size=COMPACT_BATCH_SIZE)
+
+
+def record_customers(customers, sign=1):
+    """Count a batch of customers (bulk_create/bulk delete paths), one delta row per distinct day."""
+    counts = Counter(day_of(c.created_at) for c in customers)
+    _record_many({day: (sign * count, 0, 0) for day, count in counts.items()})
+
+
+def record_orders(orders, sign=1):
+    """Count a batch of orders with their current total_amount, one delta row per distinct day."""
+    per_day = defaultdict(lambda: [0, Decimal("0")])
+    for order in orders:
+        bucket = per_day[day_of(order.order_date)]
+        bucket[0] += 1
+        bucket[1] += order.total_amount or 0
+    _record_many({day: (0, sign * count, sign * revenue) for day, (count, revenue) in per_day.items()})
+
+
+def record_revenue_delta(orders, delta):
+    """Book ``delta`` of revenue for every order in the ``orders`` queryset, grouped by order day."""
+    if not delta:
+        return
+    per_day = orders.annotate(day=TruncDate("order_date")).values("day").annotate(n=Count("pk"))
+    _record_many({row["day"]: (0, 0, delta * row["n"]) for row in per_day})
+
+
+# -------------------------------
+# Reads
+# -------------------------------
+def _pending(field, output_field):
+    # SUM over every delta row, as a scalar subquery (Func, so no GROUP BY is added)
+    return Coalesce(
+        Subquery(SummaryDelta.objects.order_by().values(total=Func(F(field), function="SUM"))),
+        Value(0), output_field=output_field,
+    )
+
+
+def _stored_totals():
+    """The summary row with the pending deltas added, read in one statement; None if the row is missing."""
+    summary = CRMSummary.objects.filter(pk=SUMMARY_PK).annotate(
+        pending_customers=_pending("new_customers", BigIntegerField()),
+        pending_orders=_pending("orders", BigIntegerField()),
+        pending_revenue=_pending("revenue", DecimalField(max_digits=16, decimal_places=2)),
+    ).first()
+    if summary is not None:
+        summary.total_customers += summary.pending_customers
+        summary.total_orders += summary.pending_orders
+        summary.total_revenue += summary.pending_revenue
+    return summary
+
+
+def get_totals():
+    summary = _stored_totals()
+    if summary is None:
+        summary = rebuild()
+    return summary
+
+
+def daily(start, end):
+    """DailySummary buckets for ``start``..``end`` with their pending deltas added, ordered by day."""
+    with transaction.atomic():
+        buckets = {b.day: b for b in DailySummary.objects.filter(day__range=(start, end))}
+        pending = (
+            SummaryDelta.objects.filter(day__range=(start, end)).values("day")
+            .annotate(
+                pending_customers=Sum("new_customers"),
+                pending_orders=Sum("orders"),
+                pending_revenue=Sum("revenue"),
+            )
+        )
+        for row in pending:
+            bucket = buckets.setdefault(row["day"], DailySummary(day=row["day"]))
+            bucket.new_customers += row["pending_customers"]
+            bucket.orders += row["pending_orders"]
+            bucket.revenue += row["pending_revenue"]
+    return [buckets[day] for day in sorted(buckets)]
+
+
+def actual_totals():
+    """The true aggregates, computed with full scans; used to check and rebuild the summary."""
+    orders = Order.objects.aggregate(
+        count=Count("pk"),
+        revenue=Coalesce(Sum("total_amount"), Value(0), output_field=DecimalField()),
+    )
+    return {
+        "total_customers": Customer.objects.count(),
+        "total_orders": orders["count"],
+        "total_revenue": orders["revenue"],
+    }
+
+
+# -------------------------------
+# Compaction / reconciliation
+# -------------------------------
+def compact(batch_size=COMPACT_BATCH_SIZE):
+    """Fold the appended deltas into CRMSummary and DailySummary; returns how many were folded.
+
+    Runs in short transactions of ``batch_size`` deltas. Only the rows read
+    in a batch are deleted, so deltas committed meanwhile wait for the next
+    batch. A missing summary row is rebuilt from the source tables.
+    """
+    folded = 0
+    while True:
+        count = _compact_batch(batch_size)
+        folded += count
+        if count < batch_size:
+            return folded
+
+
+@transaction.atomic
+def _compact_batch(batch_size):
+    rows = list(
+        SummaryDelta.objects.order_by("pk")
+        .values_list("pk", "day", "new_customers", "orders", "revenue")[:batch_size]
+    )
+    if not rows:
+        return 0
+    per_day = defaultdict(lambda: [0, 0, Decimal("0")])
+    for _, day, customers, orders, revenue in rows:
+        bucket = per_day[day]
+        bucket[0] += customers
+        bucket[1] += orders
+        bucket[2] += revenue
+
+    updated = CRMSummary.objects.filter(pk=SUMMARY_PK).update(
+        total_customers=F("total_customers") + sum(b[0] for b in per_day.values()),
+        total_orders=F("total_orders") + sum(b[1] for b in per_day.values()),
+        total_revenue=F("total_revenue") + sum(b[2] for b in per_day.values()),
+    )
+    if not updated:
+        # The row is gone; a rebuild counts the data these deltas describe and drops every delta
+        rebuild()
+        return len(rows)
+
+    for day, (customers, orders, revenue) in per_day.items():
+        _add_to_bucket(day, customers, orders, revenue)
+    SummaryDelta.objects.filter(pk__in=[row[0] for row in rows]).delete()
+    return len(rows)
+
+
+def _add_to_bucket(day, customers, orders, revenue):
+    bucket = DailySummary.objects.filter(day=day)
+    changes = {
+        "new_customers": F("new_customers") + customers,
+        "orders": F("orders") + orders,
+        "revenue": F("revenue") + revenue,
+    }
+    if bucket.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailySummary.objects.create(day=day, new_customers=customers, orders=orders, revenue=revenue)
+    except IntegrityError:
+        # Another compaction created the bucket first
+        bucket.update(**changes)
+
+
+def reconcile():
+    """Return ``{field: (stored, actual)}`` for every total that drifted from the data."""
+    summary = _stored_totals()
+    actual = actual_totals()
+    drift = {}
+    for field, value in actual.items():
+        stored = getattr(summary, field) if summary else None
+        if stored != value:
+            drift[field] = (stored, value)
+    return drift
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute the summary row and every daily bucket from the source tables, dropping the deltas they cover.
+
+    The newest delta is noted before the tables are counted, and only deltas
+    up to it are dropped: one booked while the counts run stays pending
+    instead of being lost.
+    """
+    last_delta = SummaryDelta.objects.aggregate(last=Max("pk"))["last"]
+    summary, _ = CRMSummary.objects.update_or_create(pk=SUMMARY_PK, defaults=actual_totals())
+    if last_delta is not None:
+        SummaryDelta.objects.filter(pk__lte=last_delta).delete()
+
+    days = defaultdict(lambda: {"new_customers": 0, "orders": 0, "revenue": Decimal("0")})
+    for row in Customer.objects.annotate(day=TruncDate("created_at")).values("day").annotate(n=Count("pk")):
+        days[row["day"]]["new_customers"] = row["n"]
+    per_day_orders = (
+        Order.objects.annotate(day=TruncDate("order_date")).values("day")
+        .annotate(n=Count("pk"), revenue=Sum("total_amount"))
+    )
+    for row in per_day_orders:
+        days[row["day"]]["orders"] = row["n"]
+        days[row["day"]]["revenue"] = row["revenue"] or 0
+
+    response_cache.invalidate(Customer, Order)
+    DailySummary.objects.all().delete()
+    DailySummary.objects.bulk_create(
+        [DailySummary(day=day, **values) for day, values in days.items()], batch_size=500
+    )
+    return summary
@@ -0,0 +1,104 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from . import response_cache, summary
+from .models import Customer, Order, Product
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _bulk_create_with_timestamps(model, objs, field_name, timestamps):
+    """bulk_create ``objs``, then give them ``timestamps`` in place of what auto_now_add stamped.
+
+    auto_now_add overrides any value set on the instances, so the generated
+    times are written back with one bulk_update per batch.
+    """
+    model.objects.bulk_create(objs)
+    for obj, timestamp in zip(objs, timestamps):
+        setattr(obj, field_name, timestamp)
+    model.objects.bulk_update(objs, [field_name])
+
+
+def email_prefix(seed):
+    return f"synthetic-{seed}-"
+
+
+def generate(customers=1000, products=100, orders=10000, products_per_order=3,
+             days=365, seed=0, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Insert a deterministic CRM dataset; the same arguments always produce the same rows.
+
+    Rows are written with bulk_create in batches of ``batch_size`` and only
+    primary keys are kept in memory. ``progress`` is called with
+    ``(label, done, total)`` after every batch. Returns the row counts.
+    """
+    if Customer.objects.filter(email__startswith=email_prefix(seed)).exists():
+        raise ValueError(f"Synthetic data for seed {seed} already exists")
+
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    def when():
+        return now - timedelta(seconds=rng.randrange(days * 86400))
+
+    customer_ids = []
+    for start in range(0, customers, batch_size):
+        batch = [
+            Customer(
+                name=f"Customer {i}",
+                email=f"{email_prefix(seed)}{i}@example.com",
+                phone=f"555-{i // 10000 % 1000:03d}-{i % 10000:04d}",
+            )
+            for i in range(start, min(start + batch_size, customers))
+        ]
+        _bulk_create_with_timestamps(Customer, batch, "created_at", [when() for _ in batch])
+        summary.record_customers(batch)
+        customer_ids.extend(c.pk for c in batch)
+        if progress:
+            progress("customers", len(customer_ids), customers)
+
+    product_prices = {}
+    for start in range(0, products, batch_size):
+        batch = [
+            Product(
+                name=f"Product {i}",
+                price=Decimal(rng.randrange(100, 100000)) / 100,
+                stock=rng.randrange(0, 100),
+            )
+            for i in range(start, min(start + batch_size, products))
+        ]
+        Product.objects.bulk_create(batch)
+        product_prices.update((p.pk, p.price) for p in batch)
+        if progress:
+            progress("products", len(product_prices), products)
+    product_ids = list(product_prices)
+
+    if orders and not (customer_ids and product_ids):
+        raise ValueError("Orders need at least one customer and one product")
+
+    Through = Order.products.through
+    per_order = min(products_per_order, len(product_ids))
+    created = 0
+    for start in range(0, orders, batch_size):
+        size = min(batch_size, orders - start)
+        picks = [rng.sample(product_ids, per_order) for _ in range(size)]
+        rows = [(rng.choice(customer_ids), when()) for _ in picks]
+        batch = [
+            Order(customer_id=customer_id, total_amount=sum(product_prices[pid] for pid in pick))
+            for (customer_id, _), pick in zip(rows, picks)
+        ]
+        _bulk_create_with_timestamps(Order, batch, "order_date", [order_date for _, order_date in rows])
+        Through.objects.bulk_create([
+            Through(order_id=order.pk, product_id=pid)
+            for order, pick in zip(batch, picks)
+            for pid in pick
+        ])
+        summary.record_orders(batch)
+        created += size
+        if progress:
+            progress("orders", created, orders)
+
+    response_cache.invalidate(Customer, Product, Order)
+    return {"customers": len(customer_ids), "products": len(product_ids), "orders": created}
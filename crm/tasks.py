@@ -1,9 +1,9 @@
 import datetime
-from datetime import datetime
 import logging
-import requests
 from celery import shared_task
 
+from crm.graphql_client import execute
+
 LOG_FILE = "/tmp/crm_report_log.txt"
 logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(message)s")
 
@@ -21,14 +21,10 @@ def generate_crm_report():
     """
 
     try:
-        response = requests.post(
-            "http://localhost:8000/graphql",
-            json={"query": query},
-            timeout=10
-        )
-
-        if response.status_code == 200:
-            data = response.json().get("data", {})
+        result = execute(query)
+
+        if not result.get("errors"):
+            data = result.get("data") or {}
             total_customers = data.get("totalCustomers", 0)
             total_orders = data.get("totalOrders", 0)
             total_revenue = data.get("totalRevenue", 0)
@@ -38,7 +34,7 @@ def generate_crm_report():
                 f"{total_orders} orders, {total_revenue} revenue"
             )
         else:
-            log_message = f"{timestamp} - Error: GraphQL returned {response.status_code}"
+            log_message = f"{timestamp} - Error: {result['errors'][0]['message']}"
 
     except Exception as e:
         log_message = f"{timestamp} - Error generating report: {e}"
@@ -47,3 +43,46 @@ def generate_crm_report():
         f.write(log_message + "\n")
 
     print(log_message)
+
+
+@shared_task
+def compact_crm_summary():
+    """Fold the summary delta rows appended by writers into the totals and daily buckets."""
+    from crm import summary
+
+    return summary.compact()
+
+
+@shared_task
+def reconcile_crm_summary():
+    """Rebuild the CRM summary from the source tables if it drifted (e.g. raw SQL writes)."""
+    from crm import summary
+
+    drift = summary.reconcile()
+    if drift:
+        summary.rebuild()
+    return {field: [str(stored), str(actual)] for field, (stored, actual) in drift.items()}
+
+
+@shared_task
+def send_order_reminder_batch(order_ids):
+    """Claim and send the reminders of one batch of order ids; safe to run twice."""
+    from crm import reminders
+
+    sent, failed = reminders.send_batch(order_ids)
+    return {"sent": sent, "failed": failed}
+
+
+@shared_task
+def queue_order_reminders(batch_size=None, window_days=None):
+    """Fan the due reminders out as one send_order_reminder_batch task per keyset page."""
+    from celery import group
+
+    from crm import reminders
+
+    batches = list(reminders.due_batches(
+        batch_size or reminders.REMINDER_BATCH_SIZE, window_days or reminders.REMINDER_WINDOW_DAYS
+    ))
+    if batches:
+        group(send_order_reminder_batch.s(ids) for ids in batches).apply_async()
+    return {"batches": len(batches), "orders": sum(len(ids) for ids in batches)}
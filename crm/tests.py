@@ -1,3 +1,1210 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql_relay import from_global_id, to_global_id
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ReadTimeoutError
+
+from alx_backend_graphql.schema import schema
+
+from . import (
+    broadcast, cleanup, exporters, graphql_client, persisted, reminders, response_cache, routers, search,
+    sqlite, summary, synthetic,
+)
+from .importers import import_customers
+from .loaders import DataLoader
+from .models import CRMSummary, Customer, Order, PersistedQuery, Product, SummaryDelta
+from .services import OrderError, create_order, recompute_order_totals, restock_low_stock
+from .websocket import websocket_application
+
+
+def execute(query, variables=None):
+    """Run ``query`` against the schema with a fresh request as context."""
+    return schema.execute(query, variable_values=variables, context_value=RequestFactory().post("/graphql"))
+
+
+def make_orders(count, products_per_order=2):
+    """``count`` orders spread over a few customers, each with ``products_per_order`` products."""
+    customers = [
+        Customer.objects.create(name=f"Customer {i}", email=f"c{i}@example.com", phone="555-000-0000")
+        for i in range(3)
+    ]
+    products = [Product.objects.create(name=f"Product {i}", price=i + 1, stock=100) for i in range(4)]
+    orders = []
+    for i in range(count):
+        order = Order.objects.create(customer=customers[i % len(customers)])
+        order.products.set(products[i % 2:i % 2 + products_per_order])
+        orders.append(order)
+    return orders
+
+
+def count_queries(func):
+    with CaptureQueriesContext(connection) as queries:
+        result = func()
+    return result, len(queries.captured_queries)
+
+
+# -------------------------------
+# BulkCreateCustomers
+# -------------------------------
+BULK_CREATE = """
+mutation($input: [CustomerInput]!) {
+  bulkCreateCustomers(input: $input) { customers { email } errors }
+}
+"""
+
+
+class BulkCreateCustomersTests(TestCase):
+    def test_creates_valid_rows_and_reports_errors_in_input_order(self):
+        Customer.objects.create(name="Taken", email="taken@example.com", phone="555-000-0000")
+        result = execute(BULK_CREATE, {"input": [
+            {"name": "A", "email": "a@example.com", "phone": "555-111-1111"},
+            {"name": "B", "email": "b@example.com"},
+            {"name": "C", "email": "taken@example.com", "phone": "555-222-2222"},
+            {"name": "D", "email": "d@example.com", "phone": "not a phone"},
+            {"name": "E", "email": "e@example.com", "phone": "+15553334444"},
+        ]})
+        self.assertIsNone(result.errors)
+        data = result.data["bulkCreateCustomers"]
+        self.assertEqual([c["email"] for c in data["customers"]], ["a@example.com", "e@example.com"])
+        errors = data["errors"]
+        self.assertEqual(len(errors), 3)
+        self.assertIn("NOT NULL", errors[0])
+        self.assertEqual(errors[1], "Email taken@example.com already exists")
+        self.assertIn("not a phone", errors[2])
+        self.assertFalse(Customer.objects.filter(email="b@example.com").exists())
+
+    def test_duplicate_emails_within_input(self):
+        result = execute(BULK_CREATE, {"input": [
+            {"name": "A", "email": "dup@example.com", "phone": "555-111-1111"},
+            {"name": "B", "email": "dup@example.com", "phone": "555-111-1112"},
+        ]})
+        data = result.data["bulkCreateCustomers"]
+        self.assertEqual(len(data["customers"]), 1)
+        self.assertEqual(data["errors"], ["Email dup@example.com already exists"])
+
+
+# -------------------------------
+# DataLoaders
+# -------------------------------
+ORDERS_WITH_RELATIONS = """
+query($first: Int) {
+  allOrders(first: $first) {
+    edges { node { totalAmount customer { name } products { edges { node { name } } } } }
+  }
+}
+"""
+
+
+class DataLoaderTests(TestCase):
+    def test_order_relations_cost_the_same_for_any_page_size(self):
+        make_orders(12)
+        small, small_queries = count_queries(lambda: execute(ORDERS_WITH_RELATIONS, {"first": 2}))
+        large, large_queries = count_queries(lambda: execute(ORDERS_WITH_RELATIONS, {"first": 12}))
+        self.assertIsNone(small.errors)
+        self.assertIsNone(large.errors)
+        self.assertEqual(len(large.data["allOrders"]["edges"]), 12)
+        self.assertEqual(small_queries, large_queries)
+        self.assertLessEqual(large_queries, 3)
+
+    def test_loader_batches_queued_keys_into_one_call(self):
+        calls = []
+
+        def batch_load(keys):
+            calls.append(list(keys))
+            return [key * 10 for key in keys]
+
+        loader = DataLoader(batch_load)
+        loader.prime([1, 2, 3])
+        self.assertEqual(loader.load(2), 20)
+        self.assertEqual(loader.load_many([1, 3]), [10, 30])
+        self.assertEqual(calls, [[1, 2, 3]])
+
+    def test_node_lookup_goes_through_the_loaders(self):
+        customer = Customer.objects.create(name="Ada", email="ada@example.com", phone="555-000-0000")
+        node_id = to_global_id("CustomerNode", customer.pk)
+        result = execute("query($id: ID!) { node(id: $id) { ... on CustomerNode { name } } }", {"id": node_id})
+        self.assertEqual(result.data["node"]["name"], "Ada")
+
+
+# -------------------------------
+# Queryset optimizer
+# -------------------------------
+class QuerysetOptimizerTests(TestCase):
+    def test_only_selected_columns_are_read(self):
+        Customer.objects.create(name="Ada", email="ada@example.com", phone="555-000-0000")
+        with CaptureQueriesContext(connection) as queries:
+            result = execute("{ allCustomers(first: 5) { edges { node { name } } } }")
+        self.assertEqual(result.data["allCustomers"]["edges"][0]["node"]["name"], "Ada")
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertIn('"crm_customer"."name"', sql)
+        self.assertNotIn('"crm_customer"."email"', sql)
+
+
+# -------------------------------
+# Customer import
+# -------------------------------
+class ImportCustomersTests(TestCase):
+    def test_csv_import_in_batches_reports_bad_lines(self):
+        Customer.objects.create(name="Taken", email="taken@example.com", phone="555-000-0000")
+        lines = [
+            b"name,email,phone\n",
+            b"Ada,ada@example.com,555-111-1111\n",
+            b"Bad,not-an-email,555-111-1111\n",
+            b"Dup,taken@example.com,\n",
+            b"Bob,bob@example.com,\n",
+            b"Cy,cy@example.com,555-222-3333\n",
+        ]
+        batches = []
+        result = import_customers(lines, "csv", batch_size=2, progress=lambda r: batches.append(r.created))
+        self.assertEqual(result.processed, 5)
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.failed, 2)
+        self.assertTrue(result.errors[0].startswith("Line 3: email"))
+        self.assertEqual(result.errors[1], "Line 4: Email taken@example.com already exists")
+        self.assertEqual(len(batches), 2)
+        self.assertTrue(Customer.objects.filter(email="bob@example.com", phone="").exists())
+
+    def test_endpoint_requires_staff_or_token(self):
+        body = b'{"name": "Ada", "email": "ada@example.com"}\n'
+        response = self.client.post("/import/customers?format=ndjson", body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 403)
+        self.client.force_login(User.objects.create_user("user"))
+        response = self.client.post("/import/customers?format=ndjson", body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Customer.objects.exists())
+        with self.settings(CRM_IMPORT_TOKEN="secret"):
+            response = Client().post(
+                "/import/customers?format=ndjson", body, content_type="application/x-ndjson",
+                headers={"Authorization": "Bearer secret"},
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_staff_sessions_need_a_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(User.objects.create_user("staff", is_staff=True))
+        response = client.post("/import/customers?format=ndjson", b"", content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 403)
+
+    def test_endpoint_streams_an_ndjson_body(self):
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        body = b'{"name": "Ada", "email": "ada@example.com"}\nnot json\n'
+        response = self.client.post("/import/customers?format=ndjson", body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["created"], data["failed"]), (1, 1))
+        self.assertTrue(data["errors"][0].startswith("Line 2: Invalid JSON"))
+
+    def test_endpoint_rejects_an_unknown_format(self):
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        response = self.client.post("/import/customers", b"x", content_type="text/plain")
+        self.assertEqual(response.status_code, 400)
+
+
+# -------------------------------
+# Restock
+# -------------------------------
+class RestockTests(TestCase):
+    def setUp(self):
+        self.low = [Product.objects.create(name=f"Low {i}", price=1, stock=i) for i in range(5)]
+        self.full = Product.objects.create(name="Full", price=1, stock=50)
+
+    def test_restocks_only_low_stock_products(self):
+        updated = restock_low_stock(threshold=3, increment=10)
+        self.assertEqual(sorted(p.stock for p in updated), [10, 11, 12])
+        self.assertEqual(
+            sorted(Product.objects.values_list("stock", flat=True)), [3, 4, 10, 11, 12, 50]
+        )
+
+    def test_chunked_restock_matches_a_single_update(self):
+        updated = restock_low_stock(threshold=10, increment=5, chunk_size=2)
+        self.assertEqual([p.pk for p in updated], [p.pk for p in self.low])
+        self.assertEqual([p.stock for p in updated], [5, 6, 7, 8, 9])
+
+    def test_mutation_reports_updated_products(self):
+        result = execute("mutation { updateLowStockProducts(threshold: 2) { success updatedProducts { stock } } }")
+        data = result.data["updateLowStockProducts"]
+        self.assertEqual(data["success"], "2 products restocked successfully.")
+        self.assertEqual(sorted(p["stock"] for p in data["updatedProducts"]), [10, 11])
+
+    def test_nothing_to_restock(self):
+        _, queries = count_queries(lambda: restock_low_stock(threshold=0))
+        self.assertLessEqual(queries, 2)
+
+
+# -------------------------------
+# Orders
+# -------------------------------
+class CreateOrderTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Ada", email="ada@example.com", phone="555-000-0000")
+        self.products = [Product.objects.create(name=f"P{i}", price=i + 1, stock=1) for i in range(3)]
+
+    def test_reserves_stock_and_sets_total(self):
+        ids = [p.pk for p in self.products]
+        order, queries = count_queries(lambda: create_order(self.customer.pk, ids + ids[:1]))
+        self.assertEqual(order.total_amount, 6)
+        self.assertEqual(sorted(order.products.values_list("pk", flat=True)), ids)
+        self.assertEqual(list(Product.objects.values_list("stock", flat=True)), [0, 0, 0])
+        # Customer, locked products, stock UPDATE, order INSERT, summary, M2M INSERT: not one per product
+        self.assertLessEqual(queries, 12)
+
+    def test_out_of_stock_rolls_back(self):
+        self.products[1].stock = 0
+        self.products[1].save()
+        with self.assertRaisesMessage(OrderError, "Product P1 is out of stock"):
+            create_order(self.customer.pk, [self.products[0].pk, self.products[1].pk])
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 1)
+        self.assertFalse(Order.objects.exists())
+
+    def test_invalid_ids(self):
+        with self.assertRaisesMessage(OrderError, "Invalid customer ID"):
+            create_order(0, [self.products[0].pk])
+        with self.assertRaisesMessage(OrderError, "Invalid product ID: x"):
+            create_order(self.customer.pk, ["x"])
+        with self.assertRaisesMessage(OrderError, "At least one product must be selected"):
+            create_order(self.customer.pk, [])
+
+    def test_mutation_surfaces_order_errors(self):
+        result = execute(
+            "mutation($c: ID!, $p: [ID]!) { createOrder(customerId: $c, productIds: $p) { order { totalAmount } } }",
+            {"c": self.customer.pk, "p": [999]},
+        )
+        self.assertEqual(result.errors[0].message, "Invalid product ID: 999")
+
+
+# -------------------------------
+# Order.total_amount maintenance
+# -------------------------------
+class OrderTotalTests(TestCase):
+    def setUp(self):
+        customer = Customer.objects.create(name="Ada", email="ada@example.com", phone="555-000-0000")
+        self.a = Product.objects.create(name="A", price="1.50", stock=1)
+        self.b = Product.objects.create(name="B", price="2.25", stock=1)
+        self.order = Order.objects.create(customer=customer)
+
+    def total(self):
+        return Order.objects.get(pk=self.order.pk).total_amount
+
+    def test_add_remove_clear(self):
+        self.order.products.add(self.a, self.b)
+        self.assertEqual(self.total(), Decimal("3.75"))
+        self.order.products.remove(self.a)
+        self.assertEqual(self.total(), Decimal("2.25"))
+        # Removing a product that is not on the order changes nothing
+        self.order.products.remove(self.a)
+        self.assertEqual(self.total(), Decimal("2.25"))
+        self.order.products.clear()
+        self.assertEqual(self.total(), 0)
+
+    def test_reverse_side_updates_every_order(self):
+        self.b.order_set.add(self.order)
+        self.assertEqual(self.total(), Decimal("2.25"))
+        self.b.order_set.clear()
+        self.assertEqual(self.total(), 0)
+
+    def test_saving_an_order_does_not_read_its_products(self):
+        self.order.products.add(self.a)
+        with CaptureQueriesContext(connection) as queries:
+            self.order.status = Order.Status.PAID
+            self.order.save()
+        self.assertFalse(any("crm_order_products" in q["sql"] for q in queries.captured_queries))
+
+    def test_recompute_matches_products(self):
+        self.order.products.add(self.a, self.b)
+        Order.objects.update(total_amount=0)
+        self.assertEqual(recompute_order_totals(batch_size=1), 1)
+        self.assertEqual(self.total(), Decimal("3.75"))
+
+
+# -------------------------------
+# Filter indexes
+# -------------------------------
+class FilterIndexTests(TestCase):
+    def test_filter_indexes_exist(self):
+        with connection.cursor() as cursor:
+            indexes = set()
+            for model in (Customer, Product, Order):
+                indexes.update(connection.introspection.get_constraints(cursor, model._meta.db_table))
+        for model in (Customer, Product, Order):
+            for index in model._meta.indexes:
+                self.assertIn(index.name, indexes)
+
+    def test_range_filters(self):
+        make_orders(6)
+        Product.objects.filter(name="Product 0").update(stock=3)
+        result = execute("""{
+          allProducts(first: 10, priceGte: 2, stockGte: 50) { edges { node { name } } }
+          allOrders(first: 10, totalAmountGte: 4) { edges { node { totalAmount } } }
+          allCustomers(first: 10, phonePattern: "555") { edges { node { name } } }
+        }""")
+        self.assertIsNone(result.errors)
+        self.assertEqual(
+            [e["node"]["name"] for e in result.data["allProducts"]["edges"]],
+            ["Product 1", "Product 2", "Product 3"],
+        )
+        self.assertEqual(len(result.data["allOrders"]["edges"]), 3)
+        self.assertEqual(len(result.data["allCustomers"]["edges"]), 3)
+
+
+# -------------------------------
+# Search index
+# -------------------------------
+def customer_names(term):
+    result = execute("query($q: String) { allCustomers(first: 20, nameIcontains: $q) { edges { node { name } } } }",
+                     {"q": term})
+    return sorted(edge["node"]["name"] for edge in result.data["allCustomers"]["edges"])
+
+
+class SearchIndexTests(TestCase):
+    def test_fts5_backend_is_in_use(self):
+        if not search.fts_available():
+            self.skipTest("SQLite without trigram FTS5")
+        self.assertEqual(search.search_backend(), "fts5")
+
+    def test_index_follows_saves_bulk_writes_updates_and_deletes(self):
+        ada = Customer.objects.create(name="Ada Lovelace", email="ada@example.com", phone="555-000-0000")
+        Customer.objects.bulk_create([Customer(name="Grace Hopper", email="grace@example.com", phone="")])
+        self.assertEqual(customer_names("love"), ["Ada Lovelace"])
+        self.assertEqual(customer_names("HOPP"), ["Grace Hopper"])
+
+        Customer.objects.filter(pk=ada.pk).update(name="Ada King")
+        self.assertEqual(customer_names("love"), [])
+        self.assertEqual(customer_names("king"), ["Ada King"])
+
+        Customer.objects.filter(name="Grace Hopper").delete()
+        self.assertEqual(customer_names("hopper"), [])
+
+    def test_short_terms_fall_back_to_like(self):
+        Customer.objects.create(name="Bo", email="bo@example.com", phone="")
+        self.assertEqual(customer_names("bo"), ["Bo"])
+
+    def test_order_filters_by_customer_and_product_name(self):
+        make_orders(3)
+        result = execute("""{
+          byCustomer: allOrders(first: 10, customerName: "tomer 1") { edges { node { id } } }
+          byProduct: allOrders(first: 10, productName: "duct 3") { edges { node { id } } }
+        }""")
+        self.assertEqual(len(result.data["byCustomer"]["edges"]), 1)
+        self.assertEqual(len(result.data["byProduct"]["edges"]), 0)
+
+
+# -------------------------------
+# Keyset pagination
+# -------------------------------
+PAGE = """
+query($first: Int, $last: Int, $after: String, $before: String) {
+  allOrders(first: $first, last: $last, after: $after, before: $before) {
+    edges { cursor node { id } }
+    pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+  }
+}
+"""
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        orders = make_orders(7)
+        # Equal timestamps: the id tie-breaker must keep pages disjoint
+        Order.objects.filter(pk__in=[o.pk for o in orders[2:5]]).update(order_date=orders[2].order_date)
+        self.ids = [
+            str(pk) for pk in Order.objects.order_by("order_date", "id").values_list("pk", flat=True)
+        ]
+
+    def page(self, **variables):
+        result = execute(PAGE, variables)
+        self.assertIsNone(result.errors)
+        connection = result.data["allOrders"]
+        return [from_global_id(e["node"]["id"])[1] for e in connection["edges"]], connection["pageInfo"]
+
+    def test_forward_pages_cover_every_row_once(self):
+        seen, after = [], None
+        while True:
+            ids, info = self.page(first=3, after=after)
+            seen.extend(ids)
+            if not info["hasNextPage"]:
+                break
+            after = info["endCursor"]
+        self.assertEqual(seen, self.ids)
+
+    def test_backward_pages(self):
+        ids, info = self.page(last=3)
+        self.assertEqual(ids, self.ids[-3:])
+        self.assertTrue(info["hasPreviousPage"])
+        ids, info = self.page(last=3, before=info["startCursor"])
+        self.assertEqual(ids, self.ids[-6:-3])
+        self.assertTrue(info["hasNextPage"])
+
+    def test_no_count_query(self):
+        _, queries = count_queries(lambda: self.page(first=2))
+        self.assertLessEqual(queries, 1)
+
+    def test_invalid_cursor(self):
+        result = execute(PAGE, {"first": 2, "after": "bm90IGEgY3Vyc29y"})
+        self.assertEqual(result.errors[0].message, "Invalid cursor: bm90IGEgY3Vyc29y")
+
+
+# -------------------------------
+# CRM summary
+# -------------------------------
+TOTALS = "{ totalCustomers totalOrders totalRevenue }"
+
+
+class SummaryTests(TestCase):
+    def totals(self):
+        data = execute(TOTALS).data
+        return data["totalCustomers"], data["totalOrders"], Decimal(data["totalRevenue"])
+
+    def test_writes_append_deltas_instead_of_updating_the_summary_row(self):
+        summary.rebuild()
+        with CaptureQueriesContext(connection) as queries:
+            make_orders(4)
+        self.assertFalse(any(
+            q["sql"].startswith("UPDATE") and "crm_crmsummary" in q["sql"] for q in queries.captured_queries
+        ))
+        self.assertEqual(self.totals(), (3, 4, Decimal("16")))
+
+    def test_compaction_keeps_totals_and_daily_buckets(self):
+        make_orders(4)
+        before = self.totals()
+        self.assertGreater(summary.compact(batch_size=3), 0)
+        self.assertFalse(SummaryDelta.objects.exists())
+        self.assertEqual(self.totals(), before)
+        self.assertEqual(summary.reconcile(), {})
+        today = summary.day_of(None)
+        [bucket] = summary.daily(today, today)
+        self.assertEqual((bucket.new_customers, bucket.orders, bucket.revenue), (3, 4, Decimal("16")))
+
+    def test_missing_row_is_rebuilt(self):
+        make_orders(2)
+        CRMSummary.objects.all().delete()
+        summary.compact()
+        self.assertEqual(self.totals(), (3, 2, Decimal("8")))
+        self.assertEqual(summary.reconcile(), {})
+
+    def test_rebuild_keeps_deltas_booked_while_it_counts(self):
+        make_orders(2)
+        actual_totals = summary.actual_totals
+
+        def counted_then_booked():
+            totals = actual_totals()
+            # Booked after the counts were taken, as a concurrent writer would
+            summary.record(summary.day_of(None), revenue=Decimal("7"))
+            return totals
+
+        with mock.patch.object(summary, "actual_totals", counted_then_booked):
+            summary.rebuild()
+        self.assertEqual(SummaryDelta.objects.count(), 1)
+        self.assertEqual(self.totals(), (3, 2, Decimal("15")))
+
+    def test_deletes_are_counted(self):
+        orders = make_orders(2)
+        orders[0].delete()
+        Customer.objects.get(email="c2@example.com").delete()
+        self.assertEqual(self.totals(), (2, 1, Decimal("5")))
+        self.assertEqual(summary.reconcile(), {})
+
+
+# -------------------------------
+# GraphQL client for jobs
+# -------------------------------
+class GraphQLClientTests(TestCase):
+    def test_local_mode_returns_the_http_payload_shape(self):
+        Customer.objects.create(name="Ada", email="ada@example.com", phone="")
+        payload = graphql_client.execute("{ allCustomers(first: 1) { edges { node { name } } } }")
+        self.assertEqual(payload["data"]["allCustomers"]["edges"][0]["node"]["name"], "Ada")
+        payload = graphql_client.execute("{ nope }")
+        self.assertIn("errors", payload)
+
+    def test_posts_are_not_retried_after_they_may_have_run(self):
+        retry = graphql_client.get_session().get_adapter("http://localhost").max_retries
+        self.assertTrue(retry.is_retry("POST", 503))
+        self.assertTrue(retry.is_retry("POST", 502))
+        self.assertFalse(retry.is_retry("POST", 504))
+        with self.assertRaises(MaxRetryError):
+            retry.increment("POST", "/graphql", error=ReadTimeoutError(None, "/graphql", "timed out"))
+        retry = retry.increment("POST", "/graphql", error=NewConnectionError(None, "refused"))
+        self.assertEqual(retry.connect, graphql_client.HTTP_RETRIES - 1)
+
+
+# -------------------------------
+# Persisted queries
+# -------------------------------
+APQ_QUERY = "{ allProducts(first: 1) { edges { node { name } } } }"
+
+
+class PersistedQueryTests(TestCase):
+    def setUp(self):
+        persisted.document_cache.clear()
+        persisted.apq_queries.clear()
+
+    def post(self, query=None, sha256=None):
+        body = {}
+        if query is not None:
+            body["query"] = query
+        if sha256 is not None:
+            body["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": sha256}}
+        return self.client.post("/graphql", body, content_type="application/json").json()
+
+    def test_apq_flow_registers_in_memory_only(self):
+        sha256 = persisted.query_hash(APQ_QUERY)
+        self.assertEqual(self.post(sha256=sha256)["errors"][0]["message"], persisted.NOT_FOUND)
+        self.assertIn("data", self.post(APQ_QUERY, sha256))
+        persisted.document_cache.clear()
+        self.assertIn("allProducts", self.post(sha256=sha256)["data"])
+        self.assertFalse(PersistedQuery.objects.exists())
+
+    def test_rejects_a_hash_that_does_not_match(self):
+        payload = self.post(APQ_QUERY, "0" * 64)
+        self.assertEqual(payload["errors"][0]["message"], "provided sha does not match query")
+
+    def test_apq_registration_is_bounded(self):
+        with self.settings(CRM_APQ_MAX_LENGTH=10):
+            self.post(APQ_QUERY, persisted.query_hash(APQ_QUERY))
+        self.assertEqual(len(persisted.apq_queries), 0)
+        maxsize, persisted.apq_queries.maxsize = persisted.apq_queries.maxsize, 2
+        try:
+            for i in range(5):
+                query = f"query Q{i} {{ allProducts(first: 1) {{ edges {{ node {{ name }} }} }} }}"
+                self.post(query, persisted.query_hash(query))
+        finally:
+            persisted.apq_queries.maxsize = maxsize
+        self.assertEqual(len(persisted.apq_queries), 2)
+
+    def test_allowlist_only_runs_registered_documents(self):
+        with self.settings(CRM_PERSISTED_QUERIES="allowlist"):
+            payload = self.post(APQ_QUERY)
+            self.assertEqual(payload["errors"][0]["message"], persisted.NOT_ALLOWED)
+            persisted.register(APQ_QUERY)
+            self.assertIn("data", self.post(APQ_QUERY))
+
+
+# -------------------------------
+# Response cache
+# -------------------------------
+SHARED_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "responses"},
+}
+
+
+class ResponseCacheTests(TestCase):
+    def query(self):
+        return self.client.post(
+            "/graphql", {"query": "{ allProducts(first: 5) { edges { node { name stock } } } }"},
+            content_type="application/json",
+        ).json()
+
+    def test_off_by_default(self):
+        self.assertFalse(response_cache.enabled())
+        self.assertEqual(response_cache.check_shared_backend(None), [])
+        with self.captureOnCommitCallbacks() as callbacks:
+            response_cache.invalidate(Product)
+        self.assertEqual(callbacks, [])
+
+    def test_process_local_backend_fails_the_check(self):
+        with self.settings(CACHES=SHARED_CACHE, CRM_RESPONSE_CACHE_ALIAS="responses"):
+            self.assertEqual([e.id for e in response_cache.check_shared_backend(None)], ["crm.E002"])
+        with self.settings(CRM_RESPONSE_CACHE_ALIAS="missing"):
+            self.assertEqual([e.id for e in response_cache.check_shared_backend(None)], ["crm.E001"])
+
+    def test_writes_invalidate_cached_responses(self):
+        # LocMemCache stands in for the shared backend within this one process
+        product = Product.objects.create(name="Widget", price=1, stock=5)
+        with self.settings(CACHES=SHARED_CACHE, CRM_RESPONSE_CACHE_ALIAS="responses"):
+            self.query()
+            self.assertEqual(self.query()["data"]["allProducts"]["edges"][0]["node"]["stock"], 5)
+            self.assertEqual(response_cache.stats()["hits"], 1)
+            with self.captureOnCommitCallbacks(execute=True):
+                product.stock = 7
+                product.save()
+            self.assertEqual(self.query()["data"]["allProducts"]["edges"][0]["node"]["stock"], 7)
+            self.assertEqual(response_cache.stats()["misses"], 2)
+
+
+# -------------------------------
+# Async GraphQL view
+# -------------------------------
+class AsyncGraphQLViewTests(TransactionTestCase):
+    # Root fields run on pool threads with their own connections, which only see committed rows
+
+    async def post(self, body):
+        response = await self.async_client.post("/graphql/async", body, content_type="application/json")
+        return response.json()
+
+    def test_root_fields_resolve_concurrently(self):
+        make_orders(4)
+        payload = async_to_sync(self.post)({
+            "query": "{ totalOrders allProducts(first: 2) { edges { node { name } } } }"
+        })
+        self.assertEqual(payload["data"]["totalOrders"], 4)
+        self.assertEqual(len(payload["data"]["allProducts"]["edges"]), 2)
+
+    def test_mutations_and_errors(self):
+        payload = async_to_sync(self.post)({
+            "query": 'mutation { createCustomer(name: "Ada", email: "ada@example.com", phone: "555-123-4567") '
+                     "{ customer { name } } }"
+        })
+        self.assertEqual(payload["data"]["createCustomer"]["customer"]["name"], "Ada")
+        self.assertTrue(Customer.objects.filter(email="ada@example.com").exists())
+        self.assertIn("errors", async_to_sync(self.post)({"query": "{ nope }"}))
+
+
+# -------------------------------
+# Query cost
+# -------------------------------
+class QueryCostTests(TestCase):
+    def post(self, query, variables=None):
+        return self.client.post(
+            "/graphql", {"query": query, "variables": variables or {}}, content_type="application/json"
+        ).json()
+
+    def test_cost_is_returned_in_extensions(self):
+        payload = self.post("{ allProducts(first: 10) { edges { node { name } } } }")
+        self.assertEqual(payload["extensions"]["cost"]["requestedQueryCost"], 11)
+        self.assertEqual(payload["extensions"]["cost"]["depth"], 2)
+
+    def test_rejects_oversized_pages_before_execution(self):
+        query = "query($n: Int) { allOrders(first: $n) { edges { node { id } } } }"
+        payload, queries = count_queries(lambda: self.post(query, {"n": 100000}))
+        self.assertIsNone(payload.get("data"))
+        self.assertIn("maximum page size", payload["errors"][0]["message"])
+        self.assertEqual(queries, 0)
+
+    def test_rejects_over_budget_and_too_deep_queries(self):
+        payload = self.post(
+            "{ allOrders(first: 100) { edges { node { customer { name } "
+            "products { edges { node { name } } } } } } }"
+        )
+        self.assertIn("exceeds the maximum cost", payload["errors"][0]["message"])
+        with self.settings(CRM_QUERY_MAX_DEPTH=1):
+            payload = self.post("{ allOrders(first: 1) { edges { node { customer { name } } } } }")
+        self.assertIn("exceeds the maximum depth", payload["errors"][0]["message"])
+
+
+# -------------------------------
+# Instrumentation
+# -------------------------------
+class InstrumentationTests(TestCase):
+    def post(self, debug=True):
+        headers = {"X-CRM-Debug": "1"} if debug else {}
+        return self.client.post(
+            "/graphql", {"query": "{ allProducts(first: 2) { edges { node { name } } } }"},
+            content_type="application/json", headers=headers,
+        ).json()
+
+    def test_debug_header_needs_staff_or_debug(self):
+        make_orders(1)
+        self.assertNotIn("metrics", self.post()["extensions"])
+        with self.settings(DEBUG=True):
+            self.assertIn("metrics", self.post()["extensions"])
+        staff = User.objects.create_user("staff", is_staff=True)
+        self.client.force_login(staff)
+        metrics = self.post()["extensions"]["metrics"]
+        self.assertTrue(metrics)
+        self.assertNotIn("metrics", self.post(debug=False)["extensions"])
+
+    def test_metrics_endpoint_exports_prometheus_text(self):
+        with self.settings(CRM_METRICS_SAMPLE_RATE=1):
+            self.post(debug=False)
+        response = self.client.get("/metrics")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        self.assertIn(b"crm_graphql_resolver", response.content)
+
+
+# -------------------------------
+# Synthetic data and benchmark
+# -------------------------------
+class SyntheticDataTests(TestCase):
+    def snapshot(self):
+        return (
+            list(Customer.objects.order_by("email").values_list("name", "email", "phone", "created_at")),
+            list(Product.objects.order_by("name").values_list("name", "price", "stock")),
+            sorted(Order.objects.values_list("customer__email", "total_amount", "order_date")),
+        )
+
+    @mock.patch("crm.synthetic.timezone.now", return_value=timezone.now() - timedelta(days=1))
+    def test_generate_is_deterministic_and_keeps_the_summary(self, now):
+        counts = synthetic.generate(customers=20, products=5, orders=30, products_per_order=2, seed=7)
+        self.assertEqual(counts, {"customers": 20, "products": 5, "orders": 30})
+        self.assertEqual(Order.products.through.objects.count(), 60)
+        self.assertEqual(summary.reconcile(), {})
+        # The generated timestamps are stored, not the auto_now_add ones
+        self.assertFalse(Customer.objects.filter(created_at__gt=now.return_value).exists())
+        self.assertFalse(Order.objects.filter(order_date__gt=now.return_value).exists())
+        first = self.snapshot()
+        with self.assertRaises(ValueError):
+            synthetic.generate(customers=1, products=1, orders=0, seed=7)
+
+        Order.objects.all().delete()
+        Customer.objects.all().delete()
+        Product.objects.all().delete()
+        synthetic.generate(customers=20, products=5, orders=30, products_per_order=2, seed=7)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_benchmark_reports_json_and_rolls_back_mutations(self):
+        synthetic.generate(customers=10, products=5, orders=10, seed=1)
+        out = StringIO()
+        call_command("benchmark_graphql", repeat=2, warmup=0, bulk_size=3, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["dataset"], {"customers": 10, "products": 5, "orders": 10})
+        self.assertEqual(set(report["results"]), {
+            "allOrders filtered", "allProducts by price range", "createOrder",
+            "bulkCreateCustomers", "updateLowStockProducts",
+        })
+        for result in report["results"].values():
+            self.assertEqual(result["runs"], 2)
+            self.assertLessEqual(result["p50_ms"], result["max_ms"])
+        self.assertEqual((Customer.objects.count(), Order.objects.count()), (10, 10))
+
+
+# -------------------------------
+# Order export
+# -------------------------------
+class ExportOrdersTests(TestCase):
+    def setUp(self):
+        make_orders(3)
+        self.staff = User.objects.create_user("staff", is_staff=True)
+
+    def test_requires_staff_or_token(self):
+        self.assertEqual(self.client.get("/export/orders").status_code, 403)
+        self.client.force_login(User.objects.create_user("user"))
+        self.assertEqual(self.client.get("/export/orders").status_code, 403)
+        with self.settings(CRM_EXPORT_TOKEN="secret"):
+            headers = {"Authorization": "Bearer wrong"}
+            self.assertEqual(self.client.get("/export/orders", headers=headers).status_code, 403)
+            headers = {"Authorization": "Bearer secret"}
+            self.assertEqual(self.client.get("/export/orders", headers=headers).status_code, 200)
+
+    def test_streams_csv_and_ndjson(self):
+        self.client.force_login(self.staff)
+        response = self.client.get("/export/orders")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(exporters.CSV_COLUMNS))
+        self.assertEqual(len(lines), 4)
+        response = self.client.get("/export/orders", {"format": "ndjson", "total_amount_gte": "4"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["total_amount"] for row in rows], ["5.00"])
+        self.assertEqual(self.client.get("/export/orders", {"format": "xml"}).status_code, 400)
+
+    def test_asgi_gets_an_async_iterator(self):
+        async def get():
+            await self.async_client.aforce_login(self.staff)
+            response = await self.async_client.get("/export/orders", {"format": "ndjson"})
+            return response, b"".join([chunk async for chunk in response])
+
+        response, body = async_to_sync(get)()
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(body.splitlines()), 3)
+
+    def test_aiter_lines_pulls_in_batches_and_closes(self):
+        closed = []
+
+        def lines():
+            try:
+                yield from (f"{i}\n" for i in range(5))
+            finally:
+                closed.append(True)
+
+        async def collect():
+            return [chunk async for chunk in exporters.aiter_lines(lines(), lines_per_pull=2)]
+
+        self.assertEqual(async_to_sync(collect)(), ["0\n1\n", "2\n3\n", "4\n"])
+        self.assertEqual(closed, [True])
+
+
+# -------------------------------
+# Order reminders
+# -------------------------------
+class RecordingSender:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.sent = []
+
+    def send(self, reminders):
+        self.sent.extend(r["order_id"] for r in reminders)
+        return [r["order_id"] for r in reminders if r["order_id"] in self.fail]
+
+
+class ReminderTests(TestCase):
+    def test_claim_is_one_update_and_idempotent(self):
+        ids = [order.pk for order in make_orders(5)]
+        Order.objects.filter(pk=ids[0]).update(status=Order.Status.PAID)
+        with CaptureQueriesContext(connection) as queries:
+            claimed = reminders.claim(ids)
+        self.assertEqual(claimed, ids[1:])
+        self.assertEqual(sum(q["sql"].startswith("UPDATE") for q in queries.captured_queries), 1)
+        self.assertEqual(reminders.claim(ids), [])
+
+    def test_failed_reminders_are_retried_by_the_next_run(self):
+        ids = [order.pk for order in make_orders(4)]
+        sender = RecordingSender(fail=ids[:1])
+        self.assertEqual(reminders.send_due_reminders(batch_size=3, sender=sender),
+                         {"sent": 3, "failed": 1, "batches": 2})
+        sender = RecordingSender()
+        self.assertEqual(reminders.send_due_reminders(sender=sender)["sent"], 1)
+        self.assertEqual(sender.sent, ids[:1])
+        self.assertEqual(reminders.send_due_reminders(sender=sender)["sent"], 0)
+
+    def test_migration_marks_existing_orders_reminded(self):
+        make_orders(3)
+        backfill = import_module("crm.migrations.0009_backfill_order_reminders")
+        backfill.mark_existing_orders_reminded(django_apps, SimpleNamespace(connection=connection))
+        self.assertFalse(reminders.due_orders().exists())
+
+
+# -------------------------------
+# Inactive-customer cleanup
+# -------------------------------
+class CleanupTests(TestCase):
+    def setUp(self):
+        old = timezone.now() - timedelta(days=400)
+        self.inactive = [
+            Customer.objects.create(name=f"Old {i}", email=f"old{i}@example.com", phone="") for i in range(5)
+        ]
+        Customer.objects.filter(pk__in=[c.pk for c in self.inactive]).update(created_at=old)
+        self.buyer = Customer.objects.create(name="Buyer", email="buyer@example.com", phone="")
+        Customer.objects.filter(pk=self.buyer.pk).update(created_at=old)
+        Order.objects.create(customer=self.buyer)
+        Customer.objects.create(name="New", email="new@example.com", phone="")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, "cleanup.checkpoint")
+
+    def test_deletes_inactive_customers_in_chunks(self):
+        result = cleanup.clean_inactive_customers(chunk_size=2, checkpoint=self.checkpoint)
+        self.assertEqual((result.candidates, result.deleted, result.chunks), (5, 5, 3))
+        self.assertEqual(set(Customer.objects.values_list("name", flat=True)), {"Buyer", "New"})
+        self.assertFalse(os.path.exists(self.checkpoint))
+        self.assertEqual(summary.reconcile(), {})
+
+    def test_keeps_a_customer_who_ordered_since_the_chunk_was_read(self):
+        Order.objects.create(customer=self.inactive[0])
+        self.assertEqual(cleanup.delete_chunk(self.inactive[:2], timezone.now()), 1)
+        self.assertTrue(Customer.objects.filter(pk=self.inactive[0].pk).exists())
+
+    def test_resumes_from_the_checkpoint(self):
+        cutoff = timezone.now() - timedelta(days=365)
+        cleanup.write_checkpoint(self.checkpoint, cutoff, self.inactive[2].pk)
+        result = cleanup.clean_inactive_customers(checkpoint=self.checkpoint)
+        self.assertEqual((result.resumed_from, result.deleted), (self.inactive[2].pk, 2))
+        self.assertEqual(Customer.objects.filter(name__startswith="Old").count(), 3)
+
+    def test_dry_run_ignores_the_checkpoint(self):
+        cutoff = timezone.now() - timedelta(days=365)
+        cleanup.write_checkpoint(self.checkpoint, cutoff, self.inactive[2].pk)
+        result = cleanup.clean_inactive_customers(chunk_size=2, dry_run=True, checkpoint=self.checkpoint)
+        self.assertEqual((result.resumed_from, result.candidates, result.deleted), (0, 5, 0))
+        self.assertEqual(cleanup.read_checkpoint(self.checkpoint), (cutoff, self.inactive[2].pk))
+        self.assertEqual(Customer.objects.count(), 7)
+
+
+# -------------------------------
+# Read-replica routing
+# -------------------------------
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def test_outside_a_request_everything_uses_the_primary(self):
+        with self.settings(CRM_DATABASE_REPLICAS=["r1"]):
+            self.assertIsNone(self.router.db_for_read(Order))
+
+    def test_reads_round_robin_until_a_write_pins_the_request(self):
+        with self.settings(CRM_DATABASE_REPLICAS=["r1", "r2"]):
+            seen = []
+            for _ in range(2):
+                with routers.route_request(read_only=True):
+                    seen.append(self.router.db_for_read(Order))
+                    self.assertEqual(self.router.db_for_read(Customer), seen[-1])
+            self.assertEqual(sorted(seen), ["r1", "r2"])
+
+            with routers.route_request(read_only=True):
+                self.assertEqual(self.router.db_for_write(Order), "default")
+                self.assertIsNone(self.router.db_for_read(Order))
+            with routers.route_request(read_only=True):
+                routers.route_operation(read_only=False)
+                self.assertIsNone(self.router.db_for_read(Order))
+            with routers.route_request(read_only=False):
+                self.assertIsNone(self.router.db_for_read(Order))
+            self.assertIsNone(self.router.db_for_read(User))
+
+    def test_least_loaded_picks_the_replica_with_fewest_requests(self):
+        with self.settings(CRM_DATABASE_REPLICAS=["r1", "r2"], CRM_REPLICA_SELECTION="least_loaded"):
+            with routers.route_request(read_only=True):
+                first = self.router.db_for_read(Order)
+                with routers.route_request(read_only=True):
+                    self.assertNotEqual(self.router.db_for_read(Order), first)
+            self.assertEqual(set(routers.selector.in_flight.values()), {0})
+
+    def test_middleware_routes_safe_methods_only(self):
+        def get_response(request):
+            return HttpResponse(self.router.db_for_read(Order) or "default")
+
+        middleware = routers.replica_routing_middleware(get_response)
+        with self.settings(CRM_DATABASE_REPLICAS=["r1"]):
+            self.assertEqual(middleware(RequestFactory().get("/")).content, b"r1")
+            self.assertEqual(middleware(RequestFactory().post("/")).content, b"default")
+
+    def test_replicas_are_never_migrated(self):
+        with self.settings(CRM_DATABASE_REPLICAS=["r1"]):
+            self.assertFalse(self.router.allow_migrate("r1", "crm"))
+            self.assertIsNone(self.router.allow_migrate("default", "crm"))
+
+
+# -------------------------------
+# SQLite write serialization
+# -------------------------------
+class SerializedWriteTests(TestCase):
+    def test_mutations_run_on_the_request_connection(self):
+        # A separate writer connection could not see this test's transaction
+        product = Product.objects.create(name="Widget", price=1, stock=5)
+        customer = Customer.objects.create(name="Ada", email="ada@example.com", phone="")
+        with self.settings(CRM_SQLITE_WRITER_QUEUE=True):
+            payload = self.client.post("/graphql", {
+                "query": "mutation($c: ID!, $p: [ID]!) { createOrder(customerId: $c, productIds: $p) "
+                         "{ order { totalAmount } } }",
+                "variables": {"c": str(customer.pk), "p": [str(product.pk)]},
+            }, content_type="application/json").json()
+        self.assertEqual(payload["data"]["createOrder"]["order"]["totalAmount"], "1.00")
+
+    def test_writers_take_turns_outside_transactions(self):
+        active, overlaps = [], []
+
+        def write():
+            active.append(1)
+            overlaps.append(len(active))
+            time.sleep(0.01)
+            active.pop()
+
+        def worker():
+            sqlite.run_serialized(write)
+
+        # Each thread has its own connection, outside the test's transaction
+        with self.settings(CRM_SQLITE_WRITER_QUEUE=True):
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(overlaps, [1, 1, 1, 1])
+
+    def test_runs_inline_inside_a_transaction(self):
+        with self.settings(CRM_SQLITE_WRITER_QUEUE=True), sqlite._write_lock:
+            # Holding the lock would block forever if this waited for it
+            self.assertEqual(sqlite.run_serialized(lambda: 42), 42)
+
+
+# -------------------------------
+# Batched operations
+# -------------------------------
+TOTALS_QUERY = "{ totalOrders totalRevenue }"
+STOCK_QUERY = "{ allProducts(first: 1) { edges { node { stock } } } }"
+
+
+class BatchTests(TestCase):
+    def post(self, entries, path="/graphql"):
+        response = self.client.post(path, entries, content_type="application/json")
+        return response.status_code, response.json()
+
+    def test_runs_entries_in_order_on_the_request_connection(self):
+        # TestCase wraps the request in a transaction: the queries must not move to pool threads
+        make_orders(2)
+        product = Product.objects.get(name="Product 0")
+        status, payload = self.post([
+            {"id": "a", "query": TOTALS_QUERY},
+            {"id": "b", "query": "mutation { updateLowStockProducts { updatedProducts { name } } }"},
+            {"id": "c", "query": STOCK_QUERY},
+            {"id": "d", "query": "{ nope }"},
+        ])
+        self.assertEqual(status, 400)
+        self.assertEqual([entry["id"] for entry in payload], ["a", "b", "c", "d"])
+        self.assertEqual(payload[0]["data"]["totalOrders"], 2)
+        self.assertEqual([entry["status"] for entry in payload], [200, 200, 200, 400])
+        product.refresh_from_db()
+        self.assertEqual(payload[2]["data"]["allProducts"]["edges"][0]["node"]["stock"], product.stock)
+
+    def test_rejects_the_batch_when_the_summed_cost_is_over_budget(self):
+        entries = [{"id": str(i), "query": "{ allOrders(first: 100) { edges { node { id } } } }"}
+                   for i in range(3)]
+        with self.settings(CRM_QUERY_MAX_COST=250):
+            status, payload = self.post(entries[:2])
+            self.assertEqual(status, 200)
+            status, payload = self.post(entries)
+        self.assertEqual(status, 400)
+        self.assertTrue(all(
+            entry["errors"][0]["message"] == "Batch cost 303 exceeds the maximum cost of 250."
+            for entry in payload
+        ))
+        for path in ("/graphql", "/graphql/async"):
+            with self.settings(CRM_QUERY_MAX_COST=250):
+                self.assertEqual(self.post(entries, path)[0], 400)
+
+    def test_limits_the_number_of_entries(self):
+        with self.settings(CRM_GRAPHQL_MAX_BATCH_SIZE=2):
+            status, payload = self.post([{"query": TOTALS_QUERY}] * 3)
+        self.assertEqual(status, 400)
+        self.assertIn("at most 2 operations", payload["errors"][0]["message"])
+
+
+class ConcurrentBatchTests(TransactionTestCase):
+    # Batched queries run on pool threads with their own connections, which only see committed rows
+
+    def test_queries_read_the_totals_once_across_threads(self):
+        make_orders(3)
+        get_totals = summary.get_totals
+        calls = []
+
+        def slow_get_totals():
+            calls.append(threading.current_thread().name)
+            time.sleep(0.05)
+            return get_totals()
+
+        entries = [{"id": str(i), "query": TOTALS_QUERY} for i in range(4)]
+        with mock.patch.object(summary, "get_totals", slow_get_totals):
+            response = self.client.post("/graphql", entries, content_type="application/json")
+        self.assertEqual([entry["data"]["totalOrders"] for entry in response.json()], [3, 3, 3, 3])
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(calls[0].startswith("crm-graphql"))
+
+
+# -------------------------------
+# GraphQL subscriptions
+# -------------------------------
+ORDER_SUBSCRIPTION = (
+    "subscription($min: Decimal) { orderCreated(minTotal: $min) { totalAmount customer { name } } }"
+)
+STOCK_SUBSCRIPTION = "subscription($ids: [ID!]) { productStockChanged(productIds: $ids) { name stock } }"
+
+
+async def no_http(scope, receive, send):
+    raise AssertionError("Only WebSocket scopes are expected")
+
+
+class WebSocketConnection:
+    """Drive crm.websocket in-process, the way an ASGI server would."""
+
+    def __init__(self, path="/graphql", subprotocols=("graphql-transport-ws",)):
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        scope = {"type": "websocket", "path": path, "subprotocols": list(subprotocols)}
+        self.task = asyncio.create_task(
+            websocket_application(no_http)(scope, self.incoming.get, self.outgoing.put)
+        )
+        self.incoming.put_nowait({"type": "websocket.connect"})
+
+    def send(self, message):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def receive(self, timeout=2):
+        message = await asyncio.wait_for(self.outgoing.get(), timeout)
+        return json.loads(message["text"]) if message["type"] == "websocket.send" else message
+
+    async def open(self):
+        assert (await self.receive())["type"] == "websocket.accept"
+        self.send({"type": "connection_init"})
+        assert (await self.receive())["type"] == "connection_ack"
+
+    async def close(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect"})
+        await self.task
+
+
+class SubscriptionTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Ada", email="ada@example.com", phone="")
+        self.products = [Product.objects.create(name=f"P{i}", price=i + 1, stock=20) for i in range(2)]
+
+    def place_order(self, products):
+        """Create an order and run its on_commit publishers; returns the publish queries."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_order(self.customer.pk, [p.pk for p in products])
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        return len(queries.captured_queries)
+
+    def test_handshake_rules(self):
+        async def run():
+            no_protocol = WebSocketConnection(subprotocols=())
+            self.assertEqual(await no_protocol.receive(), {"type": "websocket.close", "code": 1002, "reason": ""})
+            other_path = WebSocketConnection(path="/other")
+            self.assertEqual((await other_path.receive())["code"], 1000)
+            early = WebSocketConnection()
+            await early.receive()
+            early.send({"id": "1", "type": "subscribe", "payload": {"query": ORDER_SUBSCRIPTION}})
+            self.assertEqual((await early.receive())["code"], 4401)
+            await asyncio.gather(no_protocol.task, other_path.task, early.task)
+
+        async_to_sync(run)()
+
+    def test_events_are_filtered_per_subscription(self):
+        async def run():
+            ws = WebSocketConnection()
+            await ws.open()
+            ws.send({"id": "o", "type": "subscribe",
+                     "payload": {"query": ORDER_SUBSCRIPTION, "variables": {"min": "2"}}})
+            ws.send({"id": "s", "type": "subscribe",
+                     "payload": {"query": STOCK_SUBSCRIPTION, "variables": {"ids": [str(self.products[0].pk)]}}})
+            ws.send({"id": "q", "type": "subscribe", "payload": {"query": "{ totalOrders }"}})
+            self.assertEqual((await ws.receive())["type"], "error")
+            await asyncio.sleep(0.05)
+
+            # Total 2: reaches the order subscription; P1 is not watched
+            await sync_to_async(self.place_order)([self.products[1]])
+            message = await ws.receive()
+            self.assertEqual(message["id"], "o")
+            self.assertEqual(message["payload"]["data"]["orderCreated"]["totalAmount"], "2.00")
+            # Total 1 is under minTotal; P0's stock change is watched
+            await sync_to_async(self.place_order)([self.products[0]])
+            message = await ws.receive()
+            self.assertEqual(message["id"], "s")
+            self.assertEqual(message["payload"]["data"]["productStockChanged"], {"name": "P0", "stock": 19})
+            with self.assertRaises(asyncio.TimeoutError):
+                await ws.receive(timeout=0.1)
+
+            ws.send({"id": "o", "type": "complete"})
+            await asyncio.sleep(0.05)
+            self.assertFalse(broadcast.broadcast.has_subscribers(broadcast.ORDER_CREATED))
+            ws.send({"id": "s", "type": "subscribe", "payload": {"query": STOCK_SUBSCRIPTION}})
+            self.assertEqual((await ws.receive())["code"], 4409)
+            await ws.task
+            self.assertFalse(broadcast.broadcast.has_subscribers(broadcast.PRODUCT_STOCK))
+
+        async_to_sync(run)()
+
+    def test_one_read_per_event_whatever_the_number_of_subscribers(self):
+        async def run():
+            connections = [WebSocketConnection() for _ in range(5)]
+            for ws in connections:
+                await ws.open()
+                ws.send({"id": "o", "type": "subscribe", "payload": {"query": ORDER_SUBSCRIPTION}})
+            await asyncio.sleep(0.05)
+            queries = await sync_to_async(self.place_order)(self.products)
+            received = [await ws.receive() for ws in connections]
+            for ws in connections:
+                await ws.close()
+            return queries, received
+
+        queries, received = async_to_sync(run)()
+        self.assertEqual([m["payload"]["data"]["orderCreated"]["totalAmount"] for m in received], ["3.00"] * 5)
+        # The order with its customer, and its products; nobody watches stock
+        self.assertEqual(queries, 2)
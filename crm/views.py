@@ -1,3 +1,590 @@
-from django.shortcuts import render
+import hmac
+import json
+from asyncio import gather
+from contextvars import copy_context
+from inspect import isawaitable
 
-# Create your views here.
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connection, router, transaction
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse,
+)
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.http import require_GET, require_POST
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, validate_schema
+from graphql.execution import MiddlewareManager
+
+from . import cost, exporters, instrumentation, persisted, response_cache, routers, sqlite
+from .async_execution import ThreadedRootExecutionContext, get_executor, run_sync
+from .exporters import EXPORT_CHUNK_SIZE, ExportError, export_orders, export_queryset
+from .importers import FORMATS, IMPORT_BATCH_SIZE, guess_format, import_customers
+from .instrumentation import ResolverMetricsMiddleware
+from .loaders import Loaders
+from .models import Order
+
+
+# -------------------------------
+# Bulk import / export
+# -------------------------------
+def has_bearer_token(request, setting):
+    """The request sends ``Authorization: Bearer <token>`` matching the (non-empty) ``setting``."""
+    token = getattr(settings, setting, None)
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip(), token)
+
+
+def is_staff(request):
+    user = getattr(request, "user", None)
+    return user is not None and user.is_active and user.is_staff
+
+
+def export_allowed(request):
+    """Exports carry customer PII: staff sessions, or ``Authorization: Bearer <CRM_EXPORT_TOKEN>``."""
+    return is_staff(request) or has_bearer_token(request, "CRM_EXPORT_TOKEN")
+
+
+def import_allowed(request):
+    """Imports write in bulk: ``Authorization: Bearer <CRM_IMPORT_TOKEN>``, or a staff session.
+
+    The view is CSRF-exempt for token clients, so a session still has to
+    pass the CSRF check.
+    """
+    if has_bearer_token(request, "CRM_IMPORT_TOKEN"):
+        return True
+    return is_staff(request) and CsrfViewMiddleware(HttpResponse).process_view(request, None, (), {}) is None
+
+
+@require_POST
+def import_customers_view(request):
+    """Stream an uploaded CSV/NDJSON customer list into the database.
+
+    Accepts either a multipart upload in the ``file`` field or the raw file as
+    the request body; the format comes from ``?format=``, the file name or the
+    content type. Only for staff or holders of the import token
+    (import_allowed).
+    """
+    if not import_allowed(request):
+        return JsonResponse({"error": "Staff login or import token required"}, status=403)
+    upload = request.FILES.get("file")
+    if upload is not None:
+        lines = upload
+        fmt = request.GET.get("format") or guess_format(upload.name, upload.content_type or "")
+    else:
+        lines = request
+        fmt = request.GET.get("format") or guess_format(content_type=request.content_type or "")
+    if fmt not in FORMATS:
+        return JsonResponse({"error": "Unknown format; use ?format=csv or ?format=ndjson"}, status=400)
+
+    try:
+        batch_size = max(1, int(request.GET.get("batch_size", IMPORT_BATCH_SIZE)))
+    except ValueError:
+        return JsonResponse({"error": "batch_size must be an integer"}, status=400)
+
+    result = import_customers(lines, fmt, batch_size)
+    return JsonResponse(result.as_dict())
+
+
+@require_GET
+def export_orders_view(request):
+    """Stream every order matching the OrderFilter query parameters as CSV or NDJSON.
+
+    ``?format=csv`` (default) or ``?format=ndjson``; every other parameter is
+    an OrderFilter argument, e.g. ``?order_date_gte=2025-01-01``. Only for
+    staff or holders of the export token (export_allowed).
+    """
+    if not export_allowed(request):
+        return JsonResponse({"error": "Staff login or export token required"}, status=403)
+    fmt = request.GET.get("format", "csv")
+    if fmt not in exporters.FORMATS:
+        return JsonResponse({"error": "Unknown format; use ?format=csv or ?format=ndjson"}, status=400)
+    params = request.GET.copy()
+    params.pop("format", None)
+    try:
+        # Validate up front: once streaming starts the status line is already sent
+        export_queryset(params)
+    except ExportError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    # Pick the (replica) alias now; the body is streamed after the routing scope has closed
+    using = router.db_for_read(Order)
+    lines = export_orders(fmt, params, EXPORT_CHUNK_SIZE, using)
+    if isinstance(request, ASGIRequest):
+        lines = exporters.aiter_lines(lines)
+    response = StreamingHttpResponse(lines, content_type=exporters.CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="orders.{fmt}"'
+    return response
+
+
+# -------------------------------
+# GraphQL endpoint
+# -------------------------------
+class PreparedRequest:
+    """What PersistedQueryGraphQLView.prepare_request found out before execution.
+
+    A ``result`` (errors or a cached response), or no ``document``, ends the
+    request without executing anything.
+    """
+
+    def __init__(self, document=None, operation_ast=None, cache_key=None, result=None, query_cost=None,
+                 metrics=None):
+        self.document = document
+        self.operation_ast = operation_ast
+        self.cache_key = cache_key
+        self.result = result
+        self.query_cost = query_cost
+        self.metrics = metrics
+
+    @property
+    def done(self):
+        return self.result is not None or self.document is None
+
+    @property
+    def is_query(self):
+        return self.operation_ast is not None and self.operation_ast.operation == OperationType.QUERY
+
+    def finish(self, result):
+        """Attach the query cost, and the resolver breakdown when debugging, to ``result.extensions``."""
+        if result is None:
+            return result
+        extensions = dict(result.extensions or {})
+        if self.query_cost is not None:
+            extensions["cost"] = self.query_cost.as_extension()
+        if self.metrics is not None and self.metrics.debug:
+            extensions["metrics"] = self.metrics.as_extension()
+        result.extensions = extensions or None
+        return result
+
+
+class PersistedQueryGraphQLView(GraphQLView):
+    """GraphQLView that resolves documents through crm.persisted.
+
+    Repeated query texts and APQ hashes reuse a parsed and validated
+    DocumentNode from the LRU cache instead of re-running parse() and
+    validate(); operations over the crm.cost budget are rejected before
+    execution, and query results are served from crm.response_cache while
+    none of the models they read has changed. Responses carry the query
+    cost in ``extensions``. A JSON array body is a batch of operations
+    answered in one response (see execute_batch). The rest mirrors
+    GraphQLView.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            data = self.parse_body(request) if request.method.lower() == "post" else None
+        except HttpError:
+            data = None
+        if isinstance(data, list):
+            result, status_code = self.get_batch_response(request, data)
+            return HttpResponse(status=status_code, content=result, content_type="application/json")
+        return super().dispatch(request, *args, **kwargs)
+
+    def parse_body(self, request):
+        """GraphQLView.parse_body, also accepting a JSON array of operations; parsed once per request."""
+        if not hasattr(request, "_crm_body"):
+            request._crm_body = self.parse_batch_body(request)
+        return request._crm_body
+
+    def parse_batch_body(self, request):
+        if self.get_content_type(request) != "application/json":
+            return super().parse_body(request)
+        try:
+            body = json.loads(request.body.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            raise HttpError(HttpResponseBadRequest("POST body sent invalid JSON."))
+        if isinstance(body, dict):
+            return body
+        max_size = settings.CRM_GRAPHQL_MAX_BATCH_SIZE
+        if not isinstance(body, list) or not all(isinstance(entry, dict) for entry in body):
+            raise HttpError(HttpResponseBadRequest("The received data is not a valid JSON query."))
+        if not body:
+            raise HttpError(HttpResponseBadRequest("Received an empty list in the batch request."))
+        if len(body) > max_size:
+            raise HttpError(HttpResponseBadRequest(
+                f"A batch may hold at most {max_size} operations, received {len(body)}."
+            ))
+        return body
+
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+        if not execution_result:
+            return None, 200
+        return self.encode_result(request, execution_result, id, show_graphiql)
+
+    def encode_result(self, request, execution_result, id=None, pretty=False, batched=False):
+        """GraphQLView.get_response's JSON body and status, plus ``extensions``."""
+        status_code = 200
+        response = {}
+        if execution_result.errors:
+            set_rollback()
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+        if execution_result.errors and any(
+            not getattr(e, "path", None) for e in execution_result.errors
+        ):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+        if execution_result.extensions:
+            response["extensions"] = execution_result.extensions
+        if self.batch or batched:
+            response["id"] = id
+            response["status"] = status_code
+        return self.json_encode(request, response, pretty=pretty), status_code
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name,
+                                show_graphiql=False):
+        prepared = self.prepare_request(request, data, query, variables, operation_name, show_graphiql)
+        return self.execute_prepared(request, prepared, variables, operation_name)
+
+    def execute_prepared(self, request, prepared, variables, operation_name):
+        if prepared.done:
+            return prepared.finish(prepared.result)
+        return prepared.finish(self.execute_document(
+            request, prepared.document, prepared.operation_ast, variables, operation_name,
+            prepared.cache_key, prepared.metrics,
+        ))
+
+    # -------------------------------
+    # Batches
+    # -------------------------------
+    def get_batch_response(self, request, entries):
+        """Answer a JSON array of operations with a JSON array of results, in order.
+
+        Every entry carries its own ``id`` and ``status``; one failing entry
+        does not affect the others. The status of the response is the
+        highest entry status.
+        """
+        responses = self.execute_batch(request, entries)
+        result = "[{}]".format(",".join(response[0] for response in responses))
+        return result, max(response[1] for response in responses)
+
+    def start_batch(self, request):
+        # One set of DataLoaders for the whole batch, shared by the threads running its queries
+        request.crm_loaders = Loaders()
+
+    def after_batch_mutation(self, request):
+        # Later entries must see the mutation, not what the loaders cached before it
+        request.crm_loaders = Loaders()
+
+    def prepare_batch_entry(self, request, entry):
+        """``(id, prepared, variables, operation_name)``, or ``(id, encoded error response, None, None)``."""
+        id = entry.get("id")
+        try:
+            query, variables, operation_name, id = self.get_graphql_params(request, entry)
+            return id, self.analyze_request(request, entry, query, variables, operation_name), variables, \
+                operation_name
+        except HttpError as e:
+            status_code = e.response.status_code
+            body = {"errors": [self.format_error(e)], "id": id, "status": status_code}
+            return id, (self.json_encode(request, body), status_code), None, None
+
+    def prepare_batch(self, request, entries):
+        """Analyze every entry up front; ``(entries, None)``, or ``(None, responses)`` rejecting the batch.
+
+        The batch is rejected as a whole when the entries that passed their
+        own checks together exceed the cost budget (cost.check_batch).
+        """
+        prepared = [self.prepare_batch_entry(request, entry) for entry in entries]
+        errors = cost.check_batch(
+            entry.query_cost for _, entry, _, _ in prepared
+            if isinstance(entry, PreparedRequest) and not entry.done and entry.query_cost is not None
+        )
+        if errors:
+            result = ExecutionResult(data=None, errors=errors)
+            return None, [self.encode_result(request, result, id, batched=True) for id, _, _, _ in prepared]
+        return prepared, None
+
+    def execute_batch(self, request, entries):
+        """Run the entries of a batch; consecutive queries run concurrently, mutations one by one.
+
+        Entries are looked up in the response cache in order, so a query
+        after a mutation is served or resolved only once the mutation has
+        finished. Queries run on the crm.async_execution pool; mutations and
+        everything else run on the request thread, and so does everything
+        when the request is already inside a transaction (ATOMIC_REQUESTS),
+        which pool threads, on their own connections, could not see.
+        """
+        self.start_batch(request)
+        prepared_entries, rejected = self.prepare_batch(request, entries)
+        if rejected:
+            return rejected
+        concurrent = not connection.in_atomic_block
+        executor = get_executor()
+        responses = [None] * len(entries)
+        in_flight = {}
+
+        def drain():
+            for index, future in in_flight.items():
+                responses[index] = future.result()
+            in_flight.clear()
+
+        def run_query(id, prepared, variables, operation_name):
+            try:
+                result = self.execute_prepared(request, prepared, variables, operation_name)
+                return self.encode_result(request, result, id, batched=True)
+            finally:
+                close_old_connections()
+
+        for index, (id, prepared, variables, operation_name) in enumerate(prepared_entries):
+            if isinstance(prepared, tuple):
+                responses[index] = prepared
+                continue
+            prepared = self.lookup_response(request, prepared, variables, operation_name)
+            if prepared.is_query and not prepared.done and concurrent:
+                in_flight[index] = executor.submit(
+                    copy_context().run, run_query, id, prepared, variables, operation_name
+                )
+            else:
+                drain()
+                result = self.execute_prepared(request, prepared, variables, operation_name)
+                if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                    set_rollback()
+                responses[index] = self.encode_result(request, result, id, batched=True)
+                if not prepared.done and not prepared.is_query:
+                    self.after_batch_mutation(request)
+        drain()
+        return responses
+
+    def prepare_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """Resolve the document, check its cost and look up the response cache."""
+        prepared = self.analyze_request(request, data, query, variables, operation_name, show_graphiql)
+        return self.lookup_response(request, prepared, variables, operation_name)
+
+    def analyze_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """Resolve the document and check its operation and cost, without executing anything."""
+        sha256 = persisted.requested_hash(request, data)
+        if not query and not sha256:
+            if show_graphiql:
+                return PreparedRequest()
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return PreparedRequest(result=ExecutionResult(data=None, errors=schema_validation_errors))
+
+        document, errors = persisted.get_document(
+            schema, query or None, sha256,
+            self.validation_rules, graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        if errors:
+            return PreparedRequest(result=ExecutionResult(data=None, errors=errors))
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return PreparedRequest()
+            raise HttpError(HttpResponseNotAllowed(
+                ["POST"],
+                f"Can only perform a {operation_ast.operation.value} operation from a POST request.",
+            ))
+        if operation_ast is not None and operation_ast.operation == OperationType.SUBSCRIPTION:
+            return PreparedRequest(result=ExecutionResult(data=None, errors=[GraphQLError(
+                "Subscriptions are served over WebSocket (graphql-transport-ws) at /graphql."
+            )]))
+        # Queries may read from a replica even when POSTed; mutations pin the request to the primary
+        routers.route_operation(operation_ast is not None and operation_ast.operation == OperationType.QUERY)
+
+        # A ValidationRule cannot see variable values, so the budget is checked here instead
+        query_cost = None
+        if operation_ast is not None:
+            query_cost = cost.analyze(schema, document, operation_ast, variables)
+            if query_cost.errors:
+                return PreparedRequest(
+                    result=ExecutionResult(data=None, errors=query_cost.errors), query_cost=query_cost
+                )
+        return PreparedRequest(document, operation_ast, query_cost=query_cost)
+
+    def lookup_response(self, request, prepared, variables, operation_name):
+        """Serve an analyzed query from the response cache, or get it ready to execute."""
+        if prepared.done:
+            return prepared
+        document, operation_ast, query_cost = prepared.document, prepared.operation_ast, prepared.query_cost
+        cache_key = None
+        if response_cache.enabled() and prepared.is_query:
+            cache_key = response_cache.cache_key(self.schema.graphql_schema, document, variables, operation_name)
+            data = response_cache.get_response(cache_key)
+            if data is not None:
+                return PreparedRequest(
+                    document, operation_ast, cache_key, ExecutionResult(data=data), query_cost
+                )
+        # Sampled operations (or a debug header) get per-resolver timing; the rest skip the middleware
+        return PreparedRequest(
+            document, operation_ast, cache_key, query_cost=query_cost,
+            metrics=instrumentation.start_operation(request),
+        )
+
+    def get_execute_options(self, request, variables, operation_name, metrics=None):
+        middleware = self.get_middleware(request)
+        if metrics is not None:
+            if isinstance(middleware, MiddlewareManager):
+                middleware = middleware.middlewares
+            middleware = [*(middleware or ()), ResolverMetricsMiddleware(metrics)]
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": middleware,
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return execute_options
+
+    def execute_document(self, request, document, operation_ast, variables, operation_name, cache_key,
+                         metrics=None):
+        schema = self.schema.graphql_schema
+        try:
+            execute_options = self.get_execute_options(request, variables, operation_name, metrics)
+
+            if operation_ast is not None and operation_ast.operation == OperationType.MUTATION:
+                # One writer at a time per process on SQLite (CRM_SQLITE_WRITER_QUEUE), else inline
+                return sqlite.run_serialized(self.execute_mutation, request, schema, document, execute_options)
+
+            result = execute(schema, document, **execute_options)
+            if cache_key is not None and not result.errors:
+                response_cache.store_response(cache_key, result.data)
+            return result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def execute_mutation(self, request, schema, document, execute_options):
+        if (
+            graphene_settings.ATOMIC_MUTATIONS is True
+            or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+        ):
+            with transaction.atomic():
+                result = execute(schema, document, **execute_options)
+                if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                    transaction.set_rollback(True)
+            return result
+        return execute(schema, document, **execute_options)
+
+
+class AsyncGraphQLView(PersistedQueryGraphQLView):
+    """Async counterpart of PersistedQueryGraphQLView for ASGI servers.
+
+    Queries run on graphql-core's async executor with each root field in a
+    thread from the bounded crm.async_execution pool, so independent root
+    fields resolve concurrently and the event loop never waits on the
+    database. Document lookup, the response cache and mutations (which must
+    stay serial and may be atomic) run as single pool jobs. No GraphiQL.
+    """
+
+    view_is_async = True
+
+    def get_context(self, request):
+        # Root fields share the request's loaders from several threads; create them up front
+        if getattr(request, "crm_loaders", None) is None:
+            request.crm_loaders = Loaders()
+        return request
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(HttpResponseNotAllowed(
+                    ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                ))
+            data = self.parse_body(request)
+            if isinstance(data, list):
+                responses = await self.execute_batch_async(request, data)
+                result = "[{}]".format(",".join(response[0] for response in responses))
+                status_code = max(response[1] for response in responses)
+            else:
+                result, status_code = await self.get_async_response(request, data)
+            return HttpResponse(status=status_code, content=result, content_type="application/json")
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def get_async_response(self, request, data):
+        """GraphQLView.get_response with the execution awaited."""
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        execution_result = await self.execute_graphql_request_async(
+            request, data, query, variables, operation_name
+        )
+        return self.encode_result(request, execution_result, id)
+
+    async def execute_graphql_request_async(self, request, data, query, variables, operation_name):
+        prepared = await run_sync(self.prepare_request)(request, data, query, variables, operation_name)
+        return await self.execute_prepared_async(request, prepared, variables, operation_name)
+
+    async def execute_prepared_async(self, request, prepared, variables, operation_name):
+        if prepared.done:
+            return prepared.finish(prepared.result)
+        if not prepared.is_query:
+            return await run_sync(self.execute_prepared)(request, prepared, variables, operation_name)
+
+        try:
+            execute_options = self.get_execute_options(request, variables, operation_name, prepared.metrics)
+            execute_options["execution_context_class"] = ThreadedRootExecutionContext
+            result = execute(self.schema.graphql_schema, prepared.document, **execute_options)
+            if isawaitable(result):
+                result = await result
+        except Exception as e:
+            return prepared.finish(ExecutionResult(errors=[e]))
+        if prepared.cache_key is not None and not result.errors:
+            await run_sync(response_cache.store_response)(prepared.cache_key, result.data)
+        return prepared.finish(result)
+
+    async def execute_batch_async(self, request, entries):
+        """execute_batch on the event loop: consecutive queries are awaited together."""
+        self.start_batch(request)
+        prepared_entries, rejected = await run_sync(self.prepare_batch)(request, entries)
+        if rejected:
+            return rejected
+        responses = [None] * len(entries)
+        in_flight = {}
+
+        async def run_query(id, prepared, variables, operation_name):
+            result = await self.execute_prepared_async(request, prepared, variables, operation_name)
+            return self.encode_result(request, result, id, batched=True)
+
+        async def drain():
+            results = await gather(*in_flight.values())
+            for index, response in zip(in_flight, results):
+                responses[index] = response
+            in_flight.clear()
+
+        for index, (id, prepared, variables, operation_name) in enumerate(prepared_entries):
+            if isinstance(prepared, tuple):
+                responses[index] = prepared
+                continue
+            prepared = await run_sync(self.lookup_response)(request, prepared, variables, operation_name)
+            if prepared.is_query and not prepared.done:
+                in_flight[index] = run_query(id, prepared, variables, operation_name)
+            else:
+                await drain()
+                result = await self.execute_prepared_async(request, prepared, variables, operation_name)
+                responses[index] = self.encode_result(request, result, id, batched=True)
+                if not prepared.done and not prepared.is_query:
+                    self.after_batch_mutation(request)
+        await drain()
+        return responses
+
+
+@require_GET
+def response_cache_stats_view(request):
+    """Hit/miss counters of the GraphQL response cache."""
+    return JsonResponse(response_cache.stats())
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus text exposition of the GraphQL resolver metrics."""
+    return HttpResponse(instrumentation.render_metrics(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,185 @@
+import asyncio
+import json
+
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import ExecutionResult, GraphQLError, OperationType, get_operation_ast, subscribe
+
+from . import persisted
+from .async_execution import run_sync
+
+PROTOCOL = "graphql-transport-ws"
+GRAPHQL_PATH = "/graphql"
+DEFAULT_INIT_TIMEOUT = 10
+
+
+class ProtocolClose(Exception):
+    """Close the connection with a graphql-transport-ws close code."""
+
+    def __init__(self, code, reason):
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+# -------------------------------
+# graphql-transport-ws
+# -------------------------------
+class GraphQLWebSocket:
+    """One WebSocket connection speaking graphql-transport-ws (the graphql-ws / Apollo protocol).
+
+    Every ``subscribe`` message runs as its own task that forwards results
+    as ``next`` messages until the client sends ``complete`` or
+    disconnects. Documents are resolved like the HTTP view's (document
+    cache, persisted-query mode); only subscription operations are served,
+    queries and mutations stay on POST /graphql.
+    """
+
+    def __init__(self, scope, receive, send, schema=None):
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self.schema = schema or graphene_settings.SCHEMA.graphql_schema
+        self.acknowledged = False
+        self.operations = {}
+        self.send_lock = asyncio.Lock()
+
+    async def send(self, message):
+        # Operation tasks send concurrently
+        async with self.send_lock:
+            await self._send(message)
+
+    async def send_json(self, data):
+        await self.send({"type": "websocket.send", "text": json.dumps(data)})
+
+    async def close(self, code, reason=""):
+        await self.send({"type": "websocket.close", "code": code, "reason": reason})
+
+    async def run(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        if PROTOCOL not in self.scope.get("subprotocols", ()):
+            # Closing before accepting rejects the handshake with 403
+            await self.close(1002)
+            return
+        await self.send({"type": "websocket.accept", "subprotocol": PROTOCOL})
+
+        watchdog = asyncio.create_task(self.expect_init())
+        try:
+            while True:
+                message = await self.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message["type"] != "websocket.receive":
+                    continue
+                try:
+                    await self.handle(message.get("text") or message.get("bytes"))
+                except ProtocolClose as e:
+                    await self.close(e.code, e.reason)
+                    break
+        finally:
+            watchdog.cancel()
+            tasks = list(self.operations.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def expect_init(self):
+        await asyncio.sleep(getattr(settings, "CRM_GRAPHQL_WS_INIT_TIMEOUT", DEFAULT_INIT_TIMEOUT))
+        if not self.acknowledged:
+            await self.close(4408, "Connection initialisation timeout")
+
+    async def handle(self, text):
+        try:
+            message = json.loads(text)
+            type = message["type"]
+        except (TypeError, ValueError, KeyError):
+            raise ProtocolClose(4400, "Invalid message received")
+
+        if type == "connection_init":
+            if self.acknowledged:
+                raise ProtocolClose(4429, "Too many initialisation requests")
+            self.acknowledged = True
+            await self.send_json({"type": "connection_ack"})
+        elif type == "ping":
+            await self.send_json({"type": "pong"})
+        elif type == "pong":
+            pass
+        elif type == "subscribe":
+            if not self.acknowledged:
+                raise ProtocolClose(4401, "Unauthorized")
+            id, payload = message.get("id"), message.get("payload")
+            if not isinstance(id, str) or not isinstance(payload, dict):
+                raise ProtocolClose(4400, "Invalid message received")
+            if id in self.operations:
+                raise ProtocolClose(4409, f"Subscriber for {id} already exists")
+            self.operations[id] = asyncio.create_task(self.run_operation(id, payload))
+        elif type == "complete":
+            task = self.operations.pop(message.get("id"), None)
+            if task is not None:
+                task.cancel()
+        else:
+            raise ProtocolClose(4400, f"Unexpected message type: {type}")
+
+    async def run_operation(self, id, payload):
+        try:
+            stream = await self.start_operation(payload)
+            if isinstance(stream, ExecutionResult):
+                await self.send_json({"id": id, "type": "error", "payload": stream.formatted["errors"]})
+                return
+            try:
+                async for result in stream:
+                    await self.send_json({"id": id, "type": "next", "payload": result.formatted})
+            finally:
+                await stream.aclose()
+            await self.send_json({"id": id, "type": "complete"})
+        finally:
+            # A client may reuse the id as soon as it has sent complete
+            if self.operations.get(id) is asyncio.current_task():
+                del self.operations[id]
+
+    async def start_operation(self, payload):
+        """The operation's result stream, or an ExecutionResult holding why it cannot start."""
+        query = payload.get("query")
+        variables = payload.get("variables")
+        operation_name = payload.get("operationName")
+        if variables is not None and not isinstance(variables, dict):
+            return ExecutionResult(errors=[GraphQLError("Variables are invalid JSON.")])
+
+        sha256 = persisted.requested_hash(None, payload)
+        if not query and not sha256:
+            return ExecutionResult(errors=[GraphQLError("Must provide query string.")])
+        # The persisted-query registry lives in the database
+        document, errors = await run_sync(persisted.get_document)(
+            self.schema, query or None, sha256, None, graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        if errors:
+            return ExecutionResult(errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is None:
+            return ExecutionResult(errors=[GraphQLError("Must provide a valid operation name.")])
+        if operation_ast.operation != OperationType.SUBSCRIPTION:
+            return ExecutionResult(errors=[GraphQLError(
+                f"Only subscriptions are served over WebSocket; send {operation_ast.operation.value} "
+                "operations to POST /graphql."
+            )])
+        return await subscribe(
+            self.schema, document, variable_values=variables, operation_name=operation_name,
+            context_value=self,
+        )
+
+
+def websocket_application(http_application, path=GRAPHQL_PATH):
+    """ASGI app serving graphql-transport-ws on ``path``; every other scope goes to ``http_application``."""
+    async def application(scope, receive, send):
+        if scope["type"] != "websocket":
+            return await http_application(scope, receive, send)
+        if scope["path"].rstrip("/") != path:
+            await receive()
+            await send({"type": "websocket.close", "code": 1000})
+            return
+        await GraphQLWebSocket(scope, receive, send).run()
+
+    return application